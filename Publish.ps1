@@ -494,9 +494,18 @@ try {
         $verifyOk = Verify-Package -PackagePath $packagePath
 
         # Content gate: manifest-driven verification of the ZIP itself (CC-10).
+        # Every zip gets a payload lock (per-entry size/CRC/blake2b) written next
+        # to it; when tools/package_lock.json exists the zip is also diffed against
+        # that previous-release lock, which catches silently changed or truncated
+        # sprite bins without re-reading the unchanged ones. Accept intended
+        # payload changes by copying the new lock over tools/package_lock.json.
         if ($verifyOk) {
             Write-Status "Running package content gate (tools/analyze.py)..." "Cyan"
-            python tools/analyze.py --zip "$packagePath"
+            $lockArgs = @("--write-lock", "$packagePath.lock.json")
+            if (Test-Path "tools/package_lock.json") {
+                $lockArgs += @("--lock", "tools/package_lock.json")
+            }
+            python tools/analyze.py --zip "$packagePath" @lockArgs
             if ($LASTEXITCODE -ne 0) {
                 Write-Status "Publishing failed - analyze.py content gate failed" "Red"
                 $verifyOk = $false
@@ -5,32 +5,21 @@ Useful for understanding existing themes before creating new ones.
 """
 
 import sys
-import struct
 from pathlib import Path
-from collections import Counter
+
+import numpy as np
+
+import fftsprite
 
 def read_palette(sprite_path):
     """Read the palette from an FFT sprite file."""
-    with open(sprite_path, 'rb') as f:
-        # First 512 bytes are the palette (256 colors * 2 bytes each)
-        palette_data = f.read(512)
-
-    colors = []
-    for i in range(0, 512, 2):
-        if i < len(palette_data):
-            # Read 16-bit color (XBBBBBGGGGGRRRRR format)
-            color_bytes = palette_data[i:i+2]
-            if len(color_bytes) == 2:
-                color = struct.unpack('<H', color_bytes)[0]
-
-                # Extract RGB components (5 bits each)
-                r = (color & 0x1F) * 8  # Scale 5-bit to 8-bit
-                g = ((color >> 5) & 0x1F) * 8
-                b = ((color >> 10) & 0x1F) * 8
-
-                colors.append((r, g, b))
-
-    return colors
+    # First 512 bytes are the palette (256 colors * 2 bytes each), XBBBBBGGGGGRRRRR
+    with fftsprite.MappedFile(sprite_path) as sprite:
+        words = sprite.words[:256].astype(np.int64)
+
+    # Extract RGB components (5 bits each), scaled 5-bit to 8-bit
+    rgb = np.stack([words & 0x1F, (words >> 5) & 0x1F, (words >> 10) & 0x1F], axis=-1) * 8
+    return [tuple(c) for c in rgb.tolist()]
 
 def rgb_to_hex(r, g, b):
     """Convert RGB values to hex color."""
@@ -2,11 +2,17 @@
 """
 FFT Texture Analysis Tool
 Analyzes decompressed .bin files to identify color palettes and texture data structures.
+
+The file is memory-mapped (fftsprite.MappedFile) and scanned as whole NumPy
+arrays: byte histogram, 16-bit words, palette candidates and repeated tiles
+are all computed without unpacking or copying one value at a time.
 """
 
-import struct
 import os
-from collections import Counter
+
+import numpy as np
+
+import fftsprite
 
 def rgb555_to_rgb888(color_val):
     """Convert 16-bit RGB555 to RGB888 format"""
@@ -25,16 +31,20 @@ def rgb565_to_rgb888(color_val):
 def analyze_binary_file(filename):
     """Analyze binary file structure for color palettes and texture data"""
 
-    with open(filename, 'rb') as f:
-        data = f.read()
+    mapped = fftsprite.MappedFile(filename)
+    data = mapped.buffer        # zero-copy; the mapping lives as long as this view
 
-    file_size = len(data)
+    file_size = mapped.size
     print(f"File size: {file_size} bytes")
     print(f"File size in hex: 0x{file_size:X}")
 
-    # Analyze byte distribution
-    byte_counts = Counter(data)
-    print(f"\nMost common bytes: {byte_counts.most_common(10)}")
+    # Analyze byte distribution (ties in first-seen order, like Counter.most_common)
+    raw = np.frombuffer(data, dtype=np.uint8)
+    values, first = np.unique(raw, return_index=True)
+    counts = np.bincount(raw, minlength=256)[values]
+    top = np.lexsort((first, -counts))[:10]
+    most_common = [(int(values[i]), int(counts[i])) for i in top]
+    print(f"\nMost common bytes: {most_common}")
 
     # Look for common palette sizes (16, 256 colors)
     # 16 colors * 2 bytes = 32 bytes
@@ -44,41 +54,24 @@ def analyze_binary_file(filename):
     print("ANALYZING POTENTIAL 16-BIT COLOR DATA")
     print("="*50)
 
-    # Extract 16-bit values (little endian)
-    colors_16bit = []
-    for i in range(0, len(data) - 1, 2):
-        val = struct.unpack('<H', data[i:i+2])[0]
-        colors_16bit.append(val)
+    # 16-bit values (little endian), a view over the mapping
+    colors_16bit = mapped.words
 
     print(f"Total 16-bit values: {len(colors_16bit)}")
 
-    # Look for potential palettes by finding groups of non-zero colors
+    # Look for potential palettes by finding groups of non-zero colors:
+    # 16-color palettes (common in PSX games) with at least half the colors
+    # non-zero, then 256-color palettes with at least 1/8 non-zero
     potential_palettes = []
-
-    # Check for 16-color palettes (common in PSX games)
-    for start_idx in range(0, len(colors_16bit) - 15, 16):
-        palette = colors_16bit[start_idx:start_idx + 16]
-        non_zero = sum(1 for c in palette if c != 0)
-
-        if non_zero >= 8:  # At least half the colors are non-zero
+    for size, threshold in ((16, 8), (256, 32)):
+        blocks = colors_16bit[:len(colors_16bit) // size * size].reshape(-1, size)
+        non_zero = np.count_nonzero(blocks, axis=1)
+        for block in np.flatnonzero(non_zero >= threshold):
             potential_palettes.append({
-                'offset': start_idx * 2,
-                'size': 16,
-                'colors': palette,
-                'non_zero_count': non_zero
-            })
-
-    # Check for 256-color palettes
-    for start_idx in range(0, len(colors_16bit) - 255, 256):
-        palette = colors_16bit[start_idx:start_idx + 256]
-        non_zero = sum(1 for c in palette if c != 0)
-
-        if non_zero >= 32:  # At least 1/8 of colors are non-zero
-            potential_palettes.append({
-                'offset': start_idx * 2,
-                'size': 256,
-                'colors': palette,
-                'non_zero_count': non_zero
+                'offset': int(block) * size * 2,
+                'size': size,
+                'colors': blocks[block].tolist(),
+                'non_zero_count': int(non_zero[block])
             })
 
     print(f"\nFound {len(potential_palettes)} potential palettes:")
@@ -170,21 +163,17 @@ def analyze_texture_patterns(data):
     # Look for repeating patterns that might indicate tiles
     tile_sizes = [8, 16, 32, 64]
 
+    raw = np.frombuffer(data, dtype=np.uint8)
     for tile_size in tile_sizes:
         if len(data) >= tile_size:
-            patterns = {}
-            for i in range(0, len(data) - tile_size + 1, tile_size):
-                pattern = data[i:i+tile_size]
-                pattern_hash = hash(pattern)
-                if pattern_hash in patterns:
-                    patterns[pattern_hash] += 1
-                else:
-                    patterns[pattern_hash] = 1
+            # Whole tiles as fixed-size opaque records, counted in one pass
+            tiles = raw[:len(raw) // tile_size * tile_size].view(f'V{tile_size}')
+            _, counts = np.unique(tiles, return_counts=True)
 
-            repeated = {k: v for k, v in patterns.items() if v > 1}
-            if repeated:
+            repeated = counts[counts > 1]
+            if len(repeated):
                 print(f"\nFound {len(repeated)} repeated {tile_size}-byte patterns:")
-                for pattern_hash, count in sorted(repeated.items(), key=lambda x: x[1], reverse=True)[:5]:
+                for count in np.sort(repeated)[::-1][:5]:
                     print(f"  Pattern appears {count} times")
 
 def dump_hex_sections(data, sections=None):
@@ -8,21 +8,20 @@ Cloud uses a simple two-zone color scheme:
 
 import os
 import sys
-import struct
-import shutil
 from pathlib import Path
-import colorsys
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from convert_sprite_sw import extract_southwest_sprite
+from theme_batch import ThemeBatch, ThemeSpec
 
-def rgb_to_bgr555(r, g, b):
-    """Convert RGB to BGR555 format"""
-    r = min(31, r * 31 // 255)
-    g = min(31, g * 31 // 255)
-    b = min(31, b * 31 // 255)
-    return (b << 10) | (g << 5) | r
+# Cloud's actual color mapping based on the color test. Index 8 and 9 of the
+# main clothing carry the shadow and deep-shadow tones.
+CLOUD_INDEX_SETS = {
+    "accent": [3, 4, 5],   # Shoulder pads, wrist guards, outlines, boot trim
+    "main": [6, 7],        # Main clothing - pants, shoes, shirt, body
+    "main_shadow": [8],    # Slightly darker
+    "main_dark": [9],      # Darkest for deep shadows
+}
 
 def hex_to_rgb(hex_color):
     """Convert hex color to RGB tuple"""
@@ -113,57 +112,25 @@ def generate_theme_colors():
 
     return themes[:50]  # Ensure exactly 50 themes
 
-def create_themed_sprite(source_file, theme_name, main_color, accent_color):
-    """Create a themed sprite with the given colors
+def theme_spec(theme_name, main_color, accent_color):
+    """Build the batch spec for one theme
 
     Based on color test results:
     - Accent color (RED test) goes to indices 3-5 (shoulder pads, wrist guards, outlines)
     - Main color (GREEN test) goes to indices 6-9 (pants, shoes, shirt, main body)
     """
-
-    # Read original sprite
-    with open(source_file, 'rb') as f:
-        data = bytearray(f.read())
-
     main_rgb = hex_to_rgb(main_color)
     accent_rgb = hex_to_rgb(accent_color) if accent_color else main_rgb
 
-    # Create slight variations for depth within the main clothing
-    main_shadow = adjust_brightness(main_rgb, 0.75)  # 25% darker for shadows
-    main_dark = adjust_brightness(main_rgb, 0.5)     # 50% darker for deep shadows
-
-    # Cloud's actual color mapping based on test:
-    accent_indices = [3, 4, 5]  # Shoulder pads, wrist guards, outlines, boot trim
-    main_indices = [6, 7, 8, 9]  # Main clothing - pants, shoes, shirt, body
-
-    # Apply colors to first 8 palettes (unit sprites)
-    for palette_idx in range(8):
-        base_offset = palette_idx * 32
-
-        # Apply accent colors to trim/outlines
-        for idx in accent_indices:
-            offset = base_offset + (idx * 2)
-            if offset + 1 < 512:
-                bgr555 = rgb_to_bgr555(*accent_rgb)
-                struct.pack_into('<H', data, offset, bgr555)
-
-        # Apply main colors with slight variations for depth
-        for i, idx in enumerate(main_indices):
-            offset = base_offset + (idx * 2)
-            if offset + 1 < 512:
-                # Add subtle variation to create depth
-                if i == 2:  # Index 8 - slightly darker
-                    bgr555 = rgb_to_bgr555(*main_shadow)
-                elif i == 3:  # Index 9 - darkest for deep shadows
-                    bgr555 = rgb_to_bgr555(*main_dark)
-                else:  # Indices 6-7 - main color
-                    bgr555 = rgb_to_bgr555(*main_rgb)
-                struct.pack_into('<H', data, offset, bgr555)
-
-    return data
+    return ThemeSpec(theme_name, {
+        "accent": accent_rgb,
+        "main": main_rgb,
+        "main_shadow": adjust_brightness(main_rgb, 0.75),  # 25% darker for shadows
+        "main_dark": adjust_brightness(main_rgb, 0.5),     # 50% darker for deep shadows
+    })
 
 def generate_all_themes():
-    """Generate all 50 Cloud themes"""
+    """Generate all 50 Cloud themes and their PNG previews in one parallel batch"""
     print("\n" + "="*60)
     print("Generating 50 Cloud Themes")
     print("Based on actual color mapping:")
@@ -173,56 +140,27 @@ def generate_all_themes():
 
     base_dir = Path(__file__).parent.parent.parent
     source_file = base_dir / "ColorMod/FFTIVC/data/enhanced/fftpack/unit/sprites_original/battle_cloud_spr.bin"
+    preview_dir = base_dir / "ColorMod/Resources/Previews/Cloud_Themes_Final"
 
     if not source_file.exists():
         print(f"Error: Cloud sprite not found at {source_file}")
-        return []
-
-    themes = generate_theme_colors()
-    created_themes = []
-
-    for i, (theme_name, main, accent) in enumerate(themes, 1):
-        print(f"[{i:2d}/50] Creating theme: {theme_name:30s}")
-
-        # Create theme directory
-        theme_dir = base_dir / f"ColorMod/FFTIVC/data/enhanced/fftpack/unit/sprites_cloud_{theme_name}"
-        theme_dir.mkdir(exist_ok=True, parents=True)
-
-        # Generate themed sprite
-        sprite_data = create_themed_sprite(source_file, theme_name, main, accent)
-
-        # Write themed sprite
-        output_file = theme_dir / "battle_cloud_spr.bin"
-        with open(output_file, 'wb') as f:
-            f.write(sprite_data)
-
-        created_themes.append((theme_name, output_file))
+        return [], preview_dir
 
-    print(f"\nSuccessfully created {len(created_themes)} themes")
-    return created_themes
-
-def convert_all_to_png(themes):
-    """Convert all themes to PNG previews"""
-    print("\n" + "="*60)
-    print("Converting All Themes to PNG Previews")
-    print("="*60)
-
-    base_dir = Path(__file__).parent.parent.parent
-    preview_dir = base_dir / "ColorMod/Resources/Previews/Cloud_Themes_Final"
-    preview_dir.mkdir(exist_ok=True, parents=True)
-
-    # Convert all theme sprites
-    for i, (theme_name, sprite_file) in enumerate(themes, 1):
-        print(f"[{i:2d}/50] Converting: {theme_name:30s}")
-
-        output_file = preview_dir / f"{i:02d}_{theme_name}.png"
-        try:
-            extract_southwest_sprite(str(sprite_file), str(output_file), palette_index=0, preview_mode=True)
-        except Exception as e:
-            print(f"Error converting {theme_name}: {e}")
-
-    print(f"\nPNG previews saved to: {preview_dir}")
-    return preview_dir
+    # Apply colors to first 8 palettes (unit sprites)
+    batch = ThemeBatch(
+        source_file, base_dir,
+        index_sets=CLOUD_INDEX_SETS,
+        palettes=range(8),
+        bin_name="ColorMod/FFTIVC/data/enhanced/fftpack/unit/sprites_cloud_{name}/battle_cloud_spr.bin",
+        preview_name="ColorMod/Resources/Previews/Cloud_Themes_Final/{index:02d}_{name}.png",
+        color_mode="scale",
+    )
+    specs = [theme_spec(*theme) for theme in generate_theme_colors()]
+    results = batch.run(specs)
+
+    print(f"\nSuccessfully created {len(results)} themes")
+    print(f"PNG previews saved to: {preview_dir}")
+    return [(r.name, r.bin_path) for r in results], preview_dir
 
 def create_html_gallery(preview_dir, themes):
     """Create an HTML gallery for easy viewing"""
@@ -376,16 +314,13 @@ def main():
     print("Generating 50 themes based on actual color mapping")
     print("="*60)
 
-    # Step 1: Generate all themes
-    themes = generate_all_themes()
+    # Step 1: Generate all themes (PNG previews are rendered alongside)
+    themes, preview_dir = generate_all_themes()
     if not themes:
         print("Failed to generate themes. Exiting.")
         return
 
-    # Step 2: Convert to PNGs
-    preview_dir = convert_all_to_png(themes)
-
-    # Step 3: Create HTML gallery
+    # Step 2: Create HTML gallery
     gallery_file = create_html_gallery(preview_dir, themes)
 
     # Summary
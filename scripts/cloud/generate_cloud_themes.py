@@ -4,6 +4,7 @@ Generate 50 diverse themes for Cloud Strife and create PNG previews
 Super efficient workflow - test mapping, generate themes, create previews all in one go
 """
 
+import json
 import os
 import sys
 import struct
@@ -12,12 +13,18 @@ import subprocess
 from pathlib import Path
 from PIL import Image
 import numpy as np
-import colorsys
 import random
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from convert_sprite_sw import extract_southwest_sprite
+from theme_batch import ThemeBatch, ThemeSpec
+
+# Theme colors and index sets live in the declarative spec shared with
+# compile_themes.py. Indices avoid hair 10-19 and index 44; cape edge (7) and
+# cape shadow (9) get darker variants of the primary color.
+CLOUD_SPEC = Path(__file__).resolve().parent.parent / "theme_specs" / "cloud.json"
+CLOUD_INDEX_SETS = json.loads(CLOUD_SPEC.read_text(encoding="utf-8"))["defaults"]["index_sets"]
 
 def bgr555_to_rgb(bgr555):
     """Convert BGR555 to RGB tuple"""
@@ -111,129 +118,25 @@ def create_color_test_sprite():
     return output_file
 
 def generate_theme_colors():
-    """Generate 50 diverse, aesthetically pleasing color combinations"""
-    themes = []
-
-    # 1. Classic FF7 Themes (5)
-    themes.extend([
-        ("soldier_first_class", "#4169E1", "#FFD700"),  # SOLDIER blue with gold
-        ("shinra_elite", "#1C1C1C", "#FF0000"),         # Black with red accents
-        ("midgar_industrial", "#708090", "#FF8C00"),    # Steel gray with orange
-        ("mako_infused", "#00FF7F", "#E0FFFF"),        # Mako green with cyan
-        ("buster_legacy", "#4B0082", "#C0C0C0"),       # Dark purple with silver
-    ])
-
-    # 2. Materia-Inspired (10)
-    themes.extend([
-        ("fire_materia", "#FF4500", "#FFD700"),         # Fire red with gold
-        ("ice_materia", "#00CED1", "#E0FFFF"),         # Ice blue with frost white
-        ("lightning_materia", "#FFD700", "#4B0082"),   # Electric yellow with purple
-        ("earth_materia", "#8B4513", "#DAA520"),       # Earth brown with gold
-        ("restore_materia", "#00FF00", "#FFFFFF"),     # Healing green with white
-        ("time_materia", "#9370DB", "#FFD700"),        # Purple with gold
-        ("gravity_materia", "#4B0082", "#000000"),     # Indigo with black
-        ("holy_materia", "#F0F8FF", "#FFD700"),        # Pure white with gold
-        ("meteor_materia", "#8B0000", "#FF4500"),      # Dark red with orange
-        ("ultima_materia", "#FF1493", "#00FFFF"),      # Deep pink with cyan
-    ])
-
-    # 3. Location-Based Themes (8)
-    themes.extend([
-        ("costa_del_sol", "#FF6347", "#40E0D0"),       # Coral with turquoise
-        ("golden_saucer", "#FFD700", "#FF1493"),       # Gold with hot pink
-        ("nibelheim_flame", "#FF4500", "#1C1C1C"),     # Fire orange with black
-        ("northern_crater", "#483D8B", "#00CED1"),     # Dark slate with cyan
-        ("ancient_forest", "#228B22", "#8B4513"),      # Forest green with brown
-        ("temple_ancients", "#DAA520", "#4B0082"),     # Golden with indigo
-        ("forgotten_capital", "#E0FFFF", "#4169E1"),    # Light cyan with royal blue
-        ("weapon_emerald", "#50C878", "#002000"),      # Emerald with dark green
-    ])
-
-    # 4. Limit Break Themes (7)
-    themes.extend([
-        ("omnislash", "#1E90FF", "#FFFFFF"),           # Dodger blue with white
-        ("meteorain", "#FF8C00", "#8B0000"),           # Dark orange with maroon
-        ("finishing_touch", "#00BFFF", "#FFD700"),     # Sky blue with gold
-        ("climhazzard", "#DC143C", "#FFD700"),         # Crimson with gold
-        ("blade_beam", "#00FF00", "#0000FF"),          # Lime with blue
-        ("cross_slash", "#800080", "#C0C0C0"),         # Purple with silver
-        ("braver", "#FF6347", "#4169E1"),              # Tomato with royal blue
-    ])
-
-    # 5. Enemy-Inspired (5)
-    themes.extend([
-        ("sephiroth_black", "#000000", "#C0C0C0"),     # Pure black with silver
-        ("jenova_synthesis", "#8B008B", "#00FF00"),    # Dark magenta with green
-        ("ruby_weapon", "#8B0000", "#FF0000"),         # Dark red with bright red
-        ("diamond_weapon", "#F0F8FF", "#4169E1"),      # Alice blue with royal
-        ("bahamut_zero", "#191970", "#FFD700"),        # Midnight blue with gold
-    ])
-
-    # 6. Gradient & Ombre Themes (10)
-    for i in range(10):
-        hue = i / 10.0
-        rgb1 = colorsys.hsv_to_rgb(hue, 0.8, 0.9)
-        rgb2 = colorsys.hsv_to_rgb((hue + 0.15) % 1.0, 0.7, 0.7)
-        color1 = "#{:02x}{:02x}{:02x}".format(int(rgb1[0]*255), int(rgb1[1]*255), int(rgb1[2]*255))
-        color2 = "#{:02x}{:02x}{:02x}".format(int(rgb2[0]*255), int(rgb2[1]*255), int(rgb2[2]*255))
-        themes.append((f"gradient_{i+1:02d}", color1, color2))
-
-    # 7. Metallic & Premium (5)
-    themes.extend([
-        ("platinum_edge", "#E5E4E2", "#4169E1"),       # Platinum with royal blue
-        ("rose_gold_elite", "#B76E79", "#FFD700"),     # Rose gold with gold
-        ("bronze_warrior", "#CD7F32", "#8B4513"),      # Bronze with saddle brown
-        ("titanium_core", "#878681", "#000000"),       # Titanium with black
-        ("copper_strike", "#B87333", "#2F4F4F"),       # Copper with dark slate
-    ])
-
-    return themes
-
-def create_themed_sprite(source_file, theme_name, primary_color, accent_color):
-    """Create a themed sprite with the given colors"""
-    # Read original sprite
-    with open(source_file, 'rb') as f:
-        data = bytearray(f.read())
+    """The 50 Cloud color combinations, from scripts/theme_specs/cloud.json"""
+    spec = json.loads(CLOUD_SPEC.read_text(encoding="utf-8"))
+    return [(name[len("cloud_"):], theme["colors"]["primary"], theme["colors"]["accent"])
+            for name, theme in spec["themes"].items()]
 
+def theme_spec(theme_name, primary_color, accent_color):
+    """Build the batch spec for one theme"""
     primary_rgb = hex_to_rgb(primary_color)
     accent_rgb = hex_to_rgb(accent_color) if accent_color else primary_rgb
 
-    # Create color variations
-    cape_edge = adjust_brightness(primary_rgb, 0.75)  # 25% darker
-    cape_shadow = adjust_brightness(primary_rgb, 0.5)  # 50% darker
-
-    # Define indices to modify (avoiding hair 10-19 and index 44)
-    accent_indices = [3, 4, 5]
-    primary_indices = list(range(6, 10)) + list(range(20, 32)) + list(range(35, 44)) + list(range(45, 48)) + list(range(51, 63))
-
-    # Apply colors to first 8 palettes
-    for palette_idx in range(8):
-        base_offset = palette_idx * 32
-
-        # Apply accent colors
-        for idx in accent_indices:
-            offset = base_offset + (idx * 2)
-            if offset + 1 < 512:
-                bgr555 = rgb_to_bgr555(*accent_rgb)
-                struct.pack_into('<H', data, offset, bgr555)
-
-        # Apply primary colors
-        for idx in primary_indices:
-            offset = base_offset + (idx * 2)
-            if offset + 1 < 512:
-                # Special handling for cape edges and shadows
-                if idx == 7:
-                    bgr555 = rgb_to_bgr555(*cape_edge)
-                elif idx == 9:
-                    bgr555 = rgb_to_bgr555(*cape_shadow)
-                else:
-                    bgr555 = rgb_to_bgr555(*primary_rgb)
-                struct.pack_into('<H', data, offset, bgr555)
-
-    return data
+    return ThemeSpec(theme_name, {
+        "accent": accent_rgb,
+        "primary": primary_rgb,
+        "cape_edge": adjust_brightness(primary_rgb, 0.75),   # 25% darker
+        "cape_shadow": adjust_brightness(primary_rgb, 0.5),  # 50% darker
+    })
 
 def generate_all_themes():
-    """Generate all 50 Cloud themes"""
+    """Generate all 50 Cloud themes and their PNG previews in one parallel batch"""
     print("\n" + "="*60)
     print("STEP 2: Generating 50 Cloud Themes")
     print("="*60)
@@ -245,56 +148,32 @@ def generate_all_themes():
         print(f"Error: Cloud sprite not found at {source_file}")
         return []
 
-    themes = generate_theme_colors()
-    created_themes = []
-
-    for i, (theme_name, primary, accent) in enumerate(themes, 1):
-        print(f"\r[{i:2d}/50] Creating theme: {theme_name:30s}", end="")
-
-        # Create theme directory
-        theme_dir = base_dir / f"ColorMod/FFTIVC/data/enhanced/fftpack/unit/sprites_cloud_{theme_name}"
-        theme_dir.mkdir(exist_ok=True, parents=True)
-
-        # Generate themed sprite
-        sprite_data = create_themed_sprite(source_file, theme_name, primary, accent)
-
-        # Write themed sprite
-        output_file = theme_dir / "battle_cloud_spr.bin"
-        with open(output_file, 'wb') as f:
-            f.write(sprite_data)
-
-        created_themes.append((theme_name, output_file))
-
-    print(f"\n✓ Successfully created {len(created_themes)} themes")
-    return created_themes
-
-def convert_all_to_png(themes):
-    """Convert all themes to PNG previews"""
-    print("\n" + "="*60)
-    print("STEP 3: Converting All Themes to PNG Previews")
-    print("="*60)
-
+    # Apply colors to first 8 palettes
+    batch = ThemeBatch(
+        source_file, base_dir,
+        index_sets=CLOUD_INDEX_SETS,
+        palettes=range(8),
+        bin_name="ColorMod/FFTIVC/data/enhanced/fftpack/unit/sprites_cloud_{name}/battle_cloud_spr.bin",
+        preview_name="ColorMod/Resources/Previews/Cloud_Themes/{index:02d}_{name}.png",
+        color_mode="scale",
+    )
+    results = batch.run([theme_spec(*theme) for theme in generate_theme_colors()])
+
+    print(f"\n✓ Successfully created {len(results)} themes")
+    return [(r.name, r.bin_path) for r in results]
+
+def convert_test_to_png():
+    """Render the color test sprite preview next to the theme previews"""
     base_dir = Path(__file__).parent.parent.parent
     preview_dir = base_dir / "ColorMod/Resources/Previews/Cloud_Themes"
     preview_dir.mkdir(exist_ok=True, parents=True)
 
-    # First convert the test sprite
     test_sprite = base_dir / "ColorMod/FFTIVC/data/enhanced/fftpack/unit/sprites_cloud_test/battle_cloud_spr.bin"
     if test_sprite.exists():
         print("Converting test sprite...")
         test_output = preview_dir / "00_COLOR_TEST.png"
         extract_southwest_sprite(str(test_sprite), str(test_output), palette_index=0, preview_mode=True)
 
-    # Convert all theme sprites
-    for i, (theme_name, sprite_file) in enumerate(themes, 1):
-        print(f"\r[{i:2d}/50] Converting: {theme_name:30s}", end="")
-
-        output_file = preview_dir / f"{i:02d}_{theme_name}.png"
-        try:
-            extract_southwest_sprite(str(sprite_file), str(output_file), palette_index=0, preview_mode=True)
-        except Exception as e:
-            print(f"\nError converting {theme_name}: {e}")
-
     print(f"\n✓ PNG previews saved to: {preview_dir}")
     return preview_dir
 
@@ -432,14 +311,14 @@ def main():
         print("Failed to create test sprite. Exiting.")
         return
 
-    # Step 2: Generate all themes
+    # Step 2: Generate all themes (PNG previews are rendered alongside)
     themes = generate_all_themes()
     if not themes:
         print("Failed to generate themes. Exiting.")
         return
 
-    # Step 3: Convert to PNGs
-    preview_dir = convert_all_to_png(themes)
+    # Step 3: Test sprite PNG
+    preview_dir = convert_test_to_png()
 
     # Step 4: Create HTML gallery
     gallery_file = create_html_gallery(preview_dir, themes)
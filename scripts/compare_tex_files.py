@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 """
 Compare two tex files to find differences
+
+Both files are memory-mapped and compared as whole uint16 word arrays
+(fftsprite.MappedFile), so nothing is copied or unpacked per value.
 """
 
-import struct
 import sys
 
+import numpy as np
+
+import fftsprite
+
 def rgb555_to_rgb888(color_val):
     """Convert 16-bit RGB555 to RGB888 format"""
     r = (color_val & 0x1F) << 3
@@ -16,30 +22,24 @@ def rgb555_to_rgb888(color_val):
 def compare_tex_files(file1, file2):
     """Compare two tex files and highlight differences"""
 
-    with open(file1, 'rb') as f1:
-        data1 = f1.read()
-    with open(file2, 'rb') as f2:
-        data2 = f2.read()
+    with fftsprite.MappedFile(file1, fftsprite.TEX_HEADER_BYTES) as tex1, \
+            fftsprite.MappedFile(file2, fftsprite.TEX_HEADER_BYTES) as tex2:
+        return _compare(tex1, tex2)
 
-    if len(data1) != len(data2):
-        print(f"WARNING: Files have different sizes! {len(data1)} vs {len(data2)}")
-        min_len = min(len(data1), len(data2))
+def _compare(tex1, tex2):
+    if tex1.size != tex2.size:
+        print(f"WARNING: Files have different sizes! {tex1.size} vs {tex2.size}")
+        min_len = min(tex1.size, tex2.size)
     else:
-        min_len = len(data1)
+        min_len = tex1.size
         print(f"Both files are {min_len} bytes")
 
-    # Find all differences
-    differences = []
-    for i in range(0, min_len - 1, 2):  # Process as 16-bit values
-        val1 = struct.unpack('<H', data1[i:i+2])[0]
-        val2 = struct.unpack('<H', data2[i:i+2])[0]
-
-        if val1 != val2:
-            differences.append({
-                'offset': i,
-                'val1': val1,
-                'val2': val2
-            })
+    # Find all differences, as 16-bit values
+    words1 = tex1.words[:min_len // 2]
+    words2 = tex2.words[:min_len // 2]
+    changed = np.flatnonzero(words1 != words2)
+    differences = [{'offset': int(i) * 2, 'val1': int(words1[i]), 'val2': int(words2[i])}
+                   for i in changed]
 
     print(f"\nFound {len(differences)} different 16-bit values")
 
@@ -82,8 +82,8 @@ def compare_tex_files(file1, file2):
 
     for offset, description in known_offsets.items():
         if offset < min_len - 1:
-            val1 = struct.unpack('<H', data1[offset:offset+2])[0]
-            val2 = struct.unpack('<H', data2[offset:offset+2])[0]
+            val1 = int(words1[offset // 2])
+            val2 = int(words2[offset // 2])
             rgb1 = rgb555_to_rgb888(val1)
             rgb2 = rgb555_to_rgb888(val2)
 
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Compile declarative theme specs (scripts/theme_specs/*.json) into sprites_* theme directories.
+
+A spec file holds a "defaults" block and a "themes" map; each theme is written
+to <out>/sprites_<theme>/ (out defaults to the fftpack/unit directory):
+
+    {
+      "defaults": {"source": "original", "palettes": "player,enemy"},
+      "themes": {
+        "knight_crimson_guard": {
+          "job": ["Knight_Male", "Knight_Female"],
+          "colors": {"Cape": "#8B0000", "Emblem": "#FFD700"}
+        },
+        "knight_crimson_night": {
+          "source": "knight_crimson_guard",
+          "colors": {"Underarmor": "#1C1C1C"}
+        }
+      }
+    }
+
+Theme keys (defaults and themes; "colors" and "index_sets" merge one level deep):
+
+  source      theme directory the palettes are read from (sprites_<source>); if
+              that is another spec'd theme it is built first
+  job         SectionMappings job(s); every sprite of the job gets that job's
+              sections as index sets (compiled section table, fftsprite.load_sections);
+              colors for sections a sprite's job lacks are skipped for that sprite.
+              A theme built on a spec'd theme inherits its jobs
+  sprites     explicit sprite files (default: the jobs' sprites, else every bin of source)
+  index_sets  extra flat index sets, as in the generators (palette * 16 + index)
+  colors      section -> "#RRGGBB", a per-index list (flat shading only), or a
+              color derived from another section: {"from": "primary", "scale": 0.75,
+              "offset": -15}
+  palettes    list of palettes or a create_sprite_theme --palettes string ("0-7",
+              "player,enemy"); default [0]
+  shading     "preserve" (IndexBasedThemeGenerator shading, the default) or "flat"
+              (direct writes, as ThemeBatch does)
+  color_mode  "shift" or "scale" channel reduction for flat writes
+
+Only the 512-byte palette header of each output is rendered; the pixel body
+is cloned from the source. Every theme's inputs (resolved spec, section
+sets, source file sizes/mtimes, the fingerprint of a spec'd source theme) are
+hashed into .palette_cache/theme_build.json, and themes whose hash and
+outputs are unchanged are skipped. Dirty themes build in dependency order,
+each level of the graph fanned out over a process pool.
+
+Usage:
+  python compile_themes.py [specs...] [--themes a,b] [--out DIR] [--workers N]
+                           [--force] [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import fftsprite
+from fftsprite.codec import parse_color
+from fftsprite.store import content_hash
+from create_sprite_theme import parse_palettes
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+SPEC_DIR = Path(__file__).resolve().parent / "theme_specs"
+UNIT_DIR = REPO_DIR / "ColorMod" / "FFTIVC" / "data" / "enhanced" / "fftpack" / "unit"
+STATE_PATH = REPO_DIR / ".palette_cache" / "theme_build.json"
+
+BUILD_FORMAT = 1
+MERGED_KEYS = ("colors", "index_sets")
+
+
+def load_specs(paths):
+    """{theme: merged entry} over every spec file, in file order."""
+    themes = {}
+    for path in paths:
+        spec = json.loads(Path(path).read_text(encoding="utf-8"))
+        defaults = spec.get("defaults", {})
+        for name, entry in spec["themes"].items():
+            if name in themes:
+                raise ValueError(f"{path}: theme '{name}' is also defined in {themes[name]['_file']}")
+            merged = dict(defaults, **entry)
+            for key in MERGED_KEYS:
+                merged[key] = dict(defaults.get(key, {}), **entry.get(key, {}))
+            merged["_file"] = str(path)
+            themes[name] = merged
+    return themes
+
+
+def resolve_colors(name, colors):
+    """Section -> (r, g, b) or list of (r, g, b), with derived colors filled in."""
+    resolved = {}
+
+    def get(section, chain=()):
+        if section in resolved:
+            return resolved[section]
+        if section not in colors:
+            raise ValueError(f"{name}: color '{section}' is not defined")
+        if section in chain:
+            raise ValueError(f"{name}: colors derive from each other: {' -> '.join(chain + (section,))}")
+        value = colors[section]
+        if isinstance(value, dict):
+            base = get(value["from"], chain + (section,))
+            if isinstance(base, list):
+                raise ValueError(f"{name}: '{section}' derives from per-index colors of '{value['from']}'")
+            base = np.array(base, dtype=np.float64)
+            rgb = base * value.get("scale", 1.0)
+            rgb = np.minimum(255, rgb.astype(np.int64)) + value.get("offset", 0)
+            value = tuple(int(c) for c in np.clip(rgb, 0, 255))
+        elif isinstance(value, list) and value and not isinstance(value[0], int):
+            value = [parse_color(c) for c in value]
+        else:
+            value = parse_color(value)
+        resolved[section] = value
+        return value
+
+    for section in colors:
+        get(section)
+    return resolved
+
+
+class ThemeCompiler:
+    """Resolve theme specs against the section table and build the dirty ones."""
+
+    def __init__(self, themes, out_dir=UNIT_DIR, source_dir=UNIT_DIR, state_path=STATE_PATH):
+        self.themes = themes
+        self.out_dir = Path(out_dir)
+        self.source_dir = Path(source_dir)
+        self.state_path = Path(state_path)
+        self.sections = fftsprite.load_sections()
+        self._tasks = {}
+
+    def source_path(self, theme):
+        source = self.themes[theme].get("source", "original")
+        root = self.out_dir if source in self.themes else self.source_dir
+        return root / f"sprites_{source}"
+
+    def order(self, wanted=None):
+        """Dependency levels: every theme's spec'd source sits in an earlier level."""
+        needed = set(wanted or self.themes)
+        pending = list(needed)
+        while pending:
+            source = self.themes[pending.pop()].get("source", "original")
+            if source in self.themes and source not in needed:
+                needed.add(source)
+                pending.append(source)
+
+        levels, placed = [], set()
+        while len(placed) < len(needed):
+            level = [t for t in self.themes if t in needed and t not in placed
+                     and self.themes[t].get("source", "original") not in needed - placed]
+            if not level:
+                raise ValueError("theme sources form a cycle: " + ", ".join(sorted(needed - placed)))
+            levels.append(level)
+            placed.update(level)
+        return levels
+
+    def resolve(self, theme):
+        """The build task of one theme: per-sprite index sets, colors and write settings."""
+        if theme not in self._tasks:
+            self._tasks[theme] = self._resolve(theme)
+        return self._tasks[theme]
+
+    def _resolve(self, theme):
+        entry = self.themes[theme]
+        jobs = entry.get("job", [])
+        jobs = [jobs] if isinstance(jobs, str) else jobs
+        source = entry.get("source", "original")
+        if not jobs and source in self.themes:
+            jobs = self.resolve(source)["jobs"]
+        for job in jobs:
+            if job not in self.sections:
+                raise ValueError(f"{theme}: no section mapping for job '{job}'")
+
+        if "sprites" in entry:
+            sprites = list(entry["sprites"])
+        elif jobs:
+            sprites = [s for job in jobs for s in self.sections.sprites(job)]
+        elif source in self.themes:
+            sprites = [sprite for sprite, _ in self.resolve(source)["files"]]
+        else:
+            sprites = sorted(p.name for p in self.source_path(theme).glob("*.bin"))
+
+        shading = entry.get("shading", "preserve")
+        if shading not in ("preserve", "flat"):
+            raise ValueError(f"{theme}: shading must be 'preserve' or 'flat', not {shading!r}")
+        colors = resolve_colors(theme, entry["colors"])
+        if shading == "preserve" and any(isinstance(c, list) for c in colors.values()):
+            raise ValueError(f"{theme}: per-index color lists need \"shading\": \"flat\"")
+        palettes = entry.get("palettes", [0])
+        palettes = parse_palettes(palettes) if isinstance(palettes, str) else sorted(palettes)
+
+        files = []
+        for sprite in sprites:
+            index_sets = {}
+            job = next((j for j in jobs if sprite in self.sections.sprites(j)), None)
+            if job is not None:
+                index_sets.update(self.sections.index_sets(job))
+            index_sets.update(entry["index_sets"])
+            files.append((sprite, {k: v for k, v in index_sets.items() if k in colors}))
+        unused = [c for c in colors if not any(c in sets for _, sets in files)
+                  and not any(v.get("from") == c for v in entry["colors"].values() if isinstance(v, dict))]
+        if unused:
+            raise ValueError(f"{theme}: no sprite has a section {', '.join(unused)}")
+
+        return {
+            "theme": theme,
+            "jobs": jobs,
+            "source": str(self.source_path(theme)),
+            "target": str(self.out_dir / f"sprites_{theme}"),
+            "files": files,
+            "colors": colors,
+            "palettes": palettes,
+            "shading": shading,
+            "color_mode": entry.get("color_mode", "shift"),
+        }
+
+    def fingerprint(self, task, source_fp):
+        """Hash of everything the theme's output depends on."""
+        inputs = {k: v for k, v in task.items() if k not in ("source", "target")}
+        if source_fp is None:
+            stats = []
+            for sprite, _ in task["files"]:
+                path = Path(task["source"]) / sprite
+                st = path.stat() if path.exists() else None
+                stats.append([sprite, st.st_size, st.st_mtime_ns] if st else [sprite, None, None])
+            inputs["source"] = stats
+        else:
+            inputs["source"] = source_fp
+        inputs["format"] = BUILD_FORMAT
+        return content_hash(json.dumps(inputs, sort_keys=True).encode())
+
+    def load_state(self):
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return state.get(str(self.out_dir), {})
+
+    def save_state(self, built):
+        try:
+            state = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault(str(self.out_dir), {}).update(built)
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(state, indent=1, sort_keys=True))
+        os.replace(tmp, self.state_path)
+
+    def plan(self, wanted=None, force=False):
+        """[(level tasks to build)], skipped theme names and every fingerprint."""
+        previous = self.load_state()
+        fingerprints, levels, skipped = {}, [], []
+        for level in self.order(wanted):
+            dirty = []
+            for theme in level:
+                task = self.resolve(theme)
+                source = self.themes[theme].get("source", "original")
+                fp = self.fingerprint(task, fingerprints.get(source))
+                fingerprints[theme] = fp
+                outputs = [Path(task["target"]) / sprite for sprite, _ in task["files"]]
+                if not force and previous.get(theme) == fp and all(p.exists() for p in outputs):
+                    skipped.append(theme)
+                else:
+                    dirty.append(task)
+            if dirty:
+                levels.append(dirty)
+        return levels, skipped, fingerprints
+
+    def build(self, wanted=None, workers=None, force=False, dry=False, verbose=True):
+        levels, skipped, fingerprints = self.plan(wanted, force)
+        count = sum(len(level) for level in levels)
+        if verbose:
+            print(f"  {count} themes to build, {len(skipped)} unchanged"
+                  + (" (dry run)" if dry else ""))
+        if dry:
+            for level in levels:
+                for task in level:
+                    print(f"    {task['theme']}: {len(task['files'])} sprites from {task['source']}")
+            return [], skipped
+
+        results = []
+        for level in levels:
+            n = min(workers or os.cpu_count() or 1, len(level))
+            if n <= 1:
+                done = [_build_task(task) for task in level]
+            else:
+                with ProcessPoolExecutor(max_workers=n) as pool:
+                    done = list(pool.map(_build_task, level, chunksize=max(1, len(level) // (n * 4))))
+            results.extend(done)
+            # only record themes that built cleanly, so failures rebuild next run
+            self.save_state({r["theme"]: fingerprints[r["theme"]] for r in done if not r["missing"]})
+        if verbose:
+            for r in results:
+                missing = f", {len(r['missing'])} sources missing" if r["missing"] else ""
+                print(f"    {r['theme']}: {r['written']} sprites{missing}")
+        return results, skipped
+
+
+def render_blocks(words, index_sets, colors, palettes, shading, color_mode):
+    """(files, 256) BGR555 words with every index set's color applied to each palette."""
+    if shading == "preserve":
+        for section, indices in index_sets.items():
+            words = fftsprite.shade_slots(words, fftsprite.palette_slots(indices, palettes), colors[section])
+        return words
+
+    # Flat writes in ThemeBatch.apply_sections order: later palettes win on overlapping offsets.
+    slots, values = [], []
+    for palette in palettes:
+        for section, indices in index_sets.items():
+            rgb = colors[section]
+            rgb = np.array([rgb] * len(indices) if isinstance(rgb, tuple) else rgb, dtype=np.int32)
+            if len(rgb) != len(indices):
+                raise ValueError(f"section '{section}' has {len(rgb)} colors for {len(indices)} indices")
+            slots.append(palette * fftsprite.COLORS_PER_PALETTE + np.asarray(indices, dtype=np.int64))
+            values.append(fftsprite.rgb_to_bgr555(rgb.reshape(-1, 3), color_mode))
+    words = words.copy()
+    if slots:
+        slots, values = np.concatenate(slots), np.concatenate(values)
+        inside = slots < words.shape[-1]
+        slots, values = slots[inside], values[inside]
+        _, last = np.unique(slots[::-1], return_index=True)
+        keep = len(slots) - 1 - last
+        words[..., slots[keep]] = values[keep]
+    return words
+
+
+def _build_task(task):
+    """Render every sprite of one theme; sprites sharing index sets are shaded as one batch."""
+    source, target = Path(task["source"]), Path(task["target"])
+    target.mkdir(parents=True, exist_ok=True)
+    groups, missing = {}, []
+    for sprite, index_sets in task["files"]:
+        if (source / sprite).exists():
+            groups.setdefault(json.dumps(index_sets), (index_sets, []))[1].append(sprite)
+        else:
+            missing.append(sprite)
+
+    written = 0
+    for index_sets, sprites in groups.values():
+        raw = b"".join(fftsprite.read_palette_block(source / sprite) for sprite in sprites)
+        words = np.frombuffer(raw, dtype='<u2').reshape(len(sprites), -1)
+        blocks = render_blocks(words, index_sets, task["colors"], task["palettes"],
+                               task["shading"], task["color_mode"]).astype('<u2')
+        for sprite, block in zip(sprites, blocks):
+            fftsprite.clone_file(source / sprite, target / sprite)
+            fftsprite.patch_palette(target / sprite, block.tobytes())
+            written += 1
+    return {"theme": task["theme"], "written": written, "missing": missing}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile theme specs into sprites_* theme directories")
+    parser.add_argument("specs", nargs="*", help="Spec files (default: theme_specs/*.json)")
+    parser.add_argument("--themes", help="Only these themes (comma-separated) and the themes they build on")
+    parser.add_argument("--out", default=str(UNIT_DIR), help="Directory the sprites_* folders are written to")
+    parser.add_argument("--source-dir", default=str(UNIT_DIR), help="Directory holding the source sprites_* folders")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: all cores, 1 = serial)")
+    parser.add_argument("--force", action="store_true", help="Rebuild every theme, changed or not")
+    parser.add_argument("--dry-run", action="store_true", help="List the themes that would be built")
+    args = parser.parse_args()
+
+    paths = args.specs or sorted(SPEC_DIR.glob("*.json"))
+    try:
+        themes = load_specs(paths)
+        wanted = [t.strip() for t in args.themes.split(',')] if args.themes else None
+        unknown = [t for t in wanted or [] if t not in themes]
+        if unknown:
+            print(f"Error: unknown themes: {', '.join(unknown)}")
+            return 1
+        compiler = ThemeCompiler(themes, args.out, args.source_dir)
+        results, _ = compiler.build(wanted, args.workers or None, args.force, args.dry_run)
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 1 if any(r["missing"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
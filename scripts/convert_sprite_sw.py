@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Extract the southwest-facing sprite from a BIN file for config previews or detailed viewing.
+Built on render_sprite_preview.py's extract_sprite, so the colors match BinSpriteExtractor.cs.
+
+Importable: generators call extract_southwest_sprite() / render_southwest() directly instead
+of spawning this script, and render_southwest_batch() renders many palettes against one
+decoded pixel sheet.
+
+Usage:
+    python convert_sprite_sw.py input.bin output.png --preview     # 64x64 config preview
+    python convert_sprite_sw.py input.bin output.png               # 256x256 (8x) detail view
+    python convert_sprite_sw.py input.bin output.png 2             # use palette 2
+    python convert_sprite_sw.py --batch crimson_red                # all job previews for a theme
+    python convert_sprite_sw.py --batch royal_purple knight_male,knight_female
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import fftsprite
+from render_sprite_preview import SPRITE_WIDTH, SPRITE_HEIGHT, extract_sprite_from_sheet, read_palette
+
+SOUTHWEST_INDEX = 1     # 2nd sprite on the sheet (x_offset=32)
+PREVIEW_Y_OFFSET = 1    # shifted up so the head isn't clipped
+FRAME_SIZE = 32         # 32x32 capture
+PREVIEW_SIZE = 64       # config menu preview (2x)
+DETAIL_SIZE = 256       # detailed viewing (8x)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+UNIT_DIR = REPO_ROOT / "ColorMod" / "FFTIVC" / "data" / "enhanced" / "fftpack" / "unit"
+JOB_CLASSES = REPO_ROOT / "ColorMod" / "Data" / "JobClasses.json"
+PREVIEW_DIR = REPO_ROOT / "ColorMod" / "Resources" / "Previews"
+
+
+def decode_sheet(data):
+    """Decode the rows holding the standing frames once, for reuse across palettes."""
+    return fftsprite.decode_pixels(data, rows=SPRITE_HEIGHT)
+
+
+def southwest_frame(indices, palette):
+    """The 32x32 southwest frame of a decoded sheet as an RGBA image."""
+    sprite = extract_sprite_from_sheet(indices, SOUTHWEST_INDEX, palette)
+    return sprite.crop((0, PREVIEW_Y_OFFSET, FRAME_SIZE, PREVIEW_Y_OFFSET + FRAME_SIZE))
+
+
+def render_southwest(indices, palette, preview_mode=True):
+    """Render the southwest frame at preview (64x64) or detail (256x256) size."""
+    size = PREVIEW_SIZE if preview_mode else DETAIL_SIZE
+    return southwest_frame(indices, palette).resize((size, size), Image.NEAREST)
+
+
+def render_southwest_batch(indices, palettes, preview_mode=True):
+    """Render one southwest image per palette from a single decoded sheet.
+
+    `palettes` is a sequence of (16, 4) RGBA palettes; all of them are mapped
+    over the frame in one NumPy lookup.
+    """
+    size = PREVIEW_SIZE if preview_mode else DETAIL_SIZE
+    frame = indices[PREVIEW_Y_OFFSET:PREVIEW_Y_OFFSET + FRAME_SIZE,
+                    SOUTHWEST_INDEX * SPRITE_WIDTH:SOUTHWEST_INDEX * SPRITE_WIDTH + FRAME_SIZE]
+    stacked = np.asarray(palettes, dtype=np.uint8)[:, frame]   # (N, 32, 32, 4)
+    return [Image.fromarray(rgba, 'RGBA').resize((size, size), Image.NEAREST) for rgba in stacked]
+
+
+def extract_southwest_sprite(input_path, output_path, palette_index=0, preview_mode=False):
+    """Read a BIN file and save its southwest sprite as a PNG."""
+    with open(input_path, 'rb') as f:
+        data = f.read()
+    image = render_southwest(decode_sheet(data), read_palette(data, palette_index), preview_mode)
+    image.save(output_path)
+    return image
+
+
+def batch_theme_previews(theme, jobs=None):
+    """Generate {job}_{theme}.png previews for every job sprite present in sprites_{theme}/."""
+    theme_dir = UNIT_DIR / f"sprites_{theme}"
+    if not theme_dir.is_dir():
+        print(f"Error: Theme directory not found: {theme_dir}")
+        return 0
+
+    job_classes = json.loads(JOB_CLASSES.read_text())["jobClasses"]
+    PREVIEW_DIR.mkdir(parents=True, exist_ok=True)
+
+    count = 0
+    for job in job_classes:
+        job_key = job["name"].lower()
+        if jobs and job_key not in jobs:
+            continue
+        sprite_path = theme_dir / job["spriteName"]
+        if not sprite_path.exists():
+            continue
+        output_path = PREVIEW_DIR / f"{job_key}_{theme}.png"
+        extract_southwest_sprite(sprite_path, output_path, preview_mode=True)
+        print(f"  {job_key}: {output_path.name}")
+        count += 1
+
+    print(f"Generated {count} previews for theme '{theme}' in {PREVIEW_DIR}")
+    return count
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    preview_mode = '--preview' in sys.argv
+
+    if '--batch' in sys.argv:
+        if not args:
+            print("Error: --batch requires a theme name")
+            return 1
+        jobs = set(args[1].split(',')) if len(args) > 1 else None
+        return 0 if batch_theme_previews(args[0], jobs) else 1
+
+    if len(args) < 2:
+        print(__doc__)
+        return 1
+
+    input_path, output_path = args[0], args[1]
+    palette_index = int(args[2]) if len(args) > 2 else 0
+
+    if not Path(input_path).exists():
+        print(f"Error: Input file not found: {input_path}")
+        return 1
+
+    image = extract_southwest_sprite(input_path, output_path, palette_index, preview_mode)
+    print(f"Saved: {output_path} ({image.size[0]}x{image.size[1]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
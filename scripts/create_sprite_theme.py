@@ -2,6 +2,23 @@
 """
 Create sprite themes by modifying specific palette indices.
 This is more precise than color-based detection.
+
+Shading runs through fftsprite.shade_indices: the whole palette block is
+converted to HSV arrays at once and every targeted index is remapped in one
+array expression. candidate_blocks() does the same for N target colors in a
+single call, for exploring thousands of candidate themes per second.
+
+By default only palette 0 is themed. apply_theme() / --palettes put the same
+section colors on any set of palettes -- e.g. the player palettes 0-4 and the
+enemy team palettes 5-7 -- in one shade_slots call per section, each palette
+keeping its own shading, so enemy units wear the theme without a separate
+fix_enemy_palettes pass. Themed palettes need per-palette 0-15 index sets
+(--job/--section, --custom-indices); the flat
+ITEM_INDICES armor sets run past index 15 and only work on palette 0.
+
+--job/--section color the theme editor's sections instead of the flat
+ITEM_INDICES sets: index sets come from the compiled SectionMappings table
+(fftsprite.load_sections), so no JSON is parsed per run.
 """
 
 import argparse
@@ -10,7 +27,11 @@ import shutil
 import struct
 import colorsys
 from pathlib import Path
-from typing import List, Tuple, Dict, Set
+from typing import List, Tuple, Dict, Set, Sequence, Optional
+
+import numpy as np
+
+import fftsprite
 
 class IndexBasedThemeGenerator:
     """Generate themes by targeting specific palette indices."""
@@ -46,6 +67,10 @@ class IndexBasedThemeGenerator:
                          51, 52, 53, 54, 55, 56, 57, 58, 59, 60, 61, 62],
     }
 
+    # Palette groups for --palettes: player palettes and the enemy team colors
+    PLAYER_PALETTES = (0, 1, 2, 3, 4)
+    ENEMY_PALETTES = (5, 6, 7)
+
     def __init__(self, base_dir: Path = Path(".")):
         """Initialize the generator."""
         self.base_dir = base_dir
@@ -96,57 +121,82 @@ class IndexBasedThemeGenerator:
     def transform_indices(self, sprite_data: bytearray, indices: Set[int],
                          target_color: Tuple[int, int, int],
                          preserve_shading: bool = True) -> bytearray:
-        """Transform specific palette indices to a target color."""
-        result = sprite_data.copy()
-
-        if not preserve_shading:
-            # Direct replacement
-            for idx in indices:
-                self.set_color_at_index(result, idx, target_color)
-        else:
-            # Preserve relative brightness
-            target_h, target_s, target_v = colorsys.rgb_to_hsv(
-                target_color[0]/255, target_color[1]/255, target_color[2]/255
-            )
-
-            # Get brightness range of original colors
-            brightnesses = []
-            for idx in indices:
-                r, g, b = self.get_color_at_index(sprite_data, idx)
-                _, _, v = colorsys.rgb_to_hsv(r/255, g/255, b/255)
-                brightnesses.append((idx, v))
-
-            if brightnesses:
-                min_v = min(v for _, v in brightnesses)
-                max_v = max(v for _, v in brightnesses)
-                v_range = max_v - min_v if max_v > min_v else 0.1
-
-                for idx, orig_v in brightnesses:
-                    # Scale the target brightness based on original
-                    if v_range > 0:
-                        # Map original brightness range to target
-                        relative_pos = (orig_v - min_v) / v_range
-                        # Create darker/lighter versions of target color
-                        new_v = target_v * (0.3 + 0.7 * relative_pos)
-                    else:
-                        new_v = target_v
-
-                    # Generate new color with preserved relative brightness
-                    r_new, g_new, b_new = colorsys.hsv_to_rgb(target_h, target_s, new_v)
-                    new_color = (
-                        int(r_new * 255),
-                        int(g_new * 255),
-                        int(b_new * 255)
-                    )
-                    self.set_color_at_index(result, idx, new_color)
+        """Transform specific palette indices to a target color.
 
+        With preserve_shading the relative brightness of the original colors is
+        kept: their value range is mapped onto darker/lighter versions of the
+        target (0.3 to 1.0 of its value). Otherwise a direct replacement.
+        """
+        result = sprite_data.copy()
+        words = np.frombuffer(sprite_data, dtype='<u2', count=self.COLOR_COUNT)
+        shaded = fftsprite.shade_indices(words, indices, target_color, preserve_shading)
+        result[:self.PALETTE_SIZE] = shaded.astype('<u2').tobytes()
         return result
 
+    def apply_theme(self, palette_block: bytes, index_sets: Dict[str, Set[int]],
+                    color_map: Dict[str, Tuple[int, int, int]],
+                    palettes: Sequence[int] = (0,),
+                    preserve_shading: bool = True) -> bytearray:
+        """Apply a section -> color map to every palette in `palettes` at once.
+
+        Index sets are offsets from each palette's start (palette * 16 + index).
+        palettes=(0,) takes flat sets as they are and gives exactly what
+        transform_indices does; any other selection needs 0-15 sets and
+        palettes 0-7 (fftsprite.palette_slots raises ValueError otherwise), so
+        nothing outside the selected palettes is written. Every palette is
+        shaded from its own original colors; sets are applied in order.
+        Returns the new 512-byte block.
+        """
+        words = np.frombuffer(palette_block, dtype='<u2', count=self.COLOR_COUNT)
+        for set_name, indices in index_sets.items():
+            if set_name in color_map:
+                words = fftsprite.shade_slots(words, fftsprite.palette_slots(indices, palettes),
+                                              color_map[set_name], preserve_shading)
+        return bytearray(words.astype('<u2').tobytes())
+
+    def candidate_blocks(self, palette_block: bytes, index_sets: Dict[str, Set[int]],
+                         color_arrays: Dict[str, np.ndarray],
+                         preserve_shading: bool = True,
+                         palettes: Sequence[int] = (0,)) -> np.ndarray:
+        """Shade one palette block toward N candidate color combinations at once.
+
+        color_arrays maps each index-set name to an (N, 3) RGB array (row i =
+        candidate i). Sets are applied in order, like create_theme_with_indices,
+        to every palette in `palettes` as in apply_theme.
+        Returns an (N, 512) uint8 array of palette blocks.
+        """
+        words = np.frombuffer(palette_block, dtype='<u2', count=self.COLOR_COUNT).astype(np.uint16)
+        counts = {len(colors) for colors in color_arrays.values()}
+        if len(counts) > 1:
+            raise ValueError(f"color arrays differ in length: {sorted(counts)}")
+        count = counts.pop() if counts else 1
+        blocks = np.broadcast_to(words, (count, self.COLOR_COUNT)).copy()
+        for set_name, indices in index_sets.items():
+            if set_name not in color_arrays:
+                continue
+            # candidate i's block is shaded toward candidate i's color
+            blocks = fftsprite.shade_slots(blocks, fftsprite.palette_slots(indices, palettes),
+                                           color_arrays[set_name], preserve_shading)
+        return blocks.astype('<u2').view(np.uint8).reshape(count, self.PALETTE_SIZE)
+
     def create_theme_with_indices(self, source_theme: str, target_theme: str,
                                  index_sets: Dict[str, Set[int]],
                                  color_map: Dict[str, Tuple[int, int, int]],
-                                 preserve_shading: bool = True) -> None:
-        """Create a theme by modifying specific indices."""
+                                 preserve_shading: bool = True,
+                                 palette_only: bool = True,
+                                 palettes: Sequence[int] = (0,),
+                                 sprite_names: Optional[Sequence[str]] = None) -> None:
+        """Create a theme by modifying specific indices.
+
+        With palette_only (the default) only the 512-byte palette header is read
+        and transformed; the sprite body is cloned unchanged (reflink or
+        copy_file_range where available) and the header is patched in place.
+        Pass palette_only=False to read and rewrite every whole file.
+
+        `palettes` selects which palettes get the theme (see apply_theme); all
+        of them are written with the single header patch. sprite_names limits
+        the run to those bins (e.g. the sprites of one SectionMappings job).
+        """
         source_dir = self.sprite_dir / f"sprites_{source_theme}"
         target_dir = self.sprite_dir / f"sprites_{target_theme}"
 
@@ -156,24 +206,33 @@ class IndexBasedThemeGenerator:
         target_dir.mkdir(parents=True, exist_ok=True)
 
         sprite_files = list(source_dir.glob("*.bin"))
+        if sprite_names is not None:
+            sprite_files = [f for f in sprite_files if f.name in sprite_names]
         print(f"Processing {len(sprite_files)} sprite files...")
 
         for sprite_file in sprite_files:
             print(f"  Processing {sprite_file.name}...")
 
-            # Read sprite data
-            sprite_data = self.read_sprite(sprite_file)
+            # Read sprite data (palette header only in palette-patch mode)
+            if palette_only:
+                sprite_data = bytearray(fftsprite.read_palette_block(sprite_file))
+            else:
+                sprite_data = self.read_sprite(sprite_file)
 
-            # Apply transformations for each index set
-            for set_name, indices in index_sets.items():
-                if set_name in color_map:
-                    sprite_data = self.transform_indices(
-                        sprite_data, indices, color_map[set_name], preserve_shading
-                    )
+            # Apply every index set to every selected palette
+            sprite_data[:self.PALETTE_SIZE] = self.apply_theme(
+                sprite_data[:self.PALETTE_SIZE], index_sets, color_map, palettes, preserve_shading
+            )
 
             # Write to target
             target_sprite = target_dir / sprite_file.name
-            self.write_sprite(target_sprite, sprite_data)
+            if palette_only:
+                # Source and target theme may be the same directory: then only patch in place
+                if not (target_sprite.exists() and target_sprite.samefile(sprite_file)):
+                    fftsprite.clone_file(sprite_file, target_sprite)
+                fftsprite.patch_palette(target_sprite, sprite_data)
+            else:
+                self.write_sprite(target_sprite, sprite_data)
 
         print(f"Theme '{target_theme}' created successfully in {target_dir}")
 
@@ -190,6 +249,24 @@ class IndexBasedThemeGenerator:
             print(f"  Index {idx:3d}: RGB({r:3d}, {g:3d}, {b:3d}) = #{r:02X}{g:02X}{b:02X}")
             print(f"             HSV(H:{h*360:3.0f}°, S:{s:.2f}, V:{v:.2f})")
 
+def parse_palettes(text: str) -> List[int]:
+    """'0', '0-7', 'player', 'enemy', or a comma-separated mix -> sorted palette numbers."""
+    palettes = set()
+    for part in text.split(','):
+        part = part.strip().lower()
+        if part == "player":
+            palettes.update(IndexBasedThemeGenerator.PLAYER_PALETTES)
+        elif part == "enemy":
+            palettes.update(IndexBasedThemeGenerator.ENEMY_PALETTES)
+        elif '-' in part:
+            start, end = part.split('-')
+            palettes.update(range(int(start), int(end) + 1))
+        elif part:
+            palettes.add(int(part))
+    if not palettes or not all(0 <= p < fftsprite.THEMED_PALETTES for p in palettes):
+        raise ValueError(f"{text!r} must name palettes 0-{fftsprite.THEMED_PALETTES - 1}")
+    return sorted(palettes)
+
 def main():
     parser = argparse.ArgumentParser(description="Generate sprite themes using palette indices")
     parser.add_argument("--source", help="Source theme name")
@@ -203,6 +280,10 @@ def main():
     parser.add_argument("--belt-color", help="Color for belt (hex format: #000000)")
     parser.add_argument("--custom-indices", help="Custom indices to transform (comma-separated)")
     parser.add_argument("--custom-color", help="Color for custom indices (hex format)")
+    parser.add_argument("--job", help="SectionMappings job or sprite file for --section "
+                                      "(e.g. Knight_Male, Cloud, battle_cloud_spr.bin)")
+    parser.add_argument("--section", action="append", default=[], metavar="NAME=#RRGGBB",
+                        help="Color one section of --job (repeatable)")
 
     # Analysis mode
     parser.add_argument("--analyze", help="Analyze a sprite file")
@@ -210,6 +291,11 @@ def main():
 
     # Options
     parser.add_argument("--no-preserve-shading", action="store_true", help="Don't preserve shading")
+    parser.add_argument("--palettes", default="0",
+                        help="Palettes to theme: comma-separated numbers/ranges and/or "
+                             "'player' (0-4), 'enemy' (5-7); e.g. player,enemy (default: 0)")
+    parser.add_argument("--full-rewrite", action="store_true",
+                        help="Rewrite whole sprite files instead of patching only the palette header")
 
     args = parser.parse_args()
     generator = IndexBasedThemeGenerator()
@@ -224,6 +310,7 @@ def main():
     # Theme creation mode
     index_sets = {}
     color_map = {}
+    sprite_names = None
 
     def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
         hex_color = hex_color.lstrip('#')
@@ -258,6 +345,25 @@ def main():
         index_sets["custom"] = indices
         color_map["custom"] = hex_to_rgb(args.custom_color)
 
+    if args.section:
+        if not args.job:
+            print("Error: --section needs --job")
+            return 1
+        table = fftsprite.load_sections()
+        if args.job not in table:
+            print(f"Error: no section mapping for '{args.job}'")
+            return 1
+        job_sets = table.index_sets(args.job)
+        sprite_names = table.sprites(args.job)
+        for item in args.section:
+            name, _, color = item.partition('=')
+            if name not in job_sets or not color:
+                print(f"Error: --section {item}: expected NAME=#RRGGBB with NAME one of "
+                      f"{', '.join(job_sets)}")
+                return 1
+            index_sets[name] = set(job_sets[name])
+            color_map[name] = hex_to_rgb(color)
+
     if not index_sets:
         print("Error: No transformations specified")
         return 1
@@ -266,9 +372,24 @@ def main():
         print("Error: --source and --name are required for theme creation")
         return 1
 
+    try:
+        palettes = parse_palettes(args.palettes)
+    except ValueError as e:
+        print(f"Error: --palettes: {e}")
+        return 1
+    for name, indices in index_sets.items():
+        try:
+            fftsprite.palette_slots(indices, palettes)
+        except ValueError as e:
+            print(f"Error: --palettes {args.palettes}: '{name}' {e}")
+            return 1
+
     generator.create_theme_with_indices(
         args.source, args.name, index_sets, color_map,
-        preserve_shading=not args.no_preserve_shading
+        preserve_shading=not args.no_preserve_shading,
+        palette_only=not args.full_rewrite,
+        palettes=palettes,
+        sprite_names=sprite_names
     )
 
     return 0
@@ -4,85 +4,12 @@ Create a theme showcase with one representative sprite from EACH theme
 Shows all 210+ themes with their best available sprite
 """
 
-import struct
 import sys
 import os
-from PIL import Image, ImageDraw, ImageFont
-import numpy as np
 from pathlib import Path
 import math
 
-def bgr555_to_rgb888(bgr555):
-    """Convert BGR555 color format to RGB888"""
-    b = (bgr555 >> 10) & 0x1F
-    g = (bgr555 >> 5) & 0x1F
-    r = bgr555 & 0x1F
-
-    r = (r * 255) // 31
-    g = (g * 255) // 31
-    b = (b * 255) // 31
-
-    return (r, g, b, 255)
-
-def read_palette(data, palette_index=0):
-    """Read a single 16-color palette from sprite data"""
-    palette = []
-    base_offset = palette_index * 32
-
-    for i in range(16):
-        offset = base_offset + (i * 2)
-        if offset + 1 < len(data):
-            color_value = struct.unpack('<H', data[offset:offset+2])[0]
-            rgba = bgr555_to_rgb888(color_value)
-            palette.append(rgba)
-        else:
-            palette.append((0, 0, 0, 255))
-
-    return palette
-
-def extract_single_sprite(data, sprite_index=1, palette_index=0):
-    """Extract a single sprite (facing southwest) from the sheet"""
-    # Skip palette data
-    sprite_data = data[512:]
-
-    # Read palette
-    palette = read_palette(data, palette_index)
-    palette[0] = (0, 0, 0, 0)  # Transparent background
-
-    # Sprite dimensions
-    sprite_width = 32
-    sprite_height = 40
-    sheet_width = 256
-
-    # Position of southwest-facing sprite
-    x_offset = sprite_index * 32
-    y_offset = 0
-
-    # Create image array
-    image = np.zeros((sprite_height, sprite_width, 4), dtype=np.uint8)
-
-    # Extract the sprite
-    for y in range(sprite_height):
-        for x in range(sprite_width):
-            sheet_x = x_offset + x
-            sheet_y = y_offset + y
-
-            pixel_index = (sheet_y * sheet_width) + sheet_x
-            byte_index = pixel_index // 2
-
-            if byte_index < len(sprite_data):
-                byte = sprite_data[byte_index]
-                if pixel_index % 2 == 0:
-                    color_index = byte & 0x0F
-                else:
-                    color_index = (byte >> 4) & 0x0F
-
-                if color_index < 16:
-                    image[y, x] = palette[color_index]
-            else:
-                image[y, x] = (0, 0, 0, 0)
-
-    return Image.fromarray(image, 'RGBA')
+from showcase import TileCache, render_tiles, compose_grid
 
 def get_best_sprite_from_theme(theme_dir):
     """Get the best representative sprite from a theme directory"""
@@ -147,7 +74,7 @@ def get_best_sprite_from_theme(theme_dir):
 
     return None
 
-def create_theme_showcase():
+def create_theme_showcase(use_cache=True):
     """Create a comprehensive showcase of all themes"""
 
     # Base directory
@@ -218,34 +145,14 @@ def create_theme_showcase():
     print(f"\nCreating theme showcase: {canvas_width}x{canvas_height} pixels")
     print(f"Grid: {sprites_per_row} columns x {num_rows} rows")
 
-    # Create canvas with dark background
-    canvas = Image.new('RGBA', (canvas_width, canvas_height), (24, 24, 32, 255))
-
-    # Process each theme
-    for idx, (sprite_file, theme_name, char_type) in enumerate(theme_sprites):
-        if idx % 20 == 0:
-            print(f"Processing theme {idx+1}/{len(theme_sprites)}...")
-
-        try:
-            # Read sprite file
-            with open(sprite_file, 'rb') as f:
-                data = f.read()
-
-            # Extract sprite
-            sprite_img = extract_single_sprite(data, sprite_index=1)
-
-            # Calculate grid position
-            col = idx % sprites_per_row
-            row = idx // sprites_per_row
-
-            x_pos = col * cell_width + padding
-            y_pos = row * cell_height + padding
-
-            # Paste sprite
-            canvas.paste(sprite_img, (x_pos, y_pos), sprite_img)
-
-        except Exception as e:
-            print(f"  Error processing {theme_name}: {e}")
+    # Reuse cached tiles; decode each remaining pixel body once and color by palette lookup
+    print("Rendering themes...")
+    cache = TileCache(base_dir / ".showcase_cache") if use_cache else None
+    tiles = render_tiles([sprite_file for sprite_file, _, _ in theme_sprites], sprite_index=1,
+                         cache=cache)
+    if cache is not None:
+        print(f"Tiles: {cache.hits} cached, {cache.misses} rendered")
+    canvas = compose_grid(tiles, sprites_per_row, padding, (24, 24, 32, 255))
 
     # Save the showcase
     output_file = base_dir / "THEME_SHOWCASE_ALL_210.png"
@@ -266,7 +173,7 @@ def create_theme_showcase():
 
 def main():
     try:
-        result = create_theme_showcase()
+        result = create_theme_showcase(use_cache='--no-cache' not in sys.argv)
         if result:
             print("\nTHEME SHOWCASE COMPLETE!")
             print("This shows the best sprite from each of your 210+ themes!")
@@ -4,87 +4,14 @@ Create the ULTIMATE sprite sheet with EVERY character in EVERY theme
 This will show all job/character combinations for each theme!
 """
 
-import struct
 import sys
 import os
-from PIL import Image
-import numpy as np
 from pathlib import Path
 import math
 
-def bgr555_to_rgb888(bgr555):
-    """Convert BGR555 color format to RGB888"""
-    b = (bgr555 >> 10) & 0x1F
-    g = (bgr555 >> 5) & 0x1F
-    r = bgr555 & 0x1F
+from showcase import TileCache, render_tiles, compose_grid
 
-    r = (r * 255) // 31
-    g = (g * 255) // 31
-    b = (b * 255) // 31
-
-    return (r, g, b, 255)
-
-def read_palette(data, palette_index=0):
-    """Read a single 16-color palette from sprite data"""
-    palette = []
-    base_offset = palette_index * 32
-
-    for i in range(16):
-        offset = base_offset + (i * 2)
-        if offset + 1 < len(data):
-            color_value = struct.unpack('<H', data[offset:offset+2])[0]
-            rgba = bgr555_to_rgb888(color_value)
-            palette.append(rgba)
-        else:
-            palette.append((0, 0, 0, 255))
-
-    return palette
-
-def extract_single_sprite(data, sprite_index=1, palette_index=0):
-    """Extract a single sprite (facing southwest) from the sheet"""
-    # Skip palette data
-    sprite_data = data[512:]
-
-    # Read palette
-    palette = read_palette(data, palette_index)
-    palette[0] = (0, 0, 0, 0)  # Transparent background
-
-    # Sprite dimensions
-    sprite_width = 32
-    sprite_height = 40  # Reduced to avoid cut-off heads
-    sheet_width = 256
-
-    # Position of southwest-facing sprite (index 1)
-    x_offset = sprite_index * 32
-    y_offset = 0
-
-    # Create image array
-    image = np.zeros((sprite_height, sprite_width, 4), dtype=np.uint8)
-
-    # Extract the sprite
-    for y in range(sprite_height):
-        for x in range(sprite_width):
-            sheet_x = x_offset + x
-            sheet_y = y_offset + y
-
-            pixel_index = (sheet_y * sheet_width) + sheet_x
-            byte_index = pixel_index // 2
-
-            if byte_index < len(sprite_data):
-                byte = sprite_data[byte_index]
-                if pixel_index % 2 == 0:
-                    color_index = byte & 0x0F
-                else:
-                    color_index = (byte >> 4) & 0x0F
-
-                if color_index < 16:
-                    image[y, x] = palette[color_index]
-            else:
-                image[y, x] = (0, 0, 0, 0)
-
-    return Image.fromarray(image, 'RGBA')
-
-def create_ultimate_spritesheet():
+def create_ultimate_spritesheet(use_cache=True):
     """Create a massive sprite sheet with ALL characters in ALL themes"""
 
     # Base directory
@@ -192,34 +119,14 @@ def create_ultimate_spritesheet():
     print(f"Grid: {sprites_per_row} columns x {num_rows} rows")
     print(f"Total sprites: {len(all_sprites)}")
 
-    # Create the canvas with a dark background
-    canvas = Image.new('RGBA', (canvas_width, canvas_height), (32, 32, 48, 255))
-
-    # Process each sprite
-    for idx, (sprite_file, label) in enumerate(all_sprites):
-        if idx % 50 == 0:
-            print(f"Processing sprite {idx+1}/{len(all_sprites)}...")
-
-        try:
-            # Read the sprite file
-            with open(sprite_file, 'rb') as f:
-                data = f.read()
-
-            # Extract the southwest-facing sprite
-            sprite_img = extract_single_sprite(data, sprite_index=1)
-
-            # Calculate position in grid
-            col = idx % sprites_per_row
-            row = idx // sprites_per_row
-
-            x_pos = col * cell_width + padding
-            y_pos = row * cell_height + padding
-
-            # Paste the sprite
-            canvas.paste(sprite_img, (x_pos, y_pos), sprite_img)
-
-        except Exception as e:
-            print(f"  Error processing {label}: {e}")
+    # Reuse cached tiles; decode each remaining pixel body once and color by palette lookup
+    print("Rendering sprites...")
+    cache = TileCache(base_dir / ".showcase_cache") if use_cache else None
+    tiles = render_tiles([sprite_file for sprite_file, _ in all_sprites], sprite_index=1,
+                         cache=cache)
+    if cache is not None:
+        print(f"Tiles: {cache.hits} cached, {cache.misses} rendered")
+    canvas = compose_grid(tiles, sprites_per_row, padding, (32, 32, 48, 255))
 
     # Save the ultimate sprite sheet
     output_file = base_dir / "ULTIMATE_ALL_SPRITES.png"
@@ -240,7 +147,7 @@ def create_ultimate_spritesheet():
 
 def main():
     try:
-        result = create_ultimate_spritesheet()
+        result = create_ultimate_spritesheet(use_cache='--no-cache' not in sys.argv)
         if result:
             print("\nULTIMATE SPRITE SHEET COMPLETE!")
             print("This shows EVERY character in EVERY theme!")
@@ -0,0 +1,88 @@
+"""
+Shared NumPy codecs for FFT sprite data.
+
+Scripts in scripts/ import this directly; scripts in a character subfolder
+add the scripts/ directory to sys.path first (same as the other shared helpers):
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import fftsprite
+"""
+
+from .codec import (
+    PALETTE_BYTES,
+    PALETTE_COUNT,
+    COLORS_PER_PALETTE,
+    SHEET_WIDTH,
+    SPRITE_WIDTH,
+    SPRITE_HEIGHT,
+    SpriteSheet,
+    bgr555_to_rgb,
+    rgb_to_bgr555,
+    parse_color,
+    decode_palettes,
+    encode_palettes,
+    palettes_to_rgba,
+    read_palette_rgba,
+    unpack_nibbles,
+    pack_nibbles,
+    decode_pixels,
+    apply_palette,
+    decode_sprite,
+    encode_sprite,
+    load_sprite,
+    save_sprite,
+)
+from .fileops import (
+    clone_file,
+    read_palette_block,
+    patch_palette,
+)
+from .mapped import (
+    MappedFile,
+    iter_mapped,
+)
+from .tex import (
+    TEX_HEADER_BYTES,
+    TEX_WIDTH,
+    TexSheet,
+    decode_tex,
+    encode_tex,
+    load_tex,
+    save_tex,
+)
+from .colormap import (
+    ColorMap,
+    pack_rgb,
+    unpack_rgb,
+    unique_colors,
+)
+from .labels import (
+    Components,
+    label_components,
+)
+from .shading import (
+    THEMED_PALETTES,
+    rgb_to_hsv,
+    hsv_to_rgb,
+    shade_indices,
+    shade_slots,
+    palette_slots,
+)
+from .sections import (
+    ROLES,
+    SectionTable,
+    load_sections,
+)
+from .nxd import CharClut
+from .catalog import (
+    PaletteCatalog,
+    rgb_to_lab,
+)
+from .match import (
+    PaletteMatcher,
+    palette_lab,
+    palette_liveness,
+    palette_distances,
+    top_k,
+)
+from .store import SpriteStore
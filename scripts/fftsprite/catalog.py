@@ -0,0 +1,313 @@
+"""
+SQLite catalog of every palette in the tree: which colors live where.
+
+Ingests the unit bins (fftpack/unit/sprites_<theme>/*.bin), the HD BMP sheets
+(ColorMod/Images/<character>/<theme>/*.bmp) and the TEX sheets (g2d and
+RamzaThemes/<theme>/tex_*.bin) into one database:
+
+    files    path, kind (bin / bmp / tex), sprite, theme, size, mtime, content hash
+    colors   one row per (file, palette, index): BGR555 word, RGB, CIE Lab
+    palettes one row per (file, palette): the 16 words and 16 Lab colors as blobs,
+             for whole-palette nearest-neighbour queries
+    usage    TEX files carry no palette; pixel count per color index instead
+
+colors is indexed on (idx, bgr555), (bgr555) and (palette, idx), so "which
+themes use pure black at index 3" is an index lookup:
+
+    catalog = fftsprite.PaletteCatalog().open()
+    catalog.ingest()                                  # only new / changed files
+    catalog.find(idx=3, rgb=(0, 0, 0), kind="bin")
+    catalog.nearest(bmp_palette_rgb, limit=5)         # closest palettes by Lab distance
+
+Ingest is incremental: a file whose size and mtime match its row is skipped
+without being read, and a file whose content hash still matches only has its
+stat refreshed. Files that disappeared are dropped. Colors use the codec's
+"scale" expansion (c * 255 / 31) and bit 15 of a palette word is ignored.
+
+An RGB BMP (a themed sheet) gets its palette from the indexed sheet of the same
+name in <character>/original: each original index takes the themed color
+most of its pixels turned into.
+"""
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .codec import PALETTE_BYTES, COLORS_PER_PALETTE, bgr555_to_rgb, rgb_to_bgr555
+from .mapped import MappedFile
+from .store import content_hash
+from .tex import TEX_HEADER_BYTES
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+UNIT_DIR = REPO_DIR / "ColorMod" / "FFTIVC" / "data" / "enhanced" / "fftpack" / "unit"
+G2D_DIR = REPO_DIR / "ColorMod" / "FFTIVC" / "data" / "enhanced" / "system" / "ffto" / "g2d"
+RAMZA_THEMES_DIR = REPO_DIR / "ColorMod" / "RamzaThemes"
+IMAGES_DIR = REPO_DIR / "ColorMod" / "Images"
+CATALOG_PATH = REPO_DIR / ".palette_cache" / "palette_catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    sprite TEXT NOT NULL,
+    theme TEXT,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS colors (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    palette INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    bgr555 INTEGER NOT NULL,
+    r INTEGER NOT NULL, g INTEGER NOT NULL, b INTEGER NOT NULL,
+    lab_l REAL NOT NULL, lab_a REAL NOT NULL, lab_b REAL NOT NULL,
+    PRIMARY KEY (file_id, palette, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS palettes (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    palette INTEGER NOT NULL,
+    words BLOB NOT NULL,
+    lab BLOB NOT NULL,
+    PRIMARY KEY (file_id, palette)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS usage (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    pixels INTEGER NOT NULL,
+    PRIMARY KEY (file_id, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_sprite ON files(sprite, theme);
+CREATE INDEX IF NOT EXISTS files_theme ON files(theme);
+CREATE INDEX IF NOT EXISTS colors_idx_color ON colors(idx, bgr555);
+CREATE INDEX IF NOT EXISTS colors_color ON colors(bgr555);
+CREATE INDEX IF NOT EXISTS colors_slot ON colors(palette, idx);
+"""
+
+
+def rgb_to_lab(rgb):
+    """(..., 3) sRGB 0-255 -> (..., 3) CIE Lab (D65)."""
+    c = np.asarray(rgb, dtype=np.float64) / 255
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = c @ np.array([[0.4124564, 0.2126729, 0.0193339],
+                        [0.3575761, 0.7151522, 0.1191920],
+                        [0.1804375, 0.0721750, 0.9503041]])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16,
+                     500 * (f[..., 0] - f[..., 1]),
+                     200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def bmp_palette(path):
+    """(16,) BGR555 words of an HD sheet, or None if it cannot be indexed.
+
+    Indexed sheets use their own palette; RGB sheets are paired with the
+    indexed sheet of the same name in the sibling "original" folder.
+    """
+    with Image.open(path) as img:
+        if img.mode == "P":
+            rgb = np.array(img.getpalette()[:COLORS_PER_PALETTE * 3], dtype=np.uint8).reshape(-1, 3)
+            return rgb_to_bgr555(rgb, "shift")
+        themed = np.array(img.convert("RGB"))
+    original = Path(path).parent.parent / "original" / Path(path).name
+    if not original.exists():
+        return None
+    with Image.open(original) as img:
+        if img.mode != "P" or img.size != themed.shape[1::-1]:
+            return None
+        indices = np.array(img).ravel()
+    keys = (themed[..., 0].astype(np.int64) << 16 | themed[..., 1].astype(np.int64) << 8
+            | themed[..., 2]).ravel()
+    pairs, counts = np.unique(indices.astype(np.int64) << 24 | keys, return_counts=True)
+    rgb = np.zeros((COLORS_PER_PALETTE, 3), dtype=np.uint8)
+    best = np.zeros(COLORS_PER_PALETTE, dtype=np.int64)
+    for pair, count in zip(pairs, counts):
+        index = int(pair >> 24)
+        if index < COLORS_PER_PALETTE and count > best[index]:
+            best[index] = count
+            rgb[index] = ((pair >> 16) & 0xFF, (pair >> 8) & 0xFF, pair & 0xFF)
+    return rgb_to_bgr555(rgb, "shift")
+
+
+def tex_usage(path, whole_sheet):
+    """Pixel count per color index of a TEX file (nibble order does not matter)."""
+    with MappedFile(path, header=0 if whole_sheet else TEX_HEADER_BYTES) as tex:
+        body = tex.body_bytes
+        return np.bincount(body & 0x0F, minlength=16) + np.bincount(body >> 4, minlength=16)
+
+
+class PaletteCatalog:
+    """The palette catalog database plus the scan that keeps it current."""
+
+    def __init__(self, path=CATALOG_PATH, unit_dir=UNIT_DIR, images_dir=IMAGES_DIR,
+                 tex_dirs=(G2D_DIR, RAMZA_THEMES_DIR)):
+        self.path = Path(path)
+        self.unit_dir = Path(unit_dir)
+        self.images_dir = Path(images_dir)
+        self.tex_dirs = [Path(d) for d in tex_dirs]
+        self.conn = None
+
+    def open(self):
+        if self.conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(self.path)
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.conn.executescript(SCHEMA)
+        return self
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- scanning --------------------------------------------------------------
+
+    def sources(self):
+        """Yield (path, kind, sprite, theme) for every file the catalog covers."""
+        for path in sorted(self.unit_dir.glob("sprites_*/*.bin")):
+            yield path, "bin", path.name, path.parent.name[len("sprites_"):]
+        for path in sorted(self.images_dir.glob("*/*/*.bmp")):
+            yield path, "bmp", f"{path.parent.parent.name}/{path.stem}", path.parent.name
+        for tex_dir in self.tex_dirs:
+            for path in sorted(tex_dir.rglob("tex_*.bin")):
+                theme = path.parent.name if path.parent != tex_dir else None
+                yield path, "tex", path.stem, theme
+
+    def _key(self, path):
+        try:
+            return path.resolve().relative_to(REPO_DIR).as_posix()
+        except ValueError:
+            return str(path.resolve())
+
+    def ingest(self, force=False, verbose=True):
+        """Bring the catalog up to date; returns counts of added / updated / unchanged / removed."""
+        self.open()
+        known = {row[0]: row[1:] for row in
+                 self.conn.execute("SELECT path, id, size, mtime_ns, hash FROM files")}
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "skipped": 0}
+        seen = set()
+        with self.conn:
+            for path, kind, sprite, theme in self.sources():
+                key = self._key(path)
+                seen.add(key)
+                st = path.stat()
+                row = known.get(key)
+                if row and not force and row[1:3] == (st.st_size, st.st_mtime_ns):
+                    counts["unchanged"] += 1
+                    continue
+                digest = content_hash(path.read_bytes())
+                if row and not force and row[3] == digest:
+                    self.conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                                      (st.st_size, st.st_mtime_ns, row[0]))
+                    counts["unchanged"] += 1
+                    continue
+                if row:
+                    self.conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+                if self._add(path, key, kind, sprite, theme, st, digest):
+                    counts["updated" if row else "added"] += 1
+                else:
+                    counts["skipped"] += 1
+            for key in set(known) - seen:
+                self.conn.execute("DELETE FROM files WHERE id = ?", (known[key][0],))
+                counts["removed"] += 1
+        if verbose:
+            print("  " + ", ".join(f"{n} {what}" for what, n in counts.items()))
+        return counts
+
+    def _add(self, path, key, kind, sprite, theme, st, digest):
+        if kind == "bin":
+            with MappedFile(path) as sprite_file:
+                if sprite_file.size < PALETTE_BYTES:
+                    return False
+                words = np.array(sprite_file.palettes)
+        elif kind == "bmp":
+            words = bmp_palette(path)
+            if words is None:
+                return False
+            words = words.reshape(1, COLORS_PER_PALETTE)
+        else:
+            words = None
+
+        cur = self.conn.execute(
+            "INSERT INTO files (path, kind, sprite, theme, size, mtime_ns, hash) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, kind, sprite, theme, st.st_size, st.st_mtime_ns, digest))
+        file_id = cur.lastrowid
+
+        if words is None:
+            usage = tex_usage(path, whole_sheet=RAMZA_THEMES_DIR in path.resolve().parents)
+            self.conn.executemany("INSERT INTO usage VALUES (?, ?, ?)",
+                                  [(file_id, i, int(n)) for i, n in enumerate(usage)])
+            return True
+
+        words = words.astype(np.uint16) & 0x7FFF
+        rgb = bgr555_to_rgb(words)
+        lab = rgb_to_lab(rgb)
+        palette, idx = np.indices(words.shape)
+        self.conn.executemany(
+            "INSERT INTO colors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            zip([file_id] * words.size, palette.ravel().tolist(), idx.ravel().tolist(),
+                words.ravel().tolist(), *rgb.reshape(-1, 3).T.tolist(), *lab.reshape(-1, 3).T.tolist()))
+        self.conn.executemany(
+            "INSERT INTO palettes VALUES (?, ?, ?, ?)",
+            [(file_id, p, words[p].astype("<u2").tobytes(), lab[p].astype("<f4").tobytes())
+             for p in range(len(words))])
+        return True
+
+    # -- queries ---------------------------------------------------------------
+
+    def find(self, idx=None, rgb=None, bgr555=None, palette=None, kind=None, theme=None):
+        """(path, theme, sprite, palette, idx, bgr555) rows matching every given filter.
+
+        rgb is converted to BGR555 the same way the themes write it (c >> 3).
+        """
+        if rgb is not None:
+            bgr555 = int(rgb_to_bgr555(np.array(rgb), "shift"))
+        where, args = [], []
+        for column, value in (("c.idx", idx), ("c.bgr555", bgr555), ("c.palette", palette),
+                              ("f.kind", kind), ("f.theme", theme)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        sql = ("SELECT f.path, f.theme, f.sprite, c.palette, c.idx, c.bgr555 "
+               "FROM colors c JOIN files f ON f.id = c.file_id")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self.open().conn.execute(sql + " ORDER BY f.path, c.palette, c.idx", args).fetchall()
+
+    def nearest(self, rgb, limit=10, kind=None, skip_transparent=True):
+        """Palettes closest to a (16, 3) RGB palette by mean Lab distance per index.
+
+        Returns (distance, path, theme, sprite, palette) rows, closest first.
+        Index 0 (transparent) is left out of the distance unless
+        skip_transparent is False.
+        """
+        target = rgb_to_lab(np.asarray(rgb).reshape(-1, 3))
+        sql = ("SELECT f.path, f.theme, f.sprite, p.palette, p.lab FROM palettes p "
+               "JOIN files f ON f.id = p.file_id")
+        rows = self.open().conn.execute(sql + (" WHERE f.kind = ?" if kind else ""),
+                                        (kind,) if kind else ()).fetchall()
+        if not rows:
+            return []
+        lab = np.frombuffer(b"".join(r[4] for r in rows), dtype="<f4").reshape(len(rows), -1, 3)
+        n = min(lab.shape[1], len(target))
+        first = 1 if skip_transparent else 0
+        dist = np.linalg.norm(lab[:, first:n] - target[first:n], axis=-1).mean(axis=1)
+        order = np.argsort(dist, kind="stable")[:limit]
+        return [(float(dist[i]),) + tuple(rows[i][:4]) for i in order]
+
+    def sql(self, query, args=()):
+        """Run a query on a separate read-only connection; writes raise sqlite3.OperationalError."""
+        self.open()
+        with closing(sqlite3.connect(self.path.resolve().as_uri() + "?mode=ro", uri=True)) as conn:
+            return conn.execute(query, args).fetchall()
@@ -0,0 +1,233 @@
+"""
+Vectorized codec for FFT IVC unit sprite bins (battle_*_spr.bin).
+
+Bin layout (same as BinSpriteExtractor.cs):
+    bytes 0..511   16 palettes x 16 colors x 2 bytes, BGR555 little-endian
+                   (XBBBBBGGGGGRRRRR). Index 0 of every palette is transparent.
+    bytes 512..    4-bit indexed pixels, 256-wide sheet,
+                   EVEN pixel = low nibble, ODD pixel = high nibble.
+
+Everything here works on whole blocks at once with NumPy: a full palette block
+decodes to a (16, 16) uint16 array and a full pixel body unpacks to a
+(rows, 256) uint8 index array in a single pass, and both encode back to the
+exact original bytes.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+PALETTE_BYTES = 512
+PALETTE_COUNT = 16
+COLORS_PER_PALETTE = 16
+SHEET_WIDTH = 256
+SPRITE_WIDTH = 32
+SPRITE_HEIGHT = 40
+
+# 5-bit -> 8-bit channel expansion tables.
+#   "scale": c * 255 // 31  (BinSpriteExtractor.cs / PaletteModifier.cs)
+#   "shift": c << 3         (MonsterRecolor.cs / TexFileModifier.cs)
+_EXPAND = {
+    "scale": (np.arange(32, dtype=np.uint16) * 255 // 31).astype(np.uint8),
+    "shift": (np.arange(32, dtype=np.uint16) << 3).astype(np.uint8),
+}
+
+
+def _expand_table(mode):
+    try:
+        return _EXPAND[mode]
+    except KeyError:
+        raise ValueError(f"Unknown channel expansion mode: {mode!r} (expected 'scale' or 'shift')")
+
+
+# ---------------------------------------------------------------------------
+# Colors
+# ---------------------------------------------------------------------------
+
+def bgr555_to_rgb(words, mode="scale"):
+    """Convert BGR555 words (any shape) to an (..., 3) uint8 RGB array."""
+    words = np.asarray(words, dtype=np.uint16)
+    table = _expand_table(mode)
+    rgb = np.empty(words.shape + (3,), dtype=np.uint8)
+    rgb[..., 0] = table[words & 0x1F]
+    rgb[..., 1] = table[(words >> 5) & 0x1F]
+    rgb[..., 2] = table[(words >> 10) & 0x1F]
+    return rgb
+
+
+def rgb_to_bgr555(rgb, mode="shift"):
+    """Convert an (..., 3) RGB array (0-255) to BGR555 uint16 words.
+
+    "shift" truncates (c >> 3, the rgb_to_fft_color convention); "scale" uses
+    c * 31 // 255 (the rgb_to_bgr555 convention in the cloud scripts).
+    """
+    rgb = np.clip(np.asarray(rgb, dtype=np.int32), 0, 255)
+    if mode == "shift":
+        c5 = rgb >> 3
+    elif mode == "scale":
+        c5 = rgb * 31 // 255
+    else:
+        raise ValueError(f"Unknown channel reduction mode: {mode!r} (expected 'shift' or 'scale')")
+    return ((c5[..., 2] << 10) | (c5[..., 1] << 5) | c5[..., 0]).astype(np.uint16)
+
+
+def parse_color(color):
+    """'#RRGGBB' or [r, g, b] -> (r, g, b)."""
+    if isinstance(color, str):
+        color = color.lstrip('#')
+        return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return tuple(int(c) for c in color)
+
+
+# ---------------------------------------------------------------------------
+# Palette block
+# ---------------------------------------------------------------------------
+
+def decode_palettes(data):
+    """Return the 512-byte palette block as a (16, 16) uint16 array (a copy)."""
+    block = np.frombuffer(data, dtype="<u2", count=PALETTE_COUNT * COLORS_PER_PALETTE)
+    return block.reshape(PALETTE_COUNT, COLORS_PER_PALETTE).astype(np.uint16)
+
+
+def encode_palettes(palettes):
+    """Pack a (16, 16) BGR555 array back into the 512-byte palette block."""
+    palettes = np.asarray(palettes, dtype=np.uint16)
+    if palettes.shape != (PALETTE_COUNT, COLORS_PER_PALETTE):
+        raise ValueError(f"Expected a (16, 16) palette array, got {palettes.shape}")
+    return palettes.astype("<u2").tobytes()
+
+
+def palettes_to_rgba(palettes, mode="scale", transparent_index=0):
+    """Convert BGR555 palettes (..., 16) to RGBA (..., 16, 4) uint8.
+
+    Every color is opaque except `transparent_index` (pass None to keep all
+    colors opaque), which becomes (0, 0, 0, 0) like Color.Transparent in C#.
+    """
+    rgb = bgr555_to_rgb(palettes, mode)
+    rgba = np.empty(rgb.shape[:-1] + (4,), dtype=np.uint8)
+    rgba[..., :3] = rgb
+    rgba[..., 3] = 255
+    if transparent_index is not None:
+        rgba[..., transparent_index, :] = 0
+    return rgba
+
+
+def read_palette_rgba(data, palette_index=0, mode="scale"):
+    """Decode one palette of a sprite bin to a (16, 4) RGBA array."""
+    if not 0 <= palette_index < PALETTE_COUNT:
+        raise ValueError(f"Palette index out of range: {palette_index}")
+    return palettes_to_rgba(decode_palettes(data)[palette_index], mode)
+
+
+# ---------------------------------------------------------------------------
+# Pixel body
+# ---------------------------------------------------------------------------
+
+def unpack_nibbles(buf, low_first=True):
+    """Unpack 4-bit packed bytes into a flat uint8 index array (2 per byte).
+
+    Sprite bins store the first pixel in the low nibble; TEX files store it in
+    the high nibble (pass low_first=False).
+    """
+    packed = np.frombuffer(buf, dtype=np.uint8)
+    out = np.empty(packed.size * 2, dtype=np.uint8)
+    lo = packed & 0x0F
+    hi = packed >> 4
+    if low_first:
+        out[0::2], out[1::2] = lo, hi
+    else:
+        out[0::2], out[1::2] = hi, lo
+    return out
+
+
+def pack_nibbles(indices, low_first=True):
+    """Inverse of unpack_nibbles: pack a flat index array back into bytes."""
+    flat = np.asarray(indices, dtype=np.uint8).reshape(-1)
+    if flat.size % 2:
+        raise ValueError("Cannot pack an odd number of 4-bit pixels")
+    first, second = flat[0::2] & 0x0F, flat[1::2] & 0x0F
+    if low_first:
+        packed = first | (second << 4)
+    else:
+        packed = (first << 4) | second
+    return packed.astype(np.uint8).tobytes()
+
+
+def decode_pixels(data, width=SHEET_WIDTH, rows=None):
+    """Unpack the pixel body of a sprite bin into a (rows, width) index array.
+
+    The body length is not always a whole number of rows; the last partial row
+    is padded with index 0 (transparent). Pass `rows` to only unpack the top of
+    the sheet (e.g. SPRITE_HEIGHT for the standing frames).
+    """
+    body = memoryview(data)[PALETTE_BYTES:]
+    row_bytes = width // 2
+    if rows is not None:
+        body = body[:rows * row_bytes]
+    flat = unpack_nibbles(body)
+    height = -(-flat.size // width)
+    if flat.size != height * width:
+        flat = np.concatenate([flat, np.zeros(height * width - flat.size, dtype=np.uint8)])
+    return flat.reshape(height, width)
+
+
+def apply_palette(indices, palette_rgba):
+    """Map an index image through a (16, C) color table in one lookup."""
+    return np.asarray(palette_rgba)[indices]
+
+
+# ---------------------------------------------------------------------------
+# Whole-file container
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SpriteSheet:
+    """A decoded sprite bin: palette block plus pixel index sheet."""
+
+    palettes: np.ndarray   # (16, 16) uint16 BGR555
+    indices: np.ndarray    # (rows, 256) uint8, last row zero-padded
+    body_size: int         # pixel body length in bytes (for exact round-trips)
+
+    @property
+    def height(self):
+        return self.indices.shape[0]
+
+    def palette_rgba(self, palette_index=0, mode="scale"):
+        return palettes_to_rgba(self.palettes[palette_index], mode)
+
+    def frame(self, sprite_index, x_offset=None, y_offset=0,
+              width=SPRITE_WIDTH, height=SPRITE_HEIGHT):
+        """Index view of one frame. Frames sit side by side on the top row."""
+        if x_offset is None:
+            x_offset = sprite_index * width
+        return self.indices[y_offset:y_offset + height, x_offset:x_offset + width]
+
+    def rgba(self, palette_index=0, mode="scale"):
+        """Whole sheet as an (rows, 256, 4) RGBA array."""
+        return apply_palette(self.indices, self.palette_rgba(palette_index, mode))
+
+
+def decode_sprite(data):
+    """Decode a complete sprite bin into a SpriteSheet."""
+    if len(data) < PALETTE_BYTES:
+        raise ValueError(f"Sprite data too small ({len(data)} bytes) to hold a palette block")
+    return SpriteSheet(
+        palettes=decode_palettes(data),
+        indices=decode_pixels(data),
+        body_size=len(data) - PALETTE_BYTES,
+    )
+
+
+def encode_sprite(sheet):
+    """Encode a SpriteSheet back into the exact on-disk byte layout."""
+    flat = sheet.indices.reshape(-1)[:sheet.body_size * 2]
+    return encode_palettes(sheet.palettes) + pack_nibbles(flat)
+
+
+def load_sprite(path):
+    return decode_sprite(Path(path).read_bytes())
+
+
+def save_sprite(path, sheet):
+    Path(path).write_bytes(encode_sprite(sheet))
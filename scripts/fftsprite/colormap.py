@@ -0,0 +1,147 @@
+"""
+RGB -> RGB color maps learned from paired images.
+
+The Ramza animation fixers recolor an original sheet by example: the original
+standing sheet and its themed copy are compared pixel for pixel, and the
+resulting color map is applied to the original animation sheet. ColorMap does
+both steps on whole arrays. Colors are packed into 24-bit keys
+(r << 16 | g << 8 | b), the map is built with np.unique over the paired keys,
+and applied with searchsorted over the unique colors of the target image, so
+the per-pixel work is a single gather.
+
+    cmap = fftsprite.ColorMap.from_images(orig_standing, dark_standing)
+    recolored, unmatched = cmap.apply(orig_animation, fuzzy=True)
+
+Black (0, 0, 0) is the sheet background: it is never learned and never
+recolored. Fuzzy matching resolves each unmatched color to the nearest mapped
+color by RGB distance, computed once per unique color rather than per pixel.
+"""
+
+import numpy as np
+
+BACKGROUND = 0
+FUZZY_DISTANCE = 50     # strict upper bound on the RGB distance of a fuzzy match
+
+
+def pack_rgb(rgb):
+    """(..., 3) RGB -> (...) uint32 keys r << 16 | g << 8 | b."""
+    rgb = np.asarray(rgb, dtype=np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def unpack_rgb(keys):
+    """(...) packed keys -> (..., 3) uint8 RGB."""
+    keys = np.asarray(keys, dtype=np.uint32)
+    return np.stack([keys >> 16, keys >> 8, keys], axis=-1).astype(np.uint8)
+
+
+def unique_colors(img):
+    """Sorted packed keys of the non-background colors in an (H, W, 3) image."""
+    keys = np.unique(pack_rgb(img))
+    return keys[keys != BACKGROUND]
+
+
+def _nearest(colors, candidates, max_distance, chunk=4096):
+    """Index into `candidates` of the nearest color to each of `colors`, -1 if none is
+    closer than max_distance. Ties go to the earliest candidate."""
+    colors = unpack_rgb(colors).astype(np.int32)
+    candidates = unpack_rgb(candidates).astype(np.int32)
+    nearest = np.full(len(colors), -1, dtype=np.int64)
+    if len(candidates) == 0:
+        return nearest
+    # Compare squared integer distances; sqrt(d) < max_distance <=> d < max_distance ** 2.
+    for start in range(0, len(colors), chunk):
+        diff = colors[start:start + chunk, None, :] - candidates[None, :, :]
+        dist = (diff * diff).sum(axis=-1)
+        best = dist.argmin(axis=1)
+        close = dist[np.arange(len(best)), best] < max_distance * max_distance
+        nearest[start:start + chunk] = np.where(close, best, -1)
+    return nearest
+
+
+class ColorMap:
+    """A learned RGB -> RGB map over packed keys.
+
+    keys / values are the mapped colors and their replacements, in the order
+    each source color first appears (row-major) in the learning image; that
+    order decides ties in fuzzy matching, as the dict-based scan did.
+    """
+
+    def __init__(self, keys, values):
+        self.keys = np.asarray(keys, dtype=np.uint32)
+        self.values = np.asarray(values, dtype=np.uint32)
+        self._sorter = np.argsort(self.keys, kind="stable")
+        self._sorted = self.keys[self._sorter]
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_dict(cls, mapping):
+        """A map from an {(r, g, b): (r, g, b)} dict, keeping its order."""
+        if not mapping:
+            return cls([], [])
+        return cls(pack_rgb(list(mapping.keys())), pack_rgb(list(mapping.values())))
+
+    @classmethod
+    def from_images(cls, original, themed, keep="last"):
+        """Learn the map from two same-sized (H, W, 3) images.
+
+        Where one original color meets several themed colors, `keep` picks the
+        pixel that wins: "last" (row-major) or "first". Returns an empty map if
+        the shapes differ.
+        """
+        original, themed = np.asarray(original), np.asarray(themed)
+        if original.shape != themed.shape:
+            return cls([], [])
+        src = pack_rgb(original).ravel()
+        dst = pack_rgb(themed).ravel()
+        fg = src != BACKGROUND
+        src, dst = src[fg], dst[fg]
+
+        keys, first = np.unique(src, return_index=True)
+        if keep == "last":
+            _, last = np.unique(src[::-1], return_index=True)
+            pick = len(src) - 1 - last
+        elif keep == "first":
+            pick = first
+        else:
+            raise ValueError(f"keep must be 'first' or 'last', not {keep!r}")
+        order = np.argsort(first, kind="stable")
+        return cls(keys[order], dst[pick][order])
+
+    def lookup(self, colors):
+        """Replacement for each packed color and whether it was mapped."""
+        colors = np.asarray(colors, dtype=np.uint32)
+        if len(self.keys) == 0:
+            return np.zeros_like(colors), np.zeros(colors.shape, dtype=bool)
+        pos = np.minimum(np.searchsorted(self._sorted, colors), len(self._sorted) - 1)
+        found = self._sorted[pos] == colors
+        return self.values[self._sorter[pos]], found
+
+    def nearest_table(self, colors, max_distance=FUZZY_DISTANCE):
+        """Fuzzy replacements for packed colors: (values, found) via the nearest mapped key."""
+        nearest = _nearest(colors, self.keys, max_distance)
+        found = nearest >= 0
+        return np.where(found, self.values[np.maximum(nearest, 0)], 0).astype(np.uint32), found
+
+    def apply(self, img, fuzzy=False, max_distance=FUZZY_DISTANCE):
+        """Recolor an (H, W, 3) image; returns (new uint8 image, unmatched packed colors).
+
+        Background pixels are kept. Colors with no exact mapping are resolved to
+        the nearest mapped color when `fuzzy` is set (and one is close enough),
+        and are otherwise left unchanged and reported as unmatched.
+        """
+        img = np.asarray(img)
+        keys, inverse = np.unique(pack_rgb(img), return_inverse=True)
+        values, found = self.lookup(keys)
+        found &= keys != BACKGROUND
+        missing = ~found & (keys != BACKGROUND)
+        if fuzzy and missing.any():
+            near, hit = self.nearest_table(keys[missing], max_distance)
+            values[missing] = np.where(hit, near, values[missing])
+            found[np.flatnonzero(missing)[hit]] = True
+            missing &= ~found
+        table = np.where(found, values, keys)
+        result = unpack_rgb(table[inverse.reshape(img.shape[:-1])])
+        return result, keys[missing]
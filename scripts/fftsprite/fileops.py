@@ -0,0 +1,104 @@
+"""
+Cheap file materialization for themed sprite bins.
+
+A theme only changes the 512-byte palette block of a sprite; the pixel body is
+byte-identical to its source. clone_file() copies the source with the cheapest
+mechanism the filesystem offers and patch_palette() then rewrites just the
+header in place, so a theme batch costs one 512-byte write per sprite.
+
+Hardlinks are deliberately NOT used: patching the header in place would write
+through the link into the source sprite.
+"""
+
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from .codec import PALETTE_BYTES
+
+# FICLONE from linux/fs.h: share extents copy-on-write (btrfs, XFS, bcachefs).
+_FICLONE = 0x40049409
+
+# errnos that mean "this mechanism is unavailable here", not a real I/O error
+_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EBADF}
+
+
+def _reflink(src_fd, dst_fd):
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+        return True
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            return False
+        raise
+
+
+def _copy_range(src_fd, dst_fd, size):
+    if not hasattr(os, "copy_file_range"):
+        return False
+    copied = 0
+    try:
+        while copied < size:
+            n = os.copy_file_range(src_fd, dst_fd, size - copied)
+            if n == 0:
+                break
+            copied += n
+    except OSError as e:
+        if copied == 0 and e.errno in _UNSUPPORTED:
+            return False
+        raise
+    return copied == size
+
+
+def clone_file(src, dst):
+    """Copy src to dst via reflink, then copy_file_range, then a plain copy.
+
+    The copy goes to a temporary file next to dst and replaces dst only once
+    complete. If dst already is src (same theme in and out) nothing is done.
+    Returns the mechanism used ("reflink", "copy_file_range", "copy" or "same").
+    """
+    src, dst = Path(src), Path(dst)
+    if dst.exists() and os.path.samefile(src, dst):
+        return "same"
+    size = src.stat().st_size
+    tmp = dst.with_name(dst.name + ".tmp")
+    try:
+        with open(src, "rb") as fs, open(tmp, "wb") as fd:
+            if _reflink(fs.fileno(), fd.fileno()):
+                method = "reflink"
+            elif _copy_range(fs.fileno(), fd.fileno(), size):
+                method = "copy_file_range"
+            else:
+                # Partial copy_file_range output (or none) is discarded here
+                fs.seek(0)
+                fd.seek(0)
+                fd.truncate()
+                shutil.copyfileobj(fs, fd)
+                method = "copy"
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return method
+
+
+def read_palette_block(path):
+    """Read only the 512-byte palette header of a sprite bin."""
+    with open(path, "rb") as f:
+        block = f.read(PALETTE_BYTES)
+    if len(block) != PALETTE_BYTES:
+        raise ValueError(f"{path}: too small to hold a palette block ({len(block)} bytes)")
+    return block
+
+
+def patch_palette(path, block):
+    """Overwrite the palette header of an existing sprite bin in place."""
+    if len(block) != PALETTE_BYTES:
+        raise ValueError(f"Palette block must be {PALETTE_BYTES} bytes, got {len(block)}")
+    with open(path, "r+b") as f:
+        f.write(block)
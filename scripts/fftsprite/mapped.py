@@ -0,0 +1,92 @@
+"""
+Read-only memory-mapped access to sprite bins and TEX files.
+
+MappedFile maps a file with mmap (ACCESS_READ) and hands out zero-copy views:
+`buffer` / `header` / `body` are memoryviews, `words` / `palettes` /
+`body_bytes` are NumPy arrays over the same pages. Nothing is read until a
+view is touched, and only the touched pages are faulted in, so scanning a
+whole unit or g2d tree keeps memory flat: each file's pages are released when
+it is closed, however many files the scan visits.
+
+    with fftsprite.MappedFile(path) as sprite:
+        black = ((sprite.palettes[:, 1:] & 0x7FFF) == 0).all(axis=1)
+
+Views are only valid while the file is open. close() (or leaving the with
+block) unmaps the file unless a view taken from it is still alive, in which
+case the mapping lives on until that view is dropped.
+"""
+
+import mmap
+from pathlib import Path
+
+import numpy as np
+
+from .codec import PALETTE_BYTES, PALETTE_COUNT, COLORS_PER_PALETTE
+
+
+class MappedFile:
+    """A read-only mapping of one sprite bin (header = palette block) or TEX file."""
+
+    def __init__(self, path, header=PALETTE_BYTES):
+        self.path = Path(path)
+        self.header_bytes = header
+        with open(self.path, "rb") as f:
+            self.size = f.seek(0, 2)
+            # mmap cannot map an empty file; an empty buffer keeps the views uniform
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.buffer = memoryview(self._map) if self._map is not None else memoryview(b"")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.buffer.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass    # a NumPy view still exports the buffer; unmapped when it goes away
+            self._map = None
+
+    # -- views -----------------------------------------------------------------
+
+    @property
+    def header(self):
+        """memoryview of the header (the palette block of a sprite bin)."""
+        return self.buffer[:self.header_bytes]
+
+    @property
+    def body(self):
+        """memoryview of everything after the header (the 4-bit pixel body)."""
+        return self.buffer[self.header_bytes:]
+
+    @property
+    def words(self):
+        """Whole file as little-endian uint16 words (a trailing odd byte is left out)."""
+        return np.frombuffer(self.buffer, dtype="<u2", count=self.size // 2)
+
+    @property
+    def body_bytes(self):
+        """The pixel body as a uint8 array."""
+        return np.frombuffer(self.buffer, dtype=np.uint8, offset=min(self.header_bytes, self.size))
+
+    @property
+    def palettes(self):
+        """(16, 16) BGR555 palette view. A file shorter than the block is zero-padded (a copy)."""
+        count = PALETTE_COUNT * COLORS_PER_PALETTE
+        if self.size >= PALETTE_BYTES:
+            words = np.frombuffer(self.buffer, dtype="<u2", count=count)
+        else:
+            words = np.zeros(count, dtype="<u2")
+            words[:self.size // 2] = self.words
+        return words.reshape(PALETTE_COUNT, COLORS_PER_PALETTE)
+
+
+def iter_mapped(paths, header=PALETTE_BYTES):
+    """Yield (path, MappedFile) one file at a time, unmapping each before the next."""
+    for path in paths:
+        with MappedFile(path, header) as mapped:
+            yield path, mapped
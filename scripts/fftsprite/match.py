@@ -0,0 +1,109 @@
+"""
+Batched palette similarity: which sprite bin palette paints which HD sheet.
+
+An HD BMP's embedded 16-color palette lines up 1:1 with the bin palette that
+paints it, so finding the source bin of a sheet is a nearest-palette search.
+Every candidate palette goes into one (P, 16, 3) Lab array and every target
+into one (M, 16, 3) array. palette_distances() fills the whole P x M matrix
+of mean per-index Lab distance in chunked broadcasts, and top_k() takes the
+best rows per target with argpartition.
+
+    matcher = fftsprite.PaletteMatcher.from_bins(unit_dir.glob("*.bin"))
+    for target, hits in zip(bmp_paths, matcher.match(bmp_words, k=5)):
+        ...                                     # hits: (distance, bin path, palette)
+
+Targets are compared after reducing them to BGR555 and back ("shift" in,
+"scale" out, as the bins decode), so both sides sit on the same 5-bit grid.
+Index 0 is transparent and left out of the distance by default.
+"""
+
+import numpy as np
+
+from .catalog import rgb_to_lab
+from .codec import PALETTE_COUNT, COLORS_PER_PALETTE, bgr555_to_rgb
+from .mapped import iter_mapped
+
+CHUNK_ELEMENTS = 1 << 22    # float32 elements per broadcast chunk (~16 MB)
+
+
+def palette_lab(words):
+    """(..., 16) BGR555 words -> (..., 16, 3) float32 Lab (bit 15 ignored)."""
+    words = np.asarray(words, dtype=np.uint16) & 0x7FFF
+    return rgb_to_lab(bgr555_to_rgb(words)).astype(np.float32)
+
+
+def palette_liveness(words):
+    """Distinct non-black colors per palette over indices 1-15 (index 0 is transparent)."""
+    colors = np.sort(np.asarray(words, dtype=np.uint16)[..., 1:] & 0x7FFF, axis=-1)
+    new = np.ones(colors.shape, dtype=bool)
+    new[..., 1:] = colors[..., 1:] != colors[..., :-1]
+    return (new & (colors != 0)).sum(axis=-1)
+
+
+def palette_distances(candidates, targets, first=1):
+    """(P, M) mean Lab distance of indices first..15 between two palette sets.
+
+    candidates is (P, 16, 3) and targets (M, 16, 3) Lab. Rows are processed
+    in chunks so the broadcast stays under CHUNK_ELEMENTS.
+    """
+    a = np.asarray(candidates, dtype=np.float32)[:, first:]
+    b = np.asarray(targets, dtype=np.float32)[:, first:]
+    dist = np.empty((len(a), len(b)), dtype=np.float32)
+    rows = max(1, CHUNK_ELEMENTS // max(1, b.size))
+    for start in range(0, len(a), rows):
+        diff = a[start:start + rows, None] - b[None]
+        dist[start:start + rows] = np.sqrt((diff * diff).sum(axis=-1)).mean(axis=-1)
+    return dist
+
+
+def top_k(dist, k):
+    """(k, M) row indices of the k smallest distances in each column, closest first."""
+    k = min(k, len(dist))
+    if k == 0:
+        return np.zeros((0, dist.shape[1]), dtype=np.int64)
+    part = np.argpartition(dist, k - 1, axis=0)[:k]
+    order = np.argsort(np.take_along_axis(dist, part, axis=0), axis=0, kind="stable")
+    return np.take_along_axis(part, order, axis=0)
+
+
+class PaletteMatcher:
+    """Every palette of a set of sprite bins, held as one Lab array for batched search."""
+
+    def __init__(self, paths, words):
+        self.paths = list(paths)
+        self.words = np.asarray(words, dtype=np.uint16).reshape(len(self.paths), PALETTE_COUNT, COLORS_PER_PALETTE)
+        self.lab = palette_lab(self.words).reshape(-1, COLORS_PER_PALETTE, 3)
+        self.live = palette_liveness(self.words).reshape(-1)
+
+    @classmethod
+    def from_bins(cls, paths):
+        """Read the (16, 16) palette block of every bin (files too short to hold one are skipped)."""
+        kept, words = [], []
+        for path, sprite in iter_mapped(sorted(paths)):
+            if sprite.size >= sprite.header_bytes:
+                kept.append(path)
+                words.append(np.array(sprite.palettes))
+        if not kept:
+            return cls([], np.zeros((0, PALETTE_COUNT, COLORS_PER_PALETTE), dtype=np.uint16))
+        return cls(kept, np.array(words))
+
+    @property
+    def palette_count(self):
+        return self.words.shape[1]
+
+    def distances(self, target_words, first=1, min_live=0):
+        """(bins * palettes, M) distance matrix; palettes with fewer than min_live colors are inf."""
+        dist = palette_distances(self.lab, palette_lab(np.atleast_2d(target_words)), first)
+        dist[self.live < min_live] = np.inf
+        return dist
+
+    def match(self, target_words, k=5, first=1, min_live=0):
+        """Per target, the k closest (distance, bin path, palette number), closest first."""
+        dist = self.distances(target_words, first, min_live)
+        best = top_k(dist, k)
+        hits = []
+        for t in range(dist.shape[1]):
+            rows = [int(row) for row in best[:, t] if np.isfinite(dist[row, t])]
+            hits.append([(float(dist[row, t]), self.paths[row // self.palette_count], row % self.palette_count)
+                         for row in rows])
+        return hits
@@ -0,0 +1,178 @@
+"""
+Native reader / patcher for charclut.nxd (Ramza's chapter palettes).
+
+charclut.nxd is a double-keyed NXD table (Key = chapter, Key2 = variant). The
+layout, as FF16Tools writes it for the "ffto" game:
+
+    0x00  "NXDF", u32 version (1)
+    0x08  u8 table type (2 = double-keyed), u8 category, 2 bytes padding
+    0x0C  u32 base row id, then padding to 0x20
+    0x20  u32 set table offset (relative to 0x20), u32 set count
+    0x28  u32 reserved, u32 all-rows table offset, u32 row count
+
+    set entry   (12 bytes)  key, rows offset (relative to the entry), row count
+    row entry   (12 bytes)  key, key2, row offset (relative to the entry)
+    row         (24 bytes)  DLCFlags, Comment offset, CLUTData offset (both
+                            relative to the row), CLUTData count,
+                            CharaColorSkinId, UnkBool14
+
+CLUTData is 48 bytes (16 RGB888 colors), the same values as the JSON arrays in
+charclut.sqlite. Every table is read through NumPy structured views over the
+file buffer, with no per-row parsing, so clut() returns a zero-copy (16, 3)
+view. patch() writes any number of Key/Key2 rows in one fancy-indexed
+assignment. The patcher only rewrites CLUTData in place, like
+ColorMod/Services/NxdPatcher.cs, so the rest of the file stays byte for byte.
+That is enough to emit palette variants without the FF16Tools.CLI
+sqlite-to-nxd round trip.
+
+    clut = fftsprite.CharClut.load("ColorMod/Data/nxd/charclut.nxd")
+    clut.clut(1, 0)[3:7]                       # Chapter 1 armor ramp
+    clut.patch({(1, 0): armor_ramp_48_ints, (2, 0): colors_16x3})
+    clut.save("out/charclut.nxd")
+"""
+
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+
+NXD_MAGIC = b"NXDF"
+DOUBLE_KEYED = 2
+CLUT_COLORS = 16
+CLUT_BYTES = CLUT_COLORS * 3
+
+HEADER = np.dtype([("magic", "S4"), ("version", "<u4"), ("type", "u1"), ("category", "u1"),
+                   ("pad", "<u2"), ("base_row_id", "<u4"), ("reserved", "V16"),
+                   ("sets_offset", "<u4"), ("set_count", "<u4"), ("reserved2", "<u4"),
+                   ("rows_offset", "<u4"), ("row_count", "<u4")])
+SET_ENTRY = np.dtype([("key", "<i4"), ("offset", "<i4"), ("count", "<u4")])
+ROW_ENTRY = np.dtype([("key", "<i4"), ("key2", "<i4"), ("offset", "<i4")])
+ROW = np.dtype([("dlc_flags", "<u4"), ("comment", "<i4"), ("clut", "<i4"), ("clut_count", "<u4"),
+                ("chara_color_skin_id", "<i4"), ("unk_bool14", "<u4")])
+
+SETS_BASE = 0x20    # the set table offset is relative to its own field
+
+
+class CharClut:
+    """A charclut.nxd file held in a mutable buffer, with structured views over its tables."""
+
+    def __init__(self, data):
+        self.data = bytearray(data)
+        self.buffer = np.frombuffer(self.data, dtype=np.uint8)
+        if len(self.data) < HEADER.itemsize or self.data[:4] != NXD_MAGIC:
+            raise ValueError("Invalid NXD file - missing NXDF magic")
+        self.header = np.frombuffer(self.data, dtype=HEADER, count=1)[0]
+        if self.header["type"] != DOUBLE_KEYED:
+            raise ValueError(f"Expected a double-keyed NXD table, got type {self.header['type']}")
+
+        sets_at = SETS_BASE + int(self.header["sets_offset"])
+        sets = np.frombuffer(self.data, dtype=SET_ENTRY, count=int(self.header["set_count"]), offset=sets_at)
+        set_at = sets_at + np.arange(len(sets)) * SET_ENTRY.itemsize
+
+        keys, row_at = [], []
+        for at, entry in zip(set_at, sets):
+            entries_at = int(at + entry["offset"])
+            entries = np.frombuffer(self.data, dtype=ROW_ENTRY, count=int(entry["count"]), offset=entries_at)
+            keys.append(np.stack([entries["key"], entries["key2"]], axis=1))
+            row_at.append(entries_at + np.arange(len(entries)) * ROW_ENTRY.itemsize + entries["offset"])
+        self.keys = np.concatenate(keys) if keys else np.zeros((0, 2), dtype=np.int32)
+        self.row_offsets = np.concatenate(row_at).astype(np.int64) if row_at else np.zeros(0, dtype=np.int64)
+
+        # Rows are not contiguous in general; one gather over the structured dtype reads them all.
+        rows = self.buffer[self.row_offsets[:, None] + np.arange(ROW.itemsize)]
+        self.rows = np.ascontiguousarray(rows).view(ROW).reshape(-1)
+        self.clut_offsets = self.row_offsets + self.rows["clut"]
+        self._index = {(int(k), int(k2)): i for i, (k, k2) in enumerate(self.keys)}
+
+    @classmethod
+    def load(cls, path):
+        return cls(Path(path).read_bytes())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return tuple(key) in self._index
+
+    def row(self, key, key2):
+        """Row number of (Key, Key2); KeyError if the table has no such row."""
+        try:
+            return self._index[(key, key2)]
+        except KeyError:
+            raise KeyError(f"Unknown Key/Key2 combination: {key}/{key2}") from None
+
+    def clut(self, key, key2):
+        """(16, 3) uint8 view of one row's CLUTData; writes go straight to the buffer."""
+        i = self.row(key, key2)
+        count = int(self.rows["clut_count"][i])
+        return self.buffer[self.clut_offsets[i]:self.clut_offsets[i] + count].reshape(-1, 3)
+
+    def cluts(self):
+        """(rows, 16, 3) copy of every CLUT, in table order (see `keys`)."""
+        if np.any(self.rows["clut_count"] != CLUT_BYTES):
+            raise ValueError(f"CLUTData is not {CLUT_BYTES} bytes in every row")
+        return self.buffer[self.clut_offsets[:, None] + np.arange(CLUT_BYTES)].reshape(-1, CLUT_COLORS, 3)
+
+    def comment(self, i):
+        at = int(self.row_offsets[i] + self.rows["comment"][i])
+        text = self.data[at:self.data.index(0, at)].decode("utf-8")
+        return text or None
+
+    def records(self):
+        """Rows as dicts with the charclut.sqlite column names."""
+        return [{"Key": int(k), "Key2": int(k2), "DLCFlags": int(row["dlc_flags"]),
+                 "Comment": self.comment(i), "CLUTData": self.clut(int(k), int(k2)).ravel().tolist(),
+                 "CharaColorSkinId": int(row["chara_color_skin_id"]), "UnkBool14": int(row["unk_bool14"])}
+                for i, ((k, k2), row) in enumerate(zip(self.keys, self.rows))]
+
+    # -- patching ----------------------------------------------------------------
+
+    def patch(self, updates):
+        """Write {(Key, Key2): 48 values or (16, 3) colors} in one pass; values clamp to 0..255.
+
+        Returns the number of rows written. Unknown keys raise KeyError before
+        anything is written.
+        """
+        if not updates:
+            return 0
+        rows = np.array([self.row(key, key2) for key, key2 in updates], dtype=np.int64)
+        values = np.array([np.asarray(v).reshape(-1) for v in updates.values()])
+        if values.ndim != 2 or values.shape[1] != CLUT_BYTES:
+            raise ValueError(f"CLUTData must be exactly {CLUT_BYTES} values per row")
+        if np.any(self.rows["clut_count"][rows] != CLUT_BYTES):
+            raise ValueError(f"Row CLUTData is not {CLUT_BYTES} bytes; cannot patch in place")
+        self.buffer[self.clut_offsets[rows][:, None] + np.arange(CLUT_BYTES)] = np.clip(values, 0, 255)
+        return len(rows)
+
+    def patch_from_sqlite(self, sqlite_path):
+        """Apply every CharCLUT row of a charclut.sqlite (as NxdPatcher.PatchNxdFromSqlite)."""
+        with closing(sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)) as conn:
+            rows = conn.execute("SELECT Key, Key2, CLUTData FROM CharCLUT").fetchall()
+        updates = {}
+        for key, key2, data in rows:
+            values = np.array(json.loads(data))
+            if (key, key2) in self._index and values.size == CLUT_BYTES:
+                updates[(key, key2)] = values
+        return self.patch(updates)
+
+    def to_bytes(self):
+        return bytes(self.data)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(self.data)
+
+    def copy(self):
+        """An independent CharClut over a copy of the buffer (for building variants).
+
+        The parsed tables are shared, since patching never moves a row.
+        """
+        clone = object.__new__(CharClut)
+        clone.__dict__.update(self.__dict__)
+        clone.data = bytearray(self.data)
+        clone.buffer = np.frombuffer(clone.data, dtype=np.uint8)
+        return clone
+
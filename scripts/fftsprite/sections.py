@@ -0,0 +1,219 @@
+"""
+Compiled SectionMappings: every ColorMod/Data/SectionMappings JSON in one table.
+
+The theme editor's section files (Knight_Male.json, Story/Cloud.json,
+Monster/Bomb.json, ...) are compiled once into a single .npz table:
+
+    masks     (sections, 16) bool   which palette indices the section owns
+    ramps     (sections, 16) int8   role code per index (ROLES), -1 elsewhere
+    order     (sections, 16) int8   position of the index in the JSON list
+                                    (the dark -> light ramp order), -1 elsewhere
+    primary   (sections,)    int8   primaryIndex, else the base index, else the
+                                    first index (PaletteModifier.GetPrimaryIndex)
+    uniform   (sections,)    bool   shadeMode == "uniformHue"
+
+plus the job, sprite and section names and the size / mtime of every source
+JSON. SectionTable.load() only stats the JSON files; the table is recompiled
+when any of them is added, removed or touched.
+
+    table = fftsprite.load_sections()
+    table.index_sets("battle_knight_m_spr.bin")   # {"Emblem": [4, 3], ...}
+    table.role_indices("Story/Cloud", "Hair", "shadow")
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .codec import COLORS_PER_PALETTE
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+SECTION_DIR = REPO_DIR / "ColorMod" / "Data" / "SectionMappings"
+CACHE_PATH = REPO_DIR / ".palette_cache" / "section_table.npz"
+
+# Role codes stored in `ramps`; position in this tuple is the code.
+ROLES = ("base", "shadow", "highlight", "outline", "accent", "accent_shadow", "midtone", "dark")
+
+
+class SectionTable:
+    """All section mappings as flat arrays, cached in one .npz keyed on the JSON mtimes."""
+
+    FORMAT = 1
+
+    def __init__(self, section_dir=SECTION_DIR, cache_path=CACHE_PATH):
+        self.section_dir = Path(section_dir)
+        self.cache_path = Path(cache_path)
+        self.arrays = None
+        self.compiled = False    # True when load() had to parse the JSON files
+        self._jobs = {}          # job name / sprite file / relative path -> job row
+
+    def _fingerprint(self):
+        files = sorted(self.section_dir.rglob("*.json"))
+        names = [p.relative_to(self.section_dir).as_posix() for p in files]
+        stats = [p.stat() for p in files]
+        return (np.array(names, dtype=str),
+                np.array([st.st_size for st in stats], dtype=np.int64),
+                np.array([st.st_mtime_ns for st in stats], dtype=np.int64))
+
+    def load(self):
+        """Read the cached table if it matches the JSON files, otherwise recompile it."""
+        if self.arrays is not None:
+            return self
+        names, sizes, mtimes = self._fingerprint()
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as cached:
+                if (int(cached["format"]) == self.FORMAT
+                        and np.array_equal(cached["files"], names)
+                        and np.array_equal(cached["sizes"], sizes)
+                        and np.array_equal(cached["mtimes"], mtimes)):
+                    self.arrays = {k: cached[k] for k in cached.files}
+        except (OSError, ValueError, KeyError):
+            pass
+        if self.arrays is None:
+            self.arrays = self._compile(names, sizes, mtimes)
+            self.compiled = True
+
+        a = self.arrays
+        for row, job in enumerate(a["jobs"]):
+            self._jobs[str(job)] = row
+            self._jobs[str(a["files"][row])[:-len(".json")]] = row
+        for sprite, row in zip(a["sprites"], a["sprite_jobs"]):
+            self._jobs[str(sprite)] = int(row)
+        return self
+
+    def _compile(self, names, sizes, mtimes):
+        jobs, sprites, sprite_jobs, first = [], [], [], [0]
+        section_names, display_names = [], []
+        masks, ramps, order, primary, uniform = [], [], [], [], []
+
+        for row, name in enumerate(names):
+            path = self.section_dir / name
+            spec = json.loads(path.read_text(encoding="utf-8"))
+            jobs.append(spec["job"])
+            for sprite in spec.get("sprites", [spec.get("sprite")]):
+                sprites.append(sprite)
+                sprite_jobs.append(row)
+            for section in spec["sections"]:
+                indices, roles = section["indices"], section["roles"]
+                if len(indices) != len(roles):
+                    raise ValueError(f"{path}: section {section['name']} has "
+                                     f"{len(indices)} indices but {len(roles)} roles")
+                mask = np.zeros(COLORS_PER_PALETTE, dtype=bool)
+                ramp = np.full(COLORS_PER_PALETTE, -1, dtype=np.int8)
+                pos = np.full(COLORS_PER_PALETTE, -1, dtype=np.int8)
+                for i, (index, role) in enumerate(zip(indices, roles)):
+                    if role not in ROLES:
+                        raise ValueError(f"{path}: section {section['name']} has unknown role {role!r}")
+                    mask[index] = True
+                    ramp[index] = ROLES.index(role)
+                    pos[index] = i
+                base = [index for index, role in zip(indices, roles) if role == "base"]
+                section_names.append(section["name"])
+                display_names.append(section.get("displayName", section["name"]))
+                masks.append(mask)
+                ramps.append(ramp)
+                order.append(pos)
+                primary.append(section.get("primaryIndex", base[0] if base else indices[0]))
+                uniform.append(section.get("shadeMode", "").lower() == "uniformhue")
+            first.append(len(section_names))
+
+        arrays = {
+            "format": np.array(self.FORMAT),
+            "files": names, "sizes": sizes, "mtimes": mtimes,
+            "jobs": np.array(jobs, dtype=str),
+            "first": np.array(first, dtype=np.int32),
+            "sprites": np.array(sprites, dtype=str),
+            "sprite_jobs": np.array(sprite_jobs, dtype=np.int32),
+            "section_names": np.array(section_names, dtype=str),
+            "display_names": np.array(display_names, dtype=str),
+            "masks": np.array(masks, dtype=bool).reshape(-1, COLORS_PER_PALETTE),
+            "ramps": np.array(ramps, dtype=np.int8).reshape(-1, COLORS_PER_PALETTE),
+            "order": np.array(order, dtype=np.int8).reshape(-1, COLORS_PER_PALETTE),
+            "primary": np.array(primary, dtype=np.int8),
+            "uniform": np.array(uniform, dtype=bool),
+        }
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.cache_path)
+        return arrays
+
+    # -- lookups -------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.load().arrays["jobs"])
+
+    def __contains__(self, key):
+        return key in self.load()._jobs
+
+    def jobs(self):
+        return [str(job) for job in self.load().arrays["jobs"]]
+
+    def _job(self, key):
+        self.load()
+        if key not in self._jobs:
+            raise KeyError(f"No section mapping for {key!r}")
+        return self._jobs[key]
+
+    def rows(self, key):
+        """Section row range of a job, given its job name, sprite file or relative path."""
+        job = self._job(key)
+        first = self.arrays["first"]
+        return range(int(first[job]), int(first[job + 1]))
+
+    def sprites(self, key):
+        """Sprite files the job's sections apply to."""
+        job = self._job(key)
+        return [str(s) for s in self.arrays["sprites"][self.arrays["sprite_jobs"] == job]]
+
+    def sections(self, key):
+        """Section names of a job, in file order."""
+        return [str(n) for n in self.load().arrays["section_names"][self.rows(key)]]
+
+    def masks(self, key):
+        """(sections, 16) bool index masks of a job, in file order."""
+        rows = self.rows(key)
+        return self.arrays["masks"][rows.start:rows.stop]
+
+    def _row(self, key, section):
+        rows = self.rows(key)
+        names = self.arrays["section_names"][rows.start:rows.stop]
+        hits = np.flatnonzero(names == section)
+        if len(hits) == 0:
+            raise KeyError(f"{key}: no section {section!r}")
+        return rows.start + int(hits[0])
+
+    def ramp(self, key, section):
+        """(indices, roles) of one section in JSON (ramp) order."""
+        row = self._row(key, section)
+        order = self.arrays["order"][row]
+        indices = np.flatnonzero(order >= 0)
+        indices = indices[np.argsort(order[indices])]
+        return [int(i) for i in indices], [ROLES[self.arrays["ramps"][row, i]] for i in indices]
+
+    def role_indices(self, key, section, *roles):
+        """Indices of `section` holding any of `roles`, ascending."""
+        row = self._row(key, section)
+        codes = [ROLES.index(role) for role in roles]
+        return [int(i) for i in np.flatnonzero(np.isin(self.arrays["ramps"][row], codes))]
+
+    def primary(self, key, section):
+        return int(self.arrays["primary"][self._row(key, section)])
+
+    def index_sets(self, key):
+        """{section name: indices in ramp order} -- the index_sets the theme generators take."""
+        return {name: self.ramp(key, name)[0] for name in self.sections(key)}
+
+
+_TABLE = None
+
+
+def load_sections():
+    """The shared SectionTable for the repo's SectionMappings (loaded once per process)."""
+    global _TABLE
+    if _TABLE is None:
+        _TABLE = SectionTable().load()
+    return _TABLE
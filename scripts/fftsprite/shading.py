@@ -0,0 +1,145 @@
+"""
+Vectorized HSV shading for palette blocks.
+
+`rgb_to_hsv` / `hsv_to_rgb` are array versions of the colorsys functions, using
+the same float operations in the same order so results match colorsys
+bit-for-bit. `shade_indices` is IndexBasedThemeGenerator's preserve-shading
+remap over a whole block: the brightness of every targeted index is read at
+once, mapped into the target color's value range, and converted back to
+BGR555 in one array expression. Passing an (N, 3) array of target colors
+shades N candidate blocks in the same call.
+
+Indices are flat positions in the 256-color block (palette * 16 + color),
+which is how the theme generators address them. `shade_slots` runs the same
+remap over several index groups at once -- typically one row per palette from
+`palette_slots` -- so a theme lands on player and enemy palettes in one call.
+"""
+
+import numpy as np
+
+from .codec import PALETTE_COUNT, COLORS_PER_PALETTE, bgr555_to_rgb, rgb_to_bgr555
+
+BLOCK_COLORS = PALETTE_COUNT * COLORS_PER_PALETTE
+THEMED_PALETTES = 8     # player 0-4 and enemy 5-7; palettes 8-15 are portraits
+
+
+def rgb_to_hsv(rgb):
+    """(..., 3) RGB floats in 0..1 -> (..., 3) HSV, as colorsys.rgb_to_hsv."""
+    rgb = np.asarray(rgb, dtype=np.float64)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    rangec = maxc - minc
+    grey = rangec == 0
+    safe_max = np.where(maxc == 0, 1.0, maxc)
+    safe_range = np.where(grey, 1.0, rangec)
+    s = np.where(grey, 0.0, rangec / safe_max)
+    rc = (maxc - r) / safe_range
+    gc = (maxc - g) / safe_range
+    bc = (maxc - b) / safe_range
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = np.where(grey, 0.0, np.mod(h / 6.0, 1.0))
+    return np.stack([h, s, maxc], axis=-1)
+
+
+def hsv_to_rgb(h, s, v):
+    """HSV arrays (broadcast together) -> (..., 3) RGB floats, as colorsys.hsv_to_rgb."""
+    h, s, v = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (h, s, v)))
+    i = (h * 6.0).astype(np.int64)      # int() truncation; h is never negative here
+    f = (h * 6.0) - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i % 6
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    rgb = np.stack([r, g, b], axis=-1)
+    return np.where((s == 0.0)[..., None], v[..., None], rgb)
+
+
+def shade_indices(words, indices, targets, preserve_shading=True):
+    """Recolor `indices` of BGR555 palette block(s) toward target color(s).
+
+    words:    (..., 256) uint16 blocks
+    indices:  flat color indices; any >= 256 count as black when measuring
+              brightness but are never written (the scalar code's behavior)
+    targets:  (..., 3) RGB; batch dims broadcast against those of `words`, so
+              one block with (N, 3) targets gives N candidates and (N, 256)
+              blocks with (N, 3) targets shade each block toward its own color
+
+    With preserve_shading each index keeps its relative brightness: its
+    value is rescaled into target_v * [0.3, 1.0] across the set. Without it
+    every index gets the flat target color.
+    """
+    indices = np.unique(np.asarray(list(indices), dtype=np.int64))
+    return shade_slots(words, indices[None, :], targets, preserve_shading)
+
+
+def palette_slots(indices, palettes):
+    """(len(palettes), K) flat slots: each palette's base (palette * 16) + indices.
+
+    palettes=[0] alone takes a flat index set as it is: the generators'
+    ITEM_INDICES sets run up to 62, into palettes 1-3, exactly as
+    transform_indices writes them. Any other selection gives each palette
+    only its own colors 0-15, so an index set that would spill into another
+    palette, or a palette above the themed ones (0-7; 8-15 are portraits),
+    raises ValueError instead of recoloring palettes nobody selected.
+    """
+    indices = np.unique(np.asarray(list(indices), dtype=np.int64))
+    palettes = np.asarray(list(palettes), dtype=np.int64)
+    if palettes.tolist() != [0]:
+        if np.any((palettes < 0) | (palettes >= THEMED_PALETTES)):
+            raise ValueError(f"palettes {palettes.tolist()} outside the themed palettes 0-{THEMED_PALETTES - 1}")
+        spill = indices[(indices < 0) | (indices >= COLORS_PER_PALETTE)]
+        if len(spill):
+            raise ValueError(f"indices {spill.tolist()} run past one palette; with several palettes "
+                             f"every index must be 0-{COLORS_PER_PALETTE - 1}")
+    return palettes[:, None] * COLORS_PER_PALETTE + indices[None, :]
+
+
+def shade_slots(words, slots, targets, preserve_shading=True):
+    """shade_indices for several index groups of one block at once.
+
+    slots is a (G, K) array of flat indices (see palette_slots); each row is
+    shaded as its own set, with its own brightness range, and all rows read
+    the unmodified input. Where rows overlap the last row's write wins, as
+    in the sequential per-palette loops. Targets broadcast as in
+    shade_indices and are shared by every row.
+    """
+    words = np.asarray(words, dtype=np.uint16)
+    targets = np.asarray(targets, dtype=np.int64)
+    slots = np.asarray(slots, dtype=np.int64)
+    batch = np.broadcast_shapes(words.shape[:-1], targets.shape[:-1])
+    out = np.broadcast_to(words, batch + (BLOCK_COLORS,)).copy()
+
+    flat = slots.ravel()
+    inside = flat < BLOCK_COLORS
+    if not inside.any():
+        return out
+    # Last write wins where groups overlap: keep the final occurrence of each slot.
+    _, last = np.unique(flat[::-1], return_index=True)
+    keep = np.zeros(len(flat), dtype=bool)
+    keep[len(flat) - 1 - last] = True
+    keep &= inside
+
+    if not preserve_shading:
+        out[..., flat[keep]] = rgb_to_bgr555(targets, "shift")[..., None]
+        return out
+
+    target_hsv = rgb_to_hsv(targets / 255)[..., None, None, :]
+
+    # Original brightness of every slot: V = max channel / 255, black outside the block.
+    v = np.zeros(words.shape[:-1] + slots.shape)
+    v[..., inside.reshape(slots.shape)] = \
+        bgr555_to_rgb(words[..., flat[inside]], "shift").max(axis=-1) / 255
+    min_v = v.min(axis=-1, keepdims=True)
+    max_v = v.max(axis=-1, keepdims=True)
+    v_range = np.where(max_v > min_v, max_v - min_v, 0.1)
+    relative = (v - min_v) / v_range
+
+    new_v = target_hsv[..., 2] * (0.3 + 0.7 * relative)
+    rgb = hsv_to_rgb(target_hsv[..., 0], target_hsv[..., 1], new_v)
+    shaded = rgb_to_bgr555((rgb * 255).astype(np.int64), "shift")
+    out[..., flat[keep]] = shaded.reshape(shaded.shape[:-2] + (-1,))[..., keep]
+    return out
@@ -0,0 +1,201 @@
+"""
+Content-addressed store for the sprites_* theme directories.
+
+Almost every themed bin shares its pixel body with the matching bin in every
+other theme; only the 512-byte palette block differs. The store keeps:
+
+    <store>/bodies/<ab>/<hash>.bin   each unique pixel body once (hash = blake2b-128)
+    <store>/palettes.bin             each unique 512-byte palette block once, concatenated
+    <store>/manifest.json            theme -> sprite file -> (body hash, palette slot)
+
+and can re-materialize any theme directory byte-for-byte from those records.
+Re-adding a theme leaves its old bodies and palette blocks behind; gc() drops
+every object no manifest record references.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .codec import PALETTE_BYTES
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class SpriteStore:
+    """Deduplicated storage of theme directories (pixel bodies + palette records)."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.body_dir = self.root / "bodies"
+        self.palette_path = self.root / "palettes.bin"
+        self.manifest_path = self.root / "manifest.json"
+
+        self.themes = {}
+        self._palettes = []          # unique palette blocks, slot order
+        self._palette_slots = {}     # block -> slot
+        self._new_palettes = 0       # slots not yet flushed to palettes.bin
+
+        if self.manifest_path.exists():
+            self._load()
+
+    # -- persistence -------------------------------------------------------
+
+    def _load(self):
+        manifest = json.loads(self.manifest_path.read_text())
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported store manifest version: {manifest.get('version')}")
+        self.themes = manifest["themes"]
+
+        blob = self.palette_path.read_bytes() if self.palette_path.exists() else b""
+        if len(blob) != manifest["palette_count"] * PALETTE_BYTES:
+            raise ValueError(f"{self.palette_path} does not match manifest palette_count")
+        for slot in range(manifest["palette_count"]):
+            block = blob[slot * PALETTE_BYTES:(slot + 1) * PALETTE_BYTES]
+            self._palettes.append(block)
+            self._palette_slots[block] = slot
+
+    def save(self):
+        """Flush new palette records and the manifest."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        if self._new_palettes:
+            with open(self.palette_path, "ab") as f:
+                for block in self._palettes[-self._new_palettes:]:
+                    f.write(block)
+            self._new_palettes = 0
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "palette_count": len(self._palettes),
+            "themes": self.themes,
+        }
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+        os.replace(tmp, self.manifest_path)
+
+    # -- records -----------------------------------------------------------
+
+    def _body_path(self, digest):
+        return self.body_dir / digest[:2] / f"{digest}.bin"
+
+    def _put_body(self, body):
+        digest = content_hash(body)
+        path = self._body_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        return digest
+
+    def _put_palette(self, block):
+        slot = self._palette_slots.get(block)
+        if slot is None:
+            slot = len(self._palettes)
+            self._palettes.append(block)
+            self._palette_slots[block] = slot
+            self._new_palettes += 1
+        return slot
+
+    def add_file(self, theme, path):
+        """Ingest one sprite bin into `theme`. Files too small for a palette are stored whole."""
+        data = Path(path).read_bytes()
+        if len(data) >= PALETTE_BYTES:
+            record = {"palette": self._put_palette(data[:PALETTE_BYTES]),
+                      "body": self._put_body(data[PALETTE_BYTES:])}
+        else:
+            record = {"palette": None, "body": self._put_body(data)}
+        self.themes.setdefault(theme, {})[Path(path).name] = record
+        return record
+
+    def add_theme(self, theme_dir):
+        """Ingest every .bin in a theme directory, replacing any previous record of it."""
+        theme_dir = Path(theme_dir)
+        self.themes[theme_dir.name] = {}
+        for sprite in sorted(theme_dir.glob("*.bin")):
+            self.add_file(theme_dir.name, sprite)
+        return len(self.themes[theme_dir.name])
+
+    def file_bytes(self, theme, filename):
+        record = self.themes[theme][filename]
+        body = self._body_path(record["body"]).read_bytes()
+        if record["palette"] is None:
+            return body
+        return self._palettes[record["palette"]] + body
+
+    def materialize(self, theme, target_dir):
+        """Write `theme` back out as a directory of sprite bins. Returns the file count."""
+        if theme not in self.themes:
+            raise KeyError(f"Theme not in store: {theme}")
+        target_dir = Path(target_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for filename in self.themes[theme]:
+            (target_dir / filename).write_bytes(self.file_bytes(theme, filename))
+        return len(self.themes[theme])
+
+    def verify_theme(self, theme, theme_dir):
+        """Compare a theme directory against the store. Returns a list of mismatch messages."""
+        theme_dir = Path(theme_dir)
+        problems = []
+        recorded = self.themes.get(theme, {})
+        on_disk = {p.name for p in theme_dir.glob("*.bin")}
+        for name in sorted(on_disk - set(recorded)):
+            problems.append(f"{theme}/{name}: not in store")
+        for name in sorted(set(recorded) - on_disk):
+            problems.append(f"{theme}/{name}: missing on disk")
+        for name in sorted(on_disk & set(recorded)):
+            if (theme_dir / name).read_bytes() != self.file_bytes(theme, name):
+                problems.append(f"{theme}/{name}: content differs")
+        return problems
+
+    def gc(self):
+        """Delete bodies and palette blocks no theme references, then save.
+
+        Palette slots are renumbered and palettes.bin is rewritten. Returns
+        (bodies removed, palettes removed, bytes freed).
+        """
+        records = [r for files in self.themes.values() for r in files.values()]
+        live_bodies = {r["body"] for r in records}
+        live_slots = sorted({r["palette"] for r in records if r["palette"] is not None})
+
+        removed_bodies, freed = 0, 0
+        if self.body_dir.exists():
+            for path in self.body_dir.glob("*/*.bin"):
+                if path.stem not in live_bodies:
+                    freed += path.stat().st_size
+                    path.unlink()
+                    removed_bodies += 1
+
+        removed_palettes = len(self._palettes) - len(live_slots)
+        if removed_palettes:
+            remap = {old: new for new, old in enumerate(live_slots)}
+            for record in records:
+                if record["palette"] is not None:
+                    record["palette"] = remap[record["palette"]]
+            self._palettes = [self._palettes[slot] for slot in live_slots]
+            self._palette_slots = {block: slot for slot, block in enumerate(self._palettes)}
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.palette_path.with_suffix(".bin.tmp")
+            tmp.write_bytes(b"".join(self._palettes))
+            os.replace(tmp, self.palette_path)
+            self._new_palettes = 0
+            freed += removed_palettes * PALETTE_BYTES
+        self.save()
+        return removed_bodies, removed_palettes, freed
+
+    def stats(self):
+        bodies = list(self.body_dir.glob("*/*.bin")) if self.body_dir.exists() else []
+        files = sum(len(t) for t in self.themes.values())
+        return {
+            "themes": len(self.themes),
+            "files": files,
+            "unique_bodies": len(bodies),
+            "body_bytes": sum(p.stat().st_size for p in bodies),
+            "unique_palettes": len(self._palettes),
+            "palette_bytes": len(self._palettes) * PALETTE_BYTES,
+        }
@@ -0,0 +1,63 @@
+"""
+Vectorized codec for FFT IVC TEX sheets (system/ffto/g2d/tex_NNN.bin).
+
+TEX layout:
+    bytes 0..0x7FF  header, carried through untouched
+    bytes 0x800..   4-bit indexed pixels, 512-wide sheet,
+                    HIGH nibble = first pixel of a byte, low nibble = second
+                    (the opposite of the unit sprite bins)
+
+The file is viewed as a NumPy uint8 buffer and unpacked/packed with vectorized
+shifts, so a whole sheet decodes to a (rows, 512) index array in one pass and
+encodes back to the exact original bytes.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .codec import unpack_nibbles, pack_nibbles
+
+TEX_HEADER_BYTES = 0x800
+TEX_WIDTH = 512
+TEX_ROW_BYTES = TEX_WIDTH // 2
+
+
+@dataclass
+class TexSheet:
+    """A decoded TEX file: header plus pixel index sheet."""
+
+    header: bytes          # the 0x800-byte header
+    indices: np.ndarray    # (rows, 512) uint8
+    tail: bytes = b""      # bytes past the last whole row (normally empty)
+
+    @property
+    def height(self):
+        return self.indices.shape[0]
+
+
+def decode_tex(data):
+    """Decode TEX bytes (or any buffer) into a TexSheet."""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if buf.size < TEX_HEADER_BYTES:
+        raise ValueError(f"TEX data too small ({buf.size} bytes) to hold the header")
+    body = buf[TEX_HEADER_BYTES:]
+    height = body.size // TEX_ROW_BYTES
+    whole = height * TEX_ROW_BYTES
+    indices = unpack_nibbles(body[:whole], low_first=False).reshape(height, TEX_WIDTH)
+    return TexSheet(buf[:TEX_HEADER_BYTES].tobytes(), indices, body[whole:].tobytes())
+
+
+def encode_tex(sheet):
+    """Encode a TexSheet back into the exact on-disk byte layout."""
+    return sheet.header + pack_nibbles(sheet.indices, low_first=False) + sheet.tail
+
+
+def load_tex(path):
+    """Map a TEX file read-only and decode it."""
+    return decode_tex(np.memmap(path, dtype=np.uint8, mode='r'))
+
+
+def save_tex(path, sheet):
+    Path(path).write_bytes(encode_tex(sheet))
@@ -3,14 +3,98 @@
 Fix enemy palettes (5-7) in FFT sprite files.
 These palettes are black (all zeros) in the original files, causing enemies to appear black.
 This script populates them with appropriate enemy color variations.
+
+Per-job mode fixes one job class across a few themes, file by file. Bulk mode
+(--all) loads the palette blocks of every bin under every sprites_* directory
+into one (files, 16, 16) uint16 array, finds black palettes with a single
+vectorized reduction, applies the repair to the whole array at once and writes
+back only the changed palette bytes of the files that changed.
+
+The "darken" and "original" methods take enemy palettes from the matching
+sprites_original bin. Those palette blocks are indexed once into
+.palette_cache/original_palettes.npy (memory-mapped on load) with a JSON
+sidecar of file names, sizes and mtimes; the index is rebuilt only when
+sprites_original changes, so a repair run reads each original at most once.
 """
 
 import argparse
+import json
 import os
 import shutil
 import struct
+import time
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import fftsprite
+
+class OriginalPaletteIndex:
+    """Palettes 0-15 of every sprites_original bin, persisted as one (files, 16, 16) .npy."""
+
+    FORMAT = 1
+
+    def __init__(self, original_dir: Path, cache_dir: Path):
+        self.original_dir = original_dir
+        self.array_path = cache_dir / "original_palettes.npy"
+        self.meta_path = cache_dir / "original_palettes.json"
+        self.blocks = None
+        self.rows: Dict[str, int] = {}
+        self.reads = 0     # original bins read to (re)build the index
+        self.cached = False
+
+    def _fingerprint(self) -> List[list]:
+        stats = []
+        for path in sorted(self.original_dir.glob("*.bin")):
+            st = path.stat()
+            stats.append([path.name, st.st_size, st.st_mtime_ns])
+        return stats
+
+    def load(self) -> "OriginalPaletteIndex":
+        """Map the cached index if it matches sprites_original, otherwise rebuild it."""
+        if self.blocks is not None:
+            return self
+        files = self._fingerprint()
+        try:
+            meta = json.loads(self.meta_path.read_text())
+            if meta.get("format") == self.FORMAT and meta.get("files") == files:
+                self.blocks = np.load(self.array_path, mmap_mode='r')
+                self.cached = True
+        except (OSError, ValueError):
+            pass
+        if self.blocks is None:
+            self.blocks = self._build(files)
+        self.rows = {name: i for i, (name, _, _) in enumerate(files)}
+        return self
+
+    def _build(self, files: List[list]) -> np.ndarray:
+        raw = np.empty((len(files), fftsprite.PALETTE_BYTES), dtype=np.uint8)
+        for i, (name, _, _) in enumerate(files):
+            raw[i] = np.frombuffer(fftsprite.read_palette_block(self.original_dir / name), dtype=np.uint8)
+        self.reads += len(files)
+        blocks = raw.view('<u2').reshape(len(files), fftsprite.PALETTE_COUNT,
+                                         fftsprite.COLORS_PER_PALETTE).astype(np.uint16)
+
+        self.array_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.array_path.with_suffix(".tmp.npy")
+        np.save(tmp, blocks)
+        os.replace(tmp, self.array_path)
+        self.meta_path.write_text(json.dumps({"format": self.FORMAT, "files": files}))
+        return blocks
+
+    def __len__(self) -> int:
+        return len(self.load().rows)
+
+    def row(self, sprite_file: str) -> int:
+        """Index row of `sprite_file`, or -1 if sprites_original has no such bin."""
+        return self.load().rows.get(sprite_file, -1)
+
+    def palettes(self, sprite_file: str) -> Optional[np.ndarray]:
+        """(16, 16) BGR555 palettes of the original `sprite_file`, or None."""
+        row = self.row(sprite_file)
+        return None if row < 0 else self.blocks[row]
+
 
 class EnemyPaletteFixer:
     """Fix black enemy palettes in FFT sprite files."""
@@ -19,10 +103,57 @@ class EnemyPaletteFixer:
     COLORS_PER_PALETTE = 16
     BYTES_PER_COLOR = 2
 
+    # Job classes that can have job-specific themes (e.g. monk_shadow_assassin)
+    JOB_CLASSES = ['knight', 'monk', 'archer', 'squire', 'chemist', 'thief',
+                   'ninja', 'samurai', 'dragoon', 'geomancer', 'mediator',
+                   'timemage', 'bard', 'dancer', 'calculator', 'mime']
+
+    # Fallback enemy palettes 1-4 (approximations of standard FFT enemy colors)
+    FALLBACK_ENEMY_PALETTES = {
+        # Palette 1: Blue team variant (like in original)
+        1: [
+            (0, 0, 0),  # Transparency
+            (40, 40, 32), (224, 216, 208),  # Base colors
+            (40, 56, 80), (56, 80, 104), (72, 104, 128),  # Blue armor
+            (96, 136, 160), (72, 64, 56), (112, 96, 80),  # More blue
+            (136, 120, 96), (88, 48, 24), (136, 80, 32),  # Browns
+            (176, 112, 64), (112, 72, 32), (184, 120, 80), (232, 168, 120)  # Hair/skin
+        ],
+        # Palette 2: Red team variant (common enemy color)
+        2: [
+            (0, 0, 0),  # Transparency
+            (40, 40, 32), (224, 216, 208),  # Base colors
+            (40, 48, 48), (48, 56, 56), (56, 64, 64),  # Dark armor
+            (64, 72, 72), (96, 48, 32), (152, 48, 32),  # Red armor
+            (192, 56, 32), (80, 64, 32), (144, 104, 56),  # More red
+            (208, 144, 80), (104, 64, 40), (160, 104, 72), (216, 144, 104)  # Hair/skin
+        ],
+        # Palette 3: Green team variant
+        3: [
+            (0, 0, 0),  # Transparency
+            (40, 40, 32), (224, 216, 208),  # Base colors
+            (48, 56, 32), (64, 80, 40), (96, 112, 48),  # Green armor
+            (128, 144, 56), (56, 64, 72), (80, 96, 120),  # More green
+            (104, 128, 136), (88, 56, 32), (136, 80, 32),  # Browns
+            (176, 112, 48), (96, 64, 32), (136, 96, 56), (184, 128, 88)  # Hair/skin
+        ],
+        # Palette 4: Purple team variant
+        4: [
+            (0, 0, 0),  # Transparency
+            (40, 40, 32), (224, 216, 208),  # Base colors
+            (72, 48, 64), (88, 64, 96), (112, 88, 136),  # Purple armor
+            (136, 112, 176), (96, 104, 112), (144, 152, 160),  # More purple
+            (200, 208, 208), (88, 64, 48), (152, 96, 48),  # Light purple
+            (224, 136, 48), (104, 64, 48), (160, 104, 80), (216, 152, 112)  # Hair/skin
+        ],
+    }
+
     def __init__(self, base_dir: Path = Path(".")):
         """Initialize the fixer."""
         self.base_dir = base_dir
         self.sprite_dir = base_dir / "ColorMod" / "FFTIVC" / "data" / "enhanced" / "fftpack" / "unit"
+        self.original_index = OriginalPaletteIndex(self.sprite_dir / "sprites_original",
+                                                   base_dir / ".palette_cache")
 
     def read_sprite(self, sprite_path: Path) -> bytearray:
         """Read entire sprite file."""
@@ -74,6 +205,18 @@ class EnemyPaletteFixer:
             if offset + 1 < len(sprite_data):
                 struct.pack_into('<H', sprite_data, offset, color_value)
 
+    def copy_original_palettes(self, sprite_data: bytearray, sprite_file: Optional[str],
+                               palettes=range(1, 5)) -> bool:
+        """Copy enemy palettes from the indexed original of `sprite_file`; False if there is none."""
+        original = self.original_index.palettes(sprite_file) if sprite_file else None
+        if original is None:
+            return False
+        for palette_idx in palettes:
+            start_offset = palette_idx * self.COLORS_PER_PALETTE * self.BYTES_PER_COLOR
+            end_offset = start_offset + self.COLORS_PER_PALETTE * self.BYTES_PER_COLOR
+            sprite_data[start_offset:end_offset] = (original[palette_idx] & 0x7FFF).astype('<u2').tobytes()
+        return True
+
     def darken_color(self, color: Tuple[int, int, int], factor: float) -> Tuple[int, int, int]:
         """Darken a color by a factor (0.0 = black, 1.0 = original)."""
         r, g, b = color
@@ -92,6 +235,10 @@ class EnemyPaletteFixer:
         r, g, b = colorsys.hsv_to_rgb(h, s, v)
         return (int(r * 255), int(g * 255), int(b * 255))
 
+    def is_job_theme(self, theme_name: Optional[str]) -> bool:
+        """Job-specific themes are named jobclass_themename (e.g. monk_shadow_assassin)."""
+        return bool(theme_name) and any(theme_name.startswith(job + '_') for job in self.JOB_CLASSES)
+
     def check_palette_status(self, sprite_data: bytearray) -> dict:
         """Check if palettes are black (corrupted)."""
         status = {}
@@ -122,7 +269,6 @@ class EnemyPaletteFixer:
         result = sprite_data.copy()
 
         # Check which palettes need fixing
-        palette1 = self.get_palette(result, 1)
         palette2 = self.get_palette(result, 2)
         palette3 = self.get_palette(result, 3)
         palette4 = self.get_palette(result, 4)
@@ -141,62 +287,11 @@ class EnemyPaletteFixer:
                 # Fix palettes 1-4 for job-specific themes
                 # Use ORIGINAL enemy colors, not variations of the player theme!
 
-                # Read original palettes from the sprites_original directory if available
-                original_path = sprite_path.replace(f"sprites_{theme_name}", "sprites_original") if hasattr(self, 'current_sprite_path') else None
-
-                if original_path and Path(original_path).exists():
-                    # Load original sprite to get proper enemy palettes
-                    original_data = self.read_sprite(Path(original_path))
-                    for palette_idx in range(1, 5):
-                        original_palette = self.get_palette(original_data, palette_idx)
-                        self.set_palette(result, palette_idx, original_palette)
-                else:
+                # Original palettes from the sprites_original index if available
+                if not self.copy_original_palettes(result, sprite_file):
                     # Fallback: Create standard enemy colors manually
-                    # These are approximations of standard FFT enemy colors
-
-                    # Palette 1: Blue team variant (like in original)
-                    palette1 = [
-                        (0, 0, 0),  # Transparency
-                        (40, 40, 32), (224, 216, 208),  # Base colors
-                        (40, 56, 80), (56, 80, 104), (72, 104, 128),  # Blue armor
-                        (96, 136, 160), (72, 64, 56), (112, 96, 80),  # More blue
-                        (136, 120, 96), (88, 48, 24), (136, 80, 32),  # Browns
-                        (176, 112, 64), (112, 72, 32), (184, 120, 80), (232, 168, 120)  # Hair/skin
-                    ]
-                    self.set_palette(result, 1, palette1[:16])  # Only use first 16 colors
-
-                    # Palette 2: Red team variant (common enemy color)
-                    palette2 = [
-                        (0, 0, 0),  # Transparency
-                        (40, 40, 32), (224, 216, 208),  # Base colors
-                        (40, 48, 48), (48, 56, 56), (56, 64, 64),  # Dark armor
-                        (64, 72, 72), (96, 48, 32), (152, 48, 32),  # Red armor
-                        (192, 56, 32), (80, 64, 32), (144, 104, 56),  # More red
-                        (208, 144, 80), (104, 64, 40), (160, 104, 72), (216, 144, 104)  # Hair/skin
-                    ]
-                    self.set_palette(result, 2, palette2[:16])
-
-                    # Palette 3: Green team variant
-                    palette3 = [
-                        (0, 0, 0),  # Transparency
-                        (40, 40, 32), (224, 216, 208),  # Base colors
-                        (48, 56, 32), (64, 80, 40), (96, 112, 48),  # Green armor
-                        (128, 144, 56), (56, 64, 72), (80, 96, 120),  # More green
-                        (104, 128, 136), (88, 56, 32), (136, 80, 32),  # Browns
-                        (176, 112, 48), (96, 64, 32), (136, 96, 56), (184, 128, 88)  # Hair/skin
-                    ]
-                    self.set_palette(result, 3, palette3[:16])
-
-                    # Palette 4: Purple team variant
-                    palette4 = [
-                        (0, 0, 0),  # Transparency
-                        (40, 40, 32), (224, 216, 208),  # Base colors
-                        (72, 48, 64), (88, 64, 96), (112, 88, 136),  # Purple armor
-                        (136, 112, 176), (96, 104, 112), (144, 152, 160),  # More purple
-                        (200, 208, 208), (88, 64, 48), (152, 96, 48),  # Light purple
-                        (224, 136, 48), (104, 64, 48), (160, 104, 80), (216, 152, 112)  # Hair/skin
-                    ]
-                    self.set_palette(result, 4, palette4[:16])
+                    for palette_idx, colors in self.FALLBACK_ENEMY_PALETTES.items():
+                        self.set_palette(result, palette_idx, colors)
 
             else:
                 # Fix palettes 5-7 for generic themes (original code)
@@ -221,36 +316,17 @@ class EnemyPaletteFixer:
             # This ensures we get standard enemy colors, not custom theme colors
             # Job-specific themes have format: jobclass_themename (e.g., monk_shadow_assassin)
 
-            # List of all job classes that can have job-specific themes
-            job_classes = ['knight', 'monk', 'archer', 'squire', 'chemist', 'thief',
-                          'ninja', 'samurai', 'dragoon', 'geomancer', 'mediator',
-                          'timemage', 'bard', 'dancer', 'calculator', 'mime']
-
             # Check if this is a job-specific theme (starts with a job class name)
-            is_job_theme = False
-            if theme_name:
-                for job in job_classes:
-                    if theme_name.startswith(job + '_'):
-                        is_job_theme = True
-                        break
+            is_job_theme = self.is_job_theme(theme_name)
 
             if sprite_file and (is_job_specific or is_job_theme):
-                # Get the original sprite path
-                original_dir = self.sprite_dir / "sprites_original"
-                original_sprite = original_dir / sprite_file
-
-                if original_sprite.exists():
-                    # Read the original sprite
-                    original_data = self.read_sprite(original_sprite)
-
-                    # ALWAYS copy palettes 1-4 from original (force standard enemy colors)
-                    for palette_idx in range(1, 5):
-                        original_palette = self.get_palette(original_data, palette_idx)
-                        self.set_palette(result, palette_idx, original_palette)
+                # ALWAYS copy palettes 1-4 from original (force standard enemy colors)
+                if self.copy_original_palettes(result, sprite_file):
                     print(f"     [OK] Copied standard enemy palettes from original")
                 else:
                     # Fallback to manual colors if original not found
-                    print(f"     [WARNING] Original sprite not found: {original_sprite}")
+                    print(f"     [WARNING] Original sprite not found: "
+                          f"{self.original_index.original_dir / sprite_file}")
                     # Use the manual palette fallback from above
                     return self.fix_enemy_palettes(sprite_data, "custom", sprite_file, theme_name)
 
@@ -307,6 +383,133 @@ class EnemyPaletteFixer:
 
         return result
 
+    # -- bulk mode: every sprites_* directory as one palette array -----------
+
+    def theme_sprite_paths(self) -> List[Path]:
+        """Every sprite bin under every sprites_* theme directory except sprites_original."""
+        return sorted(p for p in self.sprite_dir.glob("sprites_*/*.bin")
+                      if p.parent.name != "sprites_original")
+
+    def load_palette_blocks(self, paths: List[Path]) -> np.ndarray:
+        """Palette blocks of `paths` as one (files, 16, 16) uint16 array."""
+        raw = np.empty((len(paths), self.PALETTE_SIZE), dtype=np.uint8)
+        for i, path in enumerate(paths):
+            raw[i] = np.frombuffer(fftsprite.read_palette_block(path), dtype=np.uint8)
+        return raw.view('<u2').reshape(len(paths), fftsprite.PALETTE_COUNT,
+                                       self.COLORS_PER_PALETTE).astype(np.uint16)
+
+    @staticmethod
+    def black_palettes(blocks: np.ndarray) -> np.ndarray:
+        """(files, 16) bool: every color except transparency (index 0) is black."""
+        return ((blocks[..., 1:] & 0x7FFF) == 0).all(axis=-1)
+
+    @staticmethod
+    def _darken_words(words: np.ndarray, factors) -> np.ndarray:
+        """darken_color over (..., palettes, 16) words, one factor per palette; index 0 kept."""
+        rgb = fftsprite.bgr555_to_rgb(words, "shift").astype(np.float64)
+        dark = (rgb * np.asarray(factors)[:, None, None]).astype(np.int32)
+        dark[..., 0, :] = rgb[..., 0, :]
+        return fftsprite.rgb_to_bgr555(dark)
+
+    @staticmethod
+    def _custom_words(palette0: np.ndarray) -> np.ndarray:
+        """The "custom" red / purple / gray enemy palettes for a (files, 16) stack of palette 0."""
+        rgb = fftsprite.bgr555_to_rgb(palette0, "shift").astype(np.int32)
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        armor = np.zeros(16, dtype=bool)
+        armor[3:10] = True
+        armor = armor[:, None]
+        red = np.where(armor, np.stack([np.minimum(255, r + 40), np.maximum(0, g - 20),
+                                        np.maximum(0, b - 20)], axis=-1),
+                       (rgb * 0.8).astype(np.int32))
+        purple = np.where(armor, np.stack([np.minimum(255, r + 20), np.maximum(0, g - 10),
+                                           np.minimum(255, b + 30)], axis=-1),
+                          (rgb * 0.7).astype(np.int32))
+        gray = np.repeat(((r + g + b) / 3 * 0.6).astype(np.int32)[..., None], 3, axis=-1)
+        enemy = np.stack([red, purple, gray], axis=1)
+        enemy[:, :, 0] = rgb[:, None, 0]
+        return fftsprite.rgb_to_bgr555(enemy)
+
+    def repair_blocks(self, blocks: np.ndarray, sprite_files: List[str], theme_names: List[str],
+                      method: str = "original") -> np.ndarray:
+        """fix_enemy_palettes applied to a whole (files, 16, 16) stack at once; returns a repaired copy."""
+        out = blocks.copy()
+        job_specific = self.black_palettes(blocks)[:, 2:5].any(axis=1)
+
+        index = self.original_index
+        if method in ("darken", "original"):
+            source = np.array([index.row(name) for name in sprite_files], dtype=np.int64)
+
+        if method == "darken":
+            fallback = np.array([self.FALLBACK_ENEMY_PALETTES[i] for i in range(1, 5)])
+            copy = job_specific & (source >= 0)
+            out[copy, 1:5] = index.blocks[source[copy], 1:5] & 0x7FFF
+            out[job_specific & (source < 0), 1:5] = fftsprite.rgb_to_bgr555(fallback)
+            generic = ~job_specific
+            out[generic, 5:8] = self._darken_words(blocks[generic, 2:5], (0.7, 0.6, 0.5))
+
+        elif method == "original":
+            job_theme = np.array([self.is_job_theme(t) for t in theme_names], dtype=bool)
+            need = job_specific | job_theme
+            copy = need & (source >= 0)
+            out[copy, 1:5] = index.blocks[source[copy], 1:5] & 0x7FFF
+            missing = need & (source < 0)
+            if missing.any():
+                print(f"  [WARNING] {int(missing.sum())} sprites have no original; using custom colors")
+                rows = np.nonzero(missing)[0]
+                out[rows] = self.repair_blocks(blocks[rows], [sprite_files[i] for i in rows],
+                                               [theme_names[i] for i in rows], "custom")
+
+        elif method == "copy":
+            out[:, 5:8] = blocks[:, 2:5] & 0x7FFF
+
+        elif method == "custom":
+            out[:, 5:8] = self._custom_words(blocks[:, 0])
+
+        return out
+
+    def write_palette_changes(self, paths: List[Path], before: np.ndarray, after: np.ndarray,
+                              backup: bool = True) -> int:
+        """Write back only the changed span of each changed palette block; returns files written."""
+        changed = (before != after).reshape(len(paths), -1)
+        rows = np.nonzero(changed.any(axis=1))[0]
+        for i in rows:
+            colors = np.nonzero(changed[i])[0]
+            first, last = colors[0], colors[-1] + 1
+            if backup:
+                backup_path = paths[i].with_suffix('.bin.bak')
+                if not backup_path.exists():
+                    shutil.copy2(paths[i], backup_path)
+            with open(paths[i], 'r+b') as f:
+                f.seek(int(first) * self.BYTES_PER_COLOR)
+                f.write(after[i].reshape(-1)[first:last].astype('<u2').tobytes())
+        return len(rows)
+
+    def fix_all(self, method: str = "original", backup: bool = True, check_only: bool = False) -> None:
+        """Check or fix every sprite bin in every theme directory in one vectorized pass."""
+        start = time.perf_counter()
+        paths = self.theme_sprite_paths()
+        blocks = self.load_palette_blocks(paths)
+        black = self.black_palettes(blocks)
+        themes = [p.parent.name[len("sprites_"):] for p in paths]
+        print(f"[SCAN] {len(paths)} sprite files in {len(set(themes))} themes")
+        print("   Black palettes 1-7: " + ", ".join(f"{i}: {int(n)}" for i, n in
+                                                    enumerate(black.sum(axis=0)[1:8], 1)))
+        if check_only:
+            return
+
+        fixed = self.repair_blocks(blocks, [p.name for p in paths], themes, method)
+        index = self.original_index
+        if index.blocks is not None:
+            print(f"   Original palettes: {len(index)} sprites "
+                  + ("(cached index)" if index.cached else f"(index built, {index.reads} reads)"))
+        written = self.write_palette_changes(paths, blocks, fixed, backup)
+        after = self.black_palettes(fixed)
+        print("   After:              " + ", ".join(f"{i}: {int(n)}" for i, n in
+                                                    enumerate(after.sum(axis=0)[1:8], 1)))
+        print(f"\n[DONE] Patched {written} of {len(paths)} sprite files "
+              f"in {time.perf_counter() - start:.2f}s")
+
     def process_sprites(self, job_class: str, themes: List[str], method: str = "darken",
                        backup: bool = True) -> None:
         """
@@ -435,7 +638,9 @@ class EnemyPaletteFixer:
 
 def main():
     parser = argparse.ArgumentParser(description="Fix black enemy palettes in FFT sprites")
-    parser.add_argument("job_class", help="Job class to fix (e.g., knight, monk, squire)")
+    parser.add_argument("job_class", nargs="?", help="Job class to fix (e.g., knight, monk, squire)")
+    parser.add_argument("--all", action="store_true",
+                       help="Bulk mode: every sprite in every sprites_* directory at once")
     parser.add_argument("--themes", nargs="+",
                        help="Themes to process (default: all themes except original)")
     parser.add_argument("--method", choices=["darken", "copy", "custom", "original"], default="original",
@@ -451,6 +656,15 @@ def main():
 
     fixer = EnemyPaletteFixer()
 
+    if args.all:
+        if args.restore:
+            parser.error("--restore works per job class")
+        print(f"[FIX] Bulk enemy palette {'check' if args.check_only else 'fix'} (method: {args.method})")
+        fixer.fix_all(args.method, backup=not args.no_backup, check_only=args.check_only)
+        return
+    if not args.job_class:
+        parser.error("a job class is required unless --all is given")
+
     # Default themes if not specified
     if not args.themes:
         # Get all theme directories except original
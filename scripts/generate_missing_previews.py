@@ -9,6 +9,8 @@ import os
 import sys
 from PIL import Image
 
+import fftsprite
+
 OUTPUT_BASE_DIR = "C:/Users/ptyRa/OneDrive/Desktop/FFT_Palette_Tests/GENERIC_COMBOS"
 EXISTING_THEMES_DIR = "C:/Users/ptyRa/OneDrive/Desktop/FFT_Palette_Tests"
 
@@ -47,63 +49,19 @@ JOBS_TO_GENERATE = [
 ]
 
 def read_palette(data, palette_index=0):
-    """Read a palette from sprite data"""
-    palette_offset = palette_index * 32
-    palette = []
-
-    for i in range(16):
-        offset = palette_offset + (i * 2)
-        if offset + 1 < len(data):
-            color_data = data[offset] | (data[offset + 1] << 8)
-
-            # Extract BGR555 components
-            b = ((color_data >> 10) & 0x1F) * 8
-            g = ((color_data >> 5) & 0x1F) * 8
-            r = (color_data & 0x1F) * 8
-
-            # First color is usually transparent
-            if i == 0:
-                palette.append((r, g, b, 0))
-            else:
-                palette.append((r, g, b, 255))
-        else:
-            palette.append((0, 0, 0, 0))
-
-    return palette
+    """Read a palette from sprite data as a (16, 4) RGBA array (5-bit channels * 8)"""
+    return fftsprite.read_palette_rgba(data, palette_index, mode="shift")
 
 def extract_sprite(data, x_offset, y_offset, width=32, height=40):
     """Extract a sprite from the data"""
     palette = read_palette(data, 0)
 
-    # Create image
-    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    pixels = img.load()
-
-    # The sprite data starts at byte 512
-    sprite_offset = 512
-    bytes_per_row = 128
-
-    for y in range(height):
-        for x in range(width):
-            # Calculate position in sprite sheet
-            sheet_x = x_offset + x
-            sheet_y = y_offset + y
-
-            # Calculate byte position
-            byte_pos = sprite_offset + (sheet_y * bytes_per_row) + (sheet_x // 2)
-
-            if byte_pos < len(data):
-                byte_val = data[byte_pos]
-
-                # Each byte contains 2 pixels (4-bit each)
-                if sheet_x % 2 == 0:
-                    palette_idx = byte_val & 0x0F
-                else:
-                    palette_idx = (byte_val >> 4) & 0x0F
-
-                if palette_idx < len(palette):
-                    pixels[x, y] = palette[palette_idx]
+    # Decode only the rows the sprite covers, then map them through the palette
+    indices = fftsprite.decode_pixels(data, rows=y_offset + height)
+    region = indices[y_offset:y_offset + height, x_offset:x_offset + width]
 
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    img.paste(Image.fromarray(fftsprite.apply_palette(region, palette), 'RGBA'), (0, 0))
     return img
 
 def generate_preview_for_theme(theme_dir, job_name):
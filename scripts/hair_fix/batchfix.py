@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Batch Type B hair-highlight fix: every job in the recipe file, all cores.
+
+Runs steps 1, 2, 4 and 5 of docs/HAIR_HIGHLIGHT_FIX_PROCESS.md for each job
+listed in recipes.json (next to this script). Each file -- tex_N, tex_N+1 and
+the job's HD BMP -- is fixed in its own worker process:
+
+  TEX: hairclassify --blanket pass, persprite --floodfill --all, then the
+       recipe's per-cell touch-up flood-fills
+  BMP: bmphair --remap (with the +8 row offset), then the same flood-fills
+
+Recipe entries are keyed by job name (as in ColorMod/Data/SectionMappings):
+
+  "Knight_Male": {"tex": 1000, "hair": [11, 12, 13], "threshold": 0.75,
+                  "touchups": [{"file": "tex_1000", "cells": [51, 53], "threshold": 0.4}]}
+
+`hair` and `dst` default to the job's hair section in its SectionMappings
+JSON (base/shadow/outline roles; `dst` = the base index). Anything in the
+top-level "defaults" block (src, maxy, frameh, bmp_offset, threshold, ...)
+can be overridden per job. `skip` lists files to leave alone ("tex_993",
+"bmp"); `bmp` names the HD BMP when the glob
+<images-dir>/<Job>/original/*_hd.bmp does not find exactly one. Jobs marked
+"done" (already fixed and deployed) are left out unless named in --jobs.
+
+--tex-dir and --images-dir are required and must hold the toolkit's vanilla
+TEX files and HD BMPs: the deployed copies in ColorMod/ are already fixed for
+the done jobs (and for any job whose TEX pair is already in g2d), and
+running the fix on them again remaps fixed pixels. An input byte-identical
+to such a job's deployed file is refused.
+
+Vanilla inputs are never modified: fixed files go to <out>/<Job>/, and a
+per-cell summary (pixels remapped, cells straycheck still flags) is printed
+and written to <out>/batchfix_summary.json. Review the grids and deploy as
+in steps 3 and 6.
+
+Usage:
+  python batchfix.py --tex-dir DIR --images-dir DIR [--jobs Knight_Male,Archer_Female]
+                     [--recipes recipes.json] [--out working]
+                     [--workers N] [--dry-run]
+"""
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
+import bmphair
+import hairclassify
+import persprite
+import straycheck
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(os.path.dirname(HERE))
+DEPLOYED_TEX_DIR = os.path.join(REPO, 'ColorMod', 'FFTIVC', 'data', 'enhanced', 'system', 'ffto', 'g2d')
+DEPLOYED_IMAGES_DIR = os.path.join(REPO, 'ColorMod', 'Images')
+
+DEFAULTS = {'src': 15, 'maxy': 12, 'frameh': 80, 'bmp_offset': 8, 'threshold': 0.6,
+            'stray_threshold': 0.5, 'min_island': 2}
+HAIR_ROLES = ('base', 'shadow', 'outline')
+
+
+def section_hair(job):
+    """(hair set, base index) from the job's hair section, or (None, None)."""
+    table = fftsprite.load_sections()
+    if job not in table:
+        return None, None
+    for name in table.sections(job):
+        if 'hair' not in name.lower():
+            continue
+        base = table.role_indices(job, name, 'base')
+        return table.role_indices(job, name, *HAIR_ROLES), (base[0] if base else None)
+    return None, None
+
+
+def load_recipes(path, only=None):
+    """Resolve every job of the recipe file into a flat parameter dict."""
+    spec = json.load(open(path))
+    defaults = dict(DEFAULTS, **spec.get('defaults', {}))
+    jobs = spec['jobs']
+    if only:
+        unknown = [j for j in only if j not in jobs]
+        if unknown:
+            raise SystemExit("  no recipe for: %s" % ', '.join(unknown))
+        jobs = {j: jobs[j] for j in only}
+    else:
+        jobs = {j: e for j, e in jobs.items() if not e.get('done')}
+
+    recipes = []
+    for job, entry in jobs.items():
+        r = dict(defaults, **entry)
+        r['job'] = job
+        if 'hair' not in r or 'dst' not in r:
+            hair, base = section_hair(job)
+            r.setdefault('hair', hair)
+            r.setdefault('dst', base)
+        if not r['hair'] or r['dst'] is None:
+            raise SystemExit("  %s: no hair section in SectionMappings -- set \"hair\" and \"dst\"" % job)
+        r.setdefault('skip', [])
+        r.setdefault('touchups', [])
+        recipes.append(r)
+    return recipes
+
+
+def plan(recipes, tex_dir, images_dir, out_dir):
+    """One task per file: (kind, name, src path, out path, recipe)."""
+    tasks = []
+    for r in recipes:
+        job_out = os.path.join(out_dir, r['job'])
+        for n in (r['tex'], r['tex'] + 1):
+            name = 'tex_%d' % n
+            if name not in r['skip']:
+                tasks.append(('tex', name, os.path.join(tex_dir, name + '.bin'),
+                              os.path.join(job_out, name + '.bin'), r))
+        if 'bmp' in r['skip']:
+            continue
+        if 'bmp' in r:
+            bmps = [os.path.join(images_dir, r['job'], 'original', r['bmp'])]
+        else:
+            bmps = sorted(glob.glob(os.path.join(images_dir, r['job'], 'original', '*_hd.bmp')))
+        if len(bmps) != 1:
+            print("  %s: %d HD BMPs found, skipping BMP (set \"bmp\" in the recipe)" % (r['job'], len(bmps)))
+            continue
+        tasks.append(('bmp', 'bmp', bmps[0], os.path.join(job_out, os.path.basename(bmps[0])), r))
+    return tasks
+
+
+def deployed_path(task):
+    """The file a task's output replaces in the mod tree."""
+    kind, name, src_path, out_path, r = task
+    if kind == 'tex':
+        return os.path.join(DEPLOYED_TEX_DIR, name + '.bin')
+    return os.path.join(DEPLOYED_IMAGES_DIR, r['job'], 'original', os.path.basename(src_path))
+
+
+def job_deployed(r):
+    """A job is fixed in the mod tree if marked done or its TEX is shipped in g2d
+    (g2d only carries fixed sheets; vanilla TEX files come from the game)."""
+    return r.get('done') or os.path.exists(os.path.join(DEPLOYED_TEX_DIR, 'tex_%d.bin' % r['tex']))
+
+
+def already_fixed(task):
+    """True if a fixed job's input is byte-identical to its deployed file."""
+    deployed = deployed_path(task)
+    if not job_deployed(task[4]) or not os.path.exists(deployed):
+        return False
+    if os.path.getsize(deployed) != os.path.getsize(task[2]):
+        return False
+    return open(deployed, 'rb').read() == open(task[2], 'rb').read()
+
+
+def stray_cells(g, sprites, r):
+    """Cells straycheck would still flag, with their stray pixel totals."""
+    hair = sorted(r['hair'])
+    flagged = {}
+    for i, bbox in enumerate(sprites):
+        tot = 0
+        for size, bhist in straycheck.islands(g, bbox, r['src']):
+            total = int(bhist.sum())
+            if size >= r['min_island'] and total and int(bhist[hair].sum()) / total >= r['stray_threshold']:
+                tot += size
+        if tot:
+            flagged[i] = tot
+    return flagged
+
+
+def fix_file(task, dry=False):
+    """Run the whole fix on one file; returns its summary dict."""
+    kind, name, src_path, out_path, r = task
+    hair, src, dst = set(r['hair']), r['src'], r['dst']
+
+    if kind == 'tex':
+        sheet = fftsprite.load_tex(src_path)
+        sheet.indices = sheet.indices.copy()    # load_tex maps read-only
+        g, h = sheet.indices, sheet.height
+        original = g.copy()
+        blanket = hairclassify.classify(g, h, hair, src, dst, r['threshold'], 4, False,
+                                        r['maxy'], r['frameh'], True)[0]
+    else:
+        data, g, w, h, pal, pixoff, rowbytes = bmphair.decode_bmp(src_path)
+        original = g.copy()
+        blanket = bmphair.blanket_remap(g, r['maxy'], r['frameh'], r['bmp_offset'], src, dst)[0]
+
+    sprites = persprite.detect_sprites(g, h)
+    flood = 0
+    for bbox in sprites:
+        flood += persprite.floodfill_cell(g, h, bbox, src, dst, hair, r['threshold'])[0]
+    touchup = 0
+    for t in r['touchups']:
+        if t['file'] != name:
+            continue
+        for c in t['cells']:
+            if c < len(sprites):
+                touchup += persprite.floodfill_cell(g, h, sprites[c], src, dst, hair, t['threshold'])[0]
+
+    changed = g != original
+    cells = {}
+    for i, (x0, y0, x1, y1) in enumerate(sprites):
+        n = int(changed[y0:y1 + 1, x0:x1 + 1].sum())
+        if n:
+            cells[i] = n
+
+    if not dry:
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        if kind == 'tex':
+            fftsprite.save_tex(out_path, sheet)
+        else:
+            open(out_path, 'wb').write(bmphair.encode_bmp(data, g, w, h, pixoff, rowbytes))
+
+    return {'job': r['job'], 'file': name, 'src': src_path, 'out': out_path,
+            'sprites': len(sprites), 'blanket': blanket, 'floodfill': flood, 'touchup': touchup,
+            'cells': cells, 'strays': stray_cells(g, sprites, r)}
+
+
+def _run(args):
+    task, dry = args
+    try:
+        return fix_file(task, dry)
+    except Exception as e:
+        kind, name, src_path, out_path, r = task
+        return {'job': r['job'], 'file': name, 'src': src_path, 'error': '%s: %s' % (type(e).__name__, e)}
+
+
+def main():
+    a = sys.argv
+
+    def opt(n, d):
+        return a[a.index(n) + 1] if n in a else d
+
+    if '-h' in a or '--help' in a:
+        print(__doc__)
+        return 0
+    only = [j for j in opt('--jobs', '').split(',') if j.strip()]
+    recipes = load_recipes(opt('--recipes', os.path.join(HERE, 'recipes.json')), only)
+    out_dir = opt('--out', 'working')
+    workers = int(opt('--workers', '0')) or os.cpu_count() or 1
+    dry = '--dry-run' in a
+
+    tex_dir, images_dir = opt('--tex-dir', None), opt('--images-dir', None)
+    if not tex_dir or not images_dir:
+        print("  --tex-dir and --images-dir are required: point them at the toolkit's vanilla")
+        print("  TEX files and HD BMPs (the copies under ColorMod/ are already fixed)")
+        return 1
+
+    tasks = plan(recipes, tex_dir, images_dir, out_dir)
+    missing = [t for t in tasks if not os.path.exists(t[2])]
+    for t in missing:
+        print("  %s %s: %s not found, skipping" % (t[4]['job'], t[1], t[2]))
+    tasks = [t for t in tasks if t not in missing]
+    fixed = [t for t in tasks if already_fixed(t)]
+    for t in fixed:
+        print("  %s %s: %s is the deployed, already-fixed file -- use the vanilla source" %
+              (t[4]['job'], t[1], t[2]))
+    if fixed:
+        return 1
+    if not tasks:
+        print("  nothing to do")
+        return 1
+
+    print("  %d files from %d jobs on %d workers%s" %
+          (len(tasks), len(recipes), min(workers, len(tasks)), ' (dry run)' if dry else ''))
+    if workers <= 1:
+        results = [_run((t, dry)) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_run, [(t, dry) for t in tasks]))
+
+    failed = 0
+    job = None
+    for res in results:
+        if res['job'] != job:
+            job = res['job']
+            print("\n  %s" % job)
+        if 'error' in res:
+            failed += 1
+            print("    %-9s ERROR %s" % (res['file'], res['error']))
+            continue
+        total = res['blanket'] + res['floodfill'] + res['touchup']
+        print("    %-9s %5d px remapped (blanket %d, flood-fill %d, touch-up %d) in %d/%d cells" %
+              (res['file'], total, res['blanket'], res['floodfill'], res['touchup'],
+               len(res['cells']), res['sprites']))
+        for cell, n in sorted(res['cells'].items()):
+            print("      cell %3d: %d px" % (cell, n))
+        if res['strays']:
+            print("      strays left in cells: %s" %
+                  ', '.join('%d (%dpx)' % kv for kv in sorted(res['strays'].items())))
+        else:
+            print("      straycheck clean")
+
+    if not dry:
+        os.makedirs(out_dir, exist_ok=True)
+        summary = os.path.join(out_dir, 'batchfix_summary.json')
+        json.dump(results, open(summary, 'w'), indent=2)
+        print("\n  wrote %s" % summary)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,10 +15,16 @@ Modes:
 --blackskin blacks out the skin indices (default 14,15); pass --skin 15 for
 jobs where idx 14 is a hair index.
 """
+import os
 import sys
 import struct
 import zlib
 
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
 BG = (255, 0, 255)
 
 
@@ -35,36 +41,29 @@ def decode_bmp(path):
         b, g, r, _a = d[54 + i * 4:54 + i * 4 + 4]
         pal.append((r, g, b))
     rowbytes = (((w + 1) // 2) + 3) & ~3  # 4bpp, padded to 4-byte boundary
-    grid = [[0] * w for _ in range(h)]
-    for fy in range(h):            # file rows are bottom-up
-        iy = h - 1 - fy            # -> top-down image row
-        base = pixoff + fy * rowbytes
-        for bx in range((w + 1) // 2):
-            byte = d[base + bx]
-            grid[iy][bx * 2] = byte & 0xF                   # low nibble = left pixel
-            if bx * 2 + 1 < w:
-                grid[iy][bx * 2 + 1] = (byte >> 4) & 0xF     # high nibble = right pixel
+    rows = np.frombuffer(d, dtype=np.uint8, count=h * rowbytes, offset=pixoff).reshape(h, rowbytes)
+    rows = np.ascontiguousarray(rows[::-1, :(w + 1) // 2])        # file rows are bottom-up
+    grid = fftsprite.unpack_nibbles(rows).reshape(h, -1)[:, :w]  # low nibble = left pixel
     return d, grid, w, h, pal, pixoff, rowbytes
 
 
 def encode_bmp(d, grid, w, h, pixoff, rowbytes):
     d = bytearray(d)
-    for fy in range(h):
-        iy = h - 1 - fy
-        base = pixoff + fy * rowbytes
-        for bx in range((w + 1) // 2):
-            lo = grid[iy][bx * 2] & 0xF                               # left pixel = low nibble
-            hi = grid[iy][bx * 2 + 1] & 0xF if bx * 2 + 1 < w else 0   # right pixel = high nibble
-            d[base + bx] = (hi << 4) | lo
+    nbytes = (w + 1) // 2
+    padded = np.zeros((h, nbytes * 2), dtype=np.uint8)
+    padded[:, :w] = grid                                          # odd width: pad nibble = 0
+    packed = np.frombuffer(fftsprite.pack_nibbles(padded), dtype=np.uint8).reshape(h, nbytes)
+    rows = np.frombuffer(d, dtype=np.uint8, count=h * rowbytes, offset=pixoff).reshape(h, rowbytes).copy()
+    rows[:, :nbytes] = packed[::-1]                               # back to bottom-up
+    d[pixoff:pixoff + h * rowbytes] = rows.tobytes()
     return d
 
 
-def write_png(path, flat_rgb, w, h):
-    raw = bytearray()
-    for y in range(h):
-        raw.append(0)
-        for (r, g, b) in flat_rgb[y * w:(y + 1) * w]:
-            raw += bytes((r, g, b))
+def write_png(path, rgb):
+    """Write an (h, w, 3) uint8 array as an RGB PNG."""
+    h, w = rgb.shape[:2]
+    raw = np.zeros((h, w * 3 + 1), dtype=np.uint8)  # col 0 = filter type 0
+    raw[:, 1:] = rgb.reshape(h, -1)
 
     def chunk(typ, data):
         return (struct.pack('>I', len(data)) + typ + data +
@@ -72,13 +71,24 @@ def write_png(path, flat_rgb, w, h):
 
     png = b'\x89PNG\r\n\x1a\n'
     png += chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0))
-    png += chunk(b'IDAT', zlib.compress(bytes(raw), 9))
+    png += chunk(b'IDAT', zlib.compress(raw.tobytes(), 9))
     png += chunk(b'IEND', b'')
     open(path, 'wb').write(png)
 
 
+def blanket_remap(grid, maxy, frameh, offset, src, dst):
+    """Remap every src pixel above localY maxy of each frame slot (after `offset`
+    rows of top margin) to dst, in place. Returns (remapped, localY histogram)."""
+    h = grid.shape[0]
+    localy = (np.arange(h) - offset) % frameh
+    mask = (grid == src) & (localy < maxy)[:, None]
+    grid[mask] = dst
+    per_localy = np.bincount(localy, weights=mask.sum(axis=1), minlength=frameh)
+    return int(mask.sum()), {int(ly): int(n) for ly, n in enumerate(per_localy) if n}
+
+
 def analyze(grid, w, h):
-    counts = [sum(1 for v in grid[y] if v != 0) for y in range(h)]
+    counts = (grid != 0).sum(axis=1).tolist()
     empties = [y for y in range(h) if counts[y] <= 3]
     runs = []
     if empties:
@@ -96,12 +106,8 @@ def analyze(grid, w, h):
     print("  band starts: %s" % [r[1] + 1 for r in runs][:-1])
     # row-similarity period check
     for P in (40, 48, 56, 64, 72, 80, 88):
-        match = same = 0
-        for y in range(0, h - P):
-            for x in range(0, w, 8):
-                match += 1
-                if grid[y][x] == grid[y + P][x]:
-                    same += 1
+        match = max(0, h - P) * len(range(0, w, 8))
+        same = int((grid[:h - P, ::8] == grid[P:, ::8]).sum()) if h > P else 0
         print("  period %2d: %.1f%% row-match" % (P, 100.0 * same / max(1, match)))
 
 
@@ -129,17 +135,10 @@ def main():
         if '--blackskin' in a:
             for i in (int(x) for x in opt('--skin', '14,15').split(',')):
                 rpal[i] = (0, 0, 0)
+        lut = np.array(rpal, dtype=np.uint8)
+        lut[0] = BG
+        write_png(out, lut[grid].repeat(scale, axis=0).repeat(scale, axis=1))
         W, H = w * scale, h * scale
-        flat = [BG] * (W * H)
-        for y in range(h):
-            for x in range(w):
-                idx = grid[y][x]
-                rgb = BG if idx == 0 else rpal[idx]
-                for sy in range(scale):
-                    base = (y * scale + sy) * W + x * scale
-                    for sx in range(scale):
-                        flat[base + sx] = rgb
-        write_png(out, flat, W, H)
         print("  wrote %s (%dx%d)" % (out, W, H))
         return 0
 
@@ -150,17 +149,7 @@ def main():
         offset = int(opt('--offset', '0'))  # rows of top margin before frame 0
         src = int(opt('--src', '15'))
         dst = int(opt('--dst', '12'))
-        remapped = 0
-        hist = {}
-        for y in range(h):
-            ly = (y - offset) % frameh
-            if ly >= maxy:
-                continue
-            for x in range(w):
-                if grid[y][x] == src:
-                    grid[y][x] = dst
-                    remapped += 1
-                    hist[ly] = hist.get(ly, 0) + 1
+        remapped, hist = blanket_remap(grid, maxy, frameh, offset, src, dst)
         out_d = encode_bmp(d, grid, w, h, pixoff, rowbytes)
         open(out, 'wb').write(out_d)
         print("  blanket remap %d->%d above localY %d (frameh %d): %d px" %
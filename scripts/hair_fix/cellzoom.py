@@ -5,13 +5,17 @@ specks in the gold hair. Default skin idx 14,15; pass --skin 15 for jobs where
 idx 14 is a hair index (else the hair-accent paints red).
 Usage: python cellzoom.py <tex.bin> <out.png> --cells 7,8,... [--scale 6]
        [--cols 5] [--skin 14,15]"""
+import os
 import sys
 import struct
 import zlib
-from collections import deque
 
-HEADER = 0x800
-WIDTH = 512
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
+WIDTH = fftsprite.TEX_WIDTH
 PAL = [
     (0, 0, 0), (40, 40, 32), (224, 224, 208), (80, 72, 64),
     (120, 112, 96), (160, 152, 136), (200, 192, 176), (112, 48, 32),
@@ -31,58 +35,29 @@ FONT = {
 
 
 def decode(path):
-    data = open(path, 'rb').read()[HEADER:]
-    h = len(data) * 2 // WIDTH
-    g = [[0] * WIDTH for _ in range(h)]
-    for i, b in enumerate(data):
-        o = i * 2
-        g[o // WIDTH][o % WIDTH] = (b >> 4) & 0xF
-        g[(o + 1) // WIDTH][(o + 1) % WIDTH] = b & 0xF
-    return g, h
+    sheet = fftsprite.load_tex(path)
+    return sheet.indices, sheet.height
 
 
 def detect_sprites(g, h):
-    visited = [[False] * WIDTH for _ in range(h)]
-    sprites = []
-    for sy in range(h):
-        for sx in range(WIDTH):
-            if g[sy][sx] == 0 or visited[sy][sx]:
-                continue
-            q = deque([(sy, sx)])
-            visited[sy][sx] = True
-            n = 0
-            minx = maxx = sx
-            miny = maxy = sy
-            while q:
-                y, x = q.popleft()
-                n += 1
-                minx = min(minx, x)
-                maxx = max(maxx, x)
-                miny = min(miny, y)
-                maxy = max(maxy, y)
-                for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
-                    ny, nx = y + dy, x + dx
-                    if 0 <= ny < h and 0 <= nx < WIDTH and not visited[ny][nx] and g[ny][nx] != 0:
-                        visited[ny][nx] = True
-                        q.append((ny, nx))
-            if n >= 30:
-                sprites.append((minx, miny, maxx, maxy))
+    comps = fftsprite.label_components(g != 0)
+    # drop stray-pixel noise
+    sprites = [tuple(int(v) for v in bbox) for bbox, n in zip(comps.bboxes, comps.sizes) if n >= 30]
+    # reading order: group into rough rows by top edge, then left-to-right
     sprites.sort(key=lambda s: (s[1] // 30, s[0]))
     return sprites
 
 
-def write_png(path, flat, w, h):
-    raw = bytearray()
-    for y in range(h):
-        raw.append(0)
-        for (r, gg, b) in flat[y * w:(y + 1) * w]:
-            raw += bytes((r, gg, b))
+def write_png(path, img):
+    h, w = img.shape[:2]
+    raw = np.zeros((h, w * 3 + 1), dtype=np.uint8)  # col 0 = filter type 0
+    raw[:, 1:] = img.reshape(h, -1)
 
     def chunk(t, d):
         return struct.pack('>I', len(d)) + t + d + struct.pack('>I', zlib.crc32(t + d) & 0xffffffff)
 
     png = (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)) +
-           chunk(b'IDAT', zlib.compress(bytes(raw), 9)) + chunk(b'IEND', b''))
+           chunk(b'IDAT', zlib.compress(raw.tobytes(), 9)) + chunk(b'IEND', b''))
     open(path, 'wb').write(png)
 
 
@@ -102,16 +77,17 @@ def main():
     pal = list(PAL)
     for si in skin:
         pal[si] = SKIN
+    lut = np.array(pal, dtype=np.uint8)
+    lut[0] = BG
 
     crops = []
     cellw = cellh = 0
     for c in cells:
         x0, y0, x1, y1 = sprites[c]
-        cw, ch = x1 - x0 + 1, y1 - y0 + 1
-        sub = [[g[y0 + yy][x0 + xx] for xx in range(cw)] for yy in range(ch)]
-        crops.append((c, cw, ch, sub))
-        cellw = max(cellw, cw)
-        cellh = max(cellh, ch)
+        sub = g[y0:y1 + 1, x0:x1 + 1]
+        crops.append((c, sub))
+        cellw = max(cellw, sub.shape[1])
+        cellh = max(cellh, sub.shape[0])
 
     pad = 3
     labelh = 7
@@ -119,33 +95,24 @@ def main():
     cbh = (cellh + pad + labelh) * scale
     rows = (len(crops) + cols - 1) // cols
     W, H = cbw * cols, cbh * rows
-    flat = [BG] * (W * H)
+    img = np.empty((H, W, 3), dtype=np.uint8)
+    img[:] = BG
 
-    def setpx(px, py, col):
-        if 0 <= px < W and 0 <= py < H:
-            flat[py * W + px] = col
-
-    for idx, (c, cw, ch, sub) in enumerate(crops):
+    for idx, (c, sub) in enumerate(crops):
         gx = (idx % cols) * cbw
         gy = (idx // cols) * cbh
         for di, chr_ in enumerate(str(c)):
             for ry, bits in enumerate(FONT[chr_]):
                 for rx, bit in enumerate(bits):
                     if bit == '1':
-                        for ddy in range(scale):
-                            for ddx in range(scale):
-                                setpx(gx + 2 * scale + di * 4 * scale + rx * scale + ddx,
-                                      gy + scale + ry * scale + ddy, NUMFG)
+                        px = gx + 2 * scale + di * 4 * scale + rx * scale
+                        py = gy + scale + ry * scale
+                        img[py:py + scale, px:px + scale] = NUMFG
         oy = gy + labelh * scale
-        for yy in range(ch):
-            for xx in range(cw):
-                v = sub[yy][xx]
-                col = BG if v == 0 else pal[v]
-                for ddy in range(scale):
-                    for ddx in range(scale):
-                        setpx(gx + xx * scale + ddx, oy + yy * scale + ddy, col)
-
-    write_png(outp, flat, W, H)
+        zoomed = lut[sub].repeat(scale, axis=0).repeat(scale, axis=1)
+        img[oy:oy + zoomed.shape[0], gx:gx + zoomed.shape[1]] = zoomed
+
+    write_png(outp, img)
     print("  wrote %s (%dx%d), %d cells" % (outp, W, H, len(crops)))
 
 
@@ -2,25 +2,22 @@
 """Detect TEX content bands (sprite rows) by finding gap rows between sprites.
 A row is a 'gap' if it has <= TOL non-transparent pixels. Content bands are
 runs of non-gap rows. Usage: python framedetect.py <tex.bin> [tex.bin ...]"""
+import os
 import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
 TOL = 3  # a row with this many or fewer non-zero px counts as a gap
 
 
 def decode(path):
-    data = open(path, 'rb').read()[0x800:]
-    h = len(data) * 2 // 512
-    g = [[0] * 512 for _ in range(h)]
-    for i, b in enumerate(data):
-        o = i * 2
-        g[o // 512][o % 512] = (b >> 4) & 0xF
-        g[(o + 1) // 512][(o + 1) % 512] = b & 0xF
-    return g, h
+    sheet = fftsprite.load_tex(path)
+    return sheet.indices, sheet.height
 
 
 def bands(g, h):
-    counts = [sum(1 for v in g[y] if v != 0) for y in range(h)]
-    is_content = [c > TOL for c in counts]
+    is_content = ((g != 0).sum(axis=1) > TOL).tolist()
     out = []
     y = 0
     while y < h:
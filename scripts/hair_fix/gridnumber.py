@@ -6,13 +6,17 @@ hair-highlight shows up as red specks inside the gold hair. Default skin is
 idx 14,15; pass --skin 15 for jobs where idx 14 is a hair index (else the
 hair-accent paints red and swamps the signal).
 Usage: python gridnumber.py <tex.bin> <out.png> [scale=3] [frameh=80] [--skin 14,15]"""
+import os
 import sys
 import struct
 import zlib
-from collections import deque
 
-HEADER = 0x800
-WIDTH = 512
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
+WIDTH = fftsprite.TEX_WIDTH
 
 PAL = [
     (0, 0, 0), (40, 40, 32), (224, 224, 208), (80, 72, 64),
@@ -36,66 +40,32 @@ FONT = {
 
 
 def decode(path):
-    data = open(path, 'rb').read()[HEADER:]
-    h = len(data) * 2 // WIDTH
-    g = [[0] * WIDTH for _ in range(h)]
-    for i, b in enumerate(data):
-        o = i * 2
-        g[o // WIDTH][o % WIDTH] = (b >> 4) & 0xF
-        g[(o + 1) // WIDTH][(o + 1) % WIDTH] = b & 0xF
-    return g, h
+    sheet = fftsprite.load_tex(path)
+    return sheet.indices, sheet.height
 
 
 def detect_sprites(g, h, frameh):
     """2D connected-component detection -- each sprite blob gets its own box,
     regardless of where it sits. Tiny noise components are filtered out."""
-    visited = [[False] * WIDTH for _ in range(h)]
-    sprites = []
-    for sy in range(h):
-        for sx in range(WIDTH):
-            if g[sy][sx] == 0 or visited[sy][sx]:
-                continue
-            q = deque([(sy, sx)])
-            visited[sy][sx] = True
-            n = 0
-            minx = maxx = sx
-            miny = maxy = sy
-            while q:
-                y, x = q.popleft()
-                n += 1
-                if x < minx:
-                    minx = x
-                if x > maxx:
-                    maxx = x
-                if y < miny:
-                    miny = y
-                if y > maxy:
-                    maxy = y
-                for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
-                    ny, nx = y + dy, x + dx
-                    if 0 <= ny < h and 0 <= nx < WIDTH and not visited[ny][nx] and g[ny][nx] != 0:
-                        visited[ny][nx] = True
-                        q.append((ny, nx))
-            if n >= 30:  # drop stray-pixel noise
-                sprites.append((minx, miny, maxx, maxy))
+    comps = fftsprite.label_components(g != 0)
+    # drop stray-pixel noise
+    sprites = [tuple(int(v) for v in bbox) for bbox, n in zip(comps.bboxes, comps.sizes) if n >= 30]
     # reading order: group into rough rows by top edge, then left-to-right
     sprites.sort(key=lambda s: (s[1] // 30, s[0]))
     return sprites
 
 
-def write_png(path, flat, w, h):
-    raw = bytearray()
-    for y in range(h):
-        raw.append(0)
-        for (r, gg, b) in flat[y * w:(y + 1) * w]:
-            raw += bytes((r, gg, b))
+def write_png(path, img):
+    h, w = img.shape[:2]
+    raw = np.zeros((h, w * 3 + 1), dtype=np.uint8)  # col 0 = filter type 0
+    raw[:, 1:] = img.reshape(h, -1)
 
     def chunk(t, d):
         return struct.pack('>I', len(d)) + t + d + struct.pack('>I', zlib.crc32(t + d) & 0xffffffff)
 
     png = b'\x89PNG\r\n\x1a\n'
     png += chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0))
-    png += chunk(b'IDAT', zlib.compress(bytes(raw), 9))
+    png += chunk(b'IDAT', zlib.compress(raw.tobytes(), 9))
     png += chunk(b'IEND', b'')
     open(path, 'wb').write(png)
 
@@ -119,48 +89,37 @@ def main():
         pal[idx] = SKIN
     sprites = detect_sprites(g, h, frameh)
 
+    lut = np.array(pal, dtype=np.uint8)
+    lut[0] = BG
+    img = lut[g].repeat(scale, axis=0).repeat(scale, axis=1)
     W, H = WIDTH * scale, h * scale
-    flat = [BG] * (W * H)
-    for y in range(h):
-        for x in range(WIDTH):
-            idx = g[y][x]
-            rgb = BG if idx == 0 else pal[idx]
-            for sy in range(scale):
-                base = (y * scale + sy) * W + x * scale
-                for sx in range(scale):
-                    flat[base + sx] = rgb
-
-    def setpx(px, py, c):
-        if 0 <= px < W and 0 <= py < H:
-            flat[py * W + px] = c
+
+    def fill(px0, py0, px1, py1, c):
+        """Fill the inclusive rect, clipped to the image."""
+        img[max(py0, 0):py1 + 1, max(px0, 0):px1 + 1] = c
 
     ds = scale  # digit pixel scale
     for i, (x0, y0, x1, y1) in enumerate(sprites):
         sx0, sy0 = x0 * scale, y0 * scale
         sx1, sy1 = (x1 + 1) * scale - 1, (y1 + 1) * scale - 1
-        for px in range(sx0, sx1 + 1):
-            setpx(px, sy0, BOX)
-            setpx(px, sy1, BOX)
-        for py in range(sy0, sy1 + 1):
-            setpx(sx0, py, BOX)
-            setpx(sx1, py, BOX)
+        fill(sx0, sy0, sx1, sy0, BOX)
+        fill(sx0, sy1, sx1, sy1, BOX)
+        fill(sx0, sy0, sx0, sy1, BOX)
+        fill(sx1, sy0, sx1, sy1, BOX)
         s = str(i)
         bw = len(s) * 4 * ds + ds
         bh = 5 * ds + 2 * ds
-        for by in range(sy0, sy0 + bh):
-            for bx in range(sx0, sx0 + bw):
-                setpx(bx, by, NUMBG)
+        fill(sx0, sy0, sx0 + bw - 1, sy0 + bh - 1, NUMBG)
         cx = sx0 + ds
         for ch in s:
             for ry, bits in enumerate(FONT[ch]):
                 for rx, bit in enumerate(bits):
                     if bit == '1':
-                        for ddy in range(ds):
-                            for ddx in range(ds):
-                                setpx(cx + rx * ds + ddx, sy0 + ds + ry * ds + ddy, NUMFG)
+                        px, py = cx + rx * ds, sy0 + ds + ry * ds
+                        fill(px, py, px + ds - 1, py + ds - 1, NUMFG)
             cx += 4 * ds
 
-    write_png(outp, flat, W, H)
+    write_png(outp, img)
     print("  wrote %s (%dx%d), %d sprites detected" % (outp, W, H, len(sprites)))
 
 
@@ -17,7 +17,7 @@ touches it just below, AND the body/hands/boots are never even considered.
 Frame height is `--frameh` (FFT IVC TEX sheets are 80-row slots).
 
 TEX format: 0x800 header, 4-bit indexed, high nibble = first pixel of a byte,
-low nibble = second; sheet width 512px.
+low nibble = second; sheet width 512px (decoded by fftsprite.load_tex).
 
 `--blanket` skips the border test and remaps EVERY src pixel above the maxy
 wall. Use it for the standing-pose pass: there the highlight is fused to the
@@ -28,112 +28,51 @@ Usage:
          [--threshold 0.6] [--conn 4|8] [--ignore-bg] [--maxy N] [--frameh 80]
          [--blanket] [--debugline IDX] [--dry-run]
 """
+import os
 import sys
-from collections import deque
-
-HEADER = 0x800
-WIDTH = 512
-
-
-def decode(path):
-    data = bytearray(open(path, 'rb').read())
-    px = data[HEADER:]
-    n = len(px) * 2
-    height = n // WIDTH
-    grid = [[0] * WIDTH for _ in range(height)]
-    for i, b in enumerate(px):
-        o = i * 2
-        grid[o // WIDTH][o % WIDTH] = (b >> 4) & 0xF        # high nibble = first pixel
-        grid[(o + 1) // WIDTH][(o + 1) % WIDTH] = b & 0xF   # low nibble  = second pixel
-    return data, grid, height
-
-
-def encode(data, grid, height):
-    px = bytearray(height * WIDTH // 2)
-    for y in range(height):
-        row = grid[y]
-        for x in range(WIDTH):
-            o = y * WIDTH + x
-            v = row[x] & 0xF
-            if o % 2 == 0:
-                px[o // 2] = (px[o // 2] & 0x0F) | (v << 4)
-            else:
-                px[o // 2] = (px[o // 2] & 0xF0) | v
-    data[HEADER:] = px
-    return data
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
 
 
 def classify(grid, height, hair_set, src, dst, threshold, conn, ignore_bg, maxy, frameh, blanket):
     # blanket mode: above the maxy line it's all hair (the line excludes the
     # face), so just remap every src pixel there -- no border test, no under-catch.
     if blanket:
-        remapped = 0
-        localy_hist = {}
-        for y in range(height):
-            ly = y % frameh
-            if maxy is not None and ly >= maxy:
-                continue
-            for x in range(WIDTH):
-                if grid[y][x] == src:
-                    grid[y][x] = dst
-                    remapped += 1
-                    localy_hist[ly] = localy_hist.get(ly, 0) + 1
-        return remapped, 0, 0, localy_hist
-
-    neigh4 = ((-1, 0), (1, 0), (0, -1), (0, 1))
-    neigh8 = neigh4 + ((-1, -1), (-1, 1), (1, -1), (1, 1))
-    neigh = neigh8 if conn == 8 else neigh4
-    visited = [[False] * WIDTH for _ in range(height)]
-    remapped = 0
-    blobs_hair = blobs_face = 0
-    localy_hist = {}
-
-    for sy in range(height):
-        for sx in range(WIDTH):
-            if grid[sy][sx] != src or visited[sy][sx]:
-                continue
-            if maxy is not None and (sy % frameh) >= maxy:
-                continue  # seed must lie within the head region (above the maxy wall)
-            # flood-fill the connected component of `src` pixels.
-            # maxy is a HARD WALL: the fill cannot cross localY >= maxy, so a
-            # hair-highlight blob never merges with the face that touches it below.
-            comp = []
-            q = deque([(sy, sx)])
-            visited[sy][sx] = True
-            while q:
-                y, x = q.popleft()
-                comp.append((y, x))
-                for dy, dx in neigh:
-                    ny, nx = y + dy, x + dx
-                    if 0 <= ny < height and 0 <= nx < WIDTH and not visited[ny][nx] and grid[ny][nx] == src:
-                        if maxy is not None and (ny % frameh) >= maxy:
-                            continue  # cannot cross the maxy wall
-                        visited[ny][nx] = True
-                        q.append((ny, nx))
-            # collect unique border pixels (non-src neighbours of the component)
-            border_seen = set()
-            border_vals = []
-            for (y, x) in comp:
-                for dy, dx in neigh:
-                    ny, nx = y + dy, x + dx
-                    if 0 <= ny < height and 0 <= nx < WIDTH and grid[ny][nx] != src and (ny, nx) not in border_seen:
-                        border_seen.add((ny, nx))
-                        border_vals.append(grid[ny][nx])
-            if ignore_bg:
-                border_vals = [v for v in border_vals if v != 0]
-            if not border_vals:
-                continue
-            hair_frac = sum(1 for v in border_vals if v in hair_set) / len(border_vals)
-            if hair_frac >= threshold:
-                blobs_hair += 1
-                for (y, x) in comp:
-                    grid[y][x] = dst
-                    remapped += 1
-                    ly = y % frameh
-                    localy_hist[ly] = localy_hist.get(ly, 0) + 1
-            else:
-                blobs_face += 1
-    return remapped, blobs_hair, blobs_face, localy_hist
+        localy = np.arange(height) % frameh
+        rows = localy < maxy if maxy is not None else np.ones(height, dtype=bool)
+        mask = (grid == src) & rows[:, None]
+        grid[mask] = dst
+        per_localy = np.bincount(localy, weights=mask.sum(axis=1), minlength=frameh)
+        localy_hist = {int(ly): int(n) for ly, n in enumerate(per_localy) if n}
+        return int(mask.sum()), 0, 0, localy_hist
+
+    # connected components of `src` pixels. maxy is a HARD WALL: pixels at
+    # localY >= maxy are outside the mask, so no component crosses it and a
+    # hair-highlight blob never merges with the face that touches it below.
+    localy = np.arange(height) % frameh
+    region = grid == src
+    if maxy is not None:
+        region &= (localy < maxy)[:, None]
+    # border = unique non-src neighbours of each component
+    border = grid != src
+    if ignore_bg:
+        border &= grid != 0
+    comps = fftsprite.label_components(region, conn, values=grid, border=border)
+
+    total = comps.border_hist.sum(axis=1)
+    hair = comps.border_hist[:, sorted(hair_set)].sum(axis=1)
+    has_border = total > 0
+    hair_frac = np.divide(hair, total, out=np.zeros(comps.count), where=has_border)
+    is_hair = has_border & (hair_frac >= threshold)
+
+    remap = comps.mask(np.nonzero(is_hair)[0])
+    grid[remap] = dst
+    per_localy = np.bincount(localy, weights=remap.sum(axis=1), minlength=frameh)
+    localy_hist = {int(ly): int(n) for ly, n in enumerate(per_localy) if n}
+    return int(remap.sum()), int(is_hair.sum()), int((has_border & ~is_hair).sum()), localy_hist
 
 
 def main():
@@ -157,7 +96,8 @@ def main():
     dry = '--dry-run' in a
     blanket = '--blanket' in a
 
-    data, grid, height = decode(inp)
+    sheet = fftsprite.load_tex(inp)
+    grid, height = sheet.indices, sheet.height
     remapped, bh, bf, hist = classify(grid, height, hair_set, src, dst, threshold, conn, ignore_bg, maxy, frameh, blanket)
 
     # optional bright debug line painted along the maxy cutoff row of every frame,
@@ -165,13 +105,9 @@ def main():
     debugline = opt('--debugline', None)
     if debugline is not None and maxy is not None:
         di = int(debugline)
-        painted = 0
-        for y in range(height):
-            if y % frameh == maxy:
-                for x in range(WIDTH):
-                    if grid[y][x] != 0:
-                        grid[y][x] = di
-                        painted += 1
+        line = (np.arange(height) % frameh == maxy)[:, None] & (grid != 0)
+        grid[line] = di
+        painted = int(line.sum())
         print(f"  DEBUG LINE: painted {painted}px at localY={maxy} (frameh={frameh}) with index {di}")
 
     print(f"  {inp}  ({height} rows)")
@@ -185,8 +121,7 @@ def main():
         for y in sorted(hist):
             print(f"    y={y:2d}: {hist[y]}")
     if not dry:
-        encode(data, grid, height)
-        open(outp, 'wb').write(data)
+        fftsprite.save_tex(outp, sheet)
         print(f"  wrote {outp}")
     else:
         print("  [dry-run] not written")
@@ -10,38 +10,16 @@ Usage:
   python persprite.py <in.bin> <out.bin> --cells 7,8,48,... [--maxy 12]
                       [--src 15] [--dst 12] [--maxy-cell N:V,...]
 """
+import os
 import sys
 import struct
-from collections import deque
-
-HEADER = 0x800
-WIDTH = 512
-
-
-def decode(path):
-    data = bytearray(open(path, 'rb').read())
-    px = data[HEADER:]
-    h = len(px) * 2 // WIDTH
-    g = [[0] * WIDTH for _ in range(h)]
-    for i, b in enumerate(px):
-        o = i * 2
-        g[o // WIDTH][o % WIDTH] = (b >> 4) & 0xF
-        g[(o + 1) // WIDTH][(o + 1) % WIDTH] = b & 0xF
-    return data, g, h
-
-
-def encode(data, g, h):
-    px = bytearray(h * WIDTH // 2)
-    for y in range(h):
-        for x in range(WIDTH):
-            o = y * WIDTH + x
-            v = g[y][x] & 0xF
-            if o % 2 == 0:
-                px[o // 2] = (px[o // 2] & 0x0F) | (v << 4)
-            else:
-                px[o // 2] = (px[o // 2] & 0xF0) | v
-    data[HEADER:] = px
-    return data
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
+WIDTH = fftsprite.TEX_WIDTH
 
 
 def decode_bmp(path):
@@ -50,57 +28,28 @@ def decode_bmp(path):
     w = struct.unpack('<i', d[18:22])[0]
     h = struct.unpack('<i', d[22:26])[0]
     rowbytes = (((w + 1) // 2) + 3) & ~3
-    grid = [[0] * w for _ in range(h)]
-    for fy in range(h):           # BMP rows are bottom-up
-        iy = h - 1 - fy
-        base = pixoff + fy * rowbytes
-        for bx in range((w + 1) // 2):
-            byte = d[base + bx]
-            grid[iy][bx * 2] = byte & 0xF                   # low nibble = left pixel
-            if bx * 2 + 1 < w:
-                grid[iy][bx * 2 + 1] = (byte >> 4) & 0xF     # high nibble = right pixel
+    rows = np.frombuffer(d, dtype=np.uint8, count=h * rowbytes, offset=pixoff).reshape(h, rowbytes)
+    rows = np.ascontiguousarray(rows[::-1, :(w + 1) // 2])        # BMP rows are bottom-up
+    grid = fftsprite.unpack_nibbles(rows).reshape(h, -1)[:, :w]  # low nibble = left pixel
     return d, grid, h, pixoff, rowbytes
 
 
 def encode_bmp(d, grid, h, pixoff, rowbytes):
     d = bytearray(d)
-    w = len(grid[0])
-    for fy in range(h):
-        iy = h - 1 - fy
-        base = pixoff + fy * rowbytes
-        for bx in range((w + 1) // 2):
-            lo = grid[iy][bx * 2] & 0xF                               # left pixel = low nibble
-            hi = grid[iy][bx * 2 + 1] & 0xF if bx * 2 + 1 < w else 0   # right pixel = high nibble
-            d[base + bx] = (hi << 4) | lo
+    w = grid.shape[1]
+    nbytes = (w + 1) // 2
+    padded = np.zeros((h, nbytes * 2), dtype=np.uint8)
+    padded[:, :w] = grid                                          # odd width: pad nibble = 0
+    packed = np.frombuffer(fftsprite.pack_nibbles(padded), dtype=np.uint8).reshape(h, nbytes)
+    rows = np.frombuffer(d, dtype=np.uint8, count=h * rowbytes, offset=pixoff).reshape(h, rowbytes).copy()
+    rows[:, :nbytes] = packed[::-1]                               # back to bottom-up
+    d[pixoff:pixoff + h * rowbytes] = rows.tobytes()
     return d
 
 
 def detect_sprites(g, h):
-    visited = [[False] * WIDTH for _ in range(h)]
-    sprites = []
-    for sy in range(h):
-        for sx in range(WIDTH):
-            if g[sy][sx] == 0 or visited[sy][sx]:
-                continue
-            q = deque([(sy, sx)])
-            visited[sy][sx] = True
-            n = 0
-            minx = maxx = sx
-            miny = maxy = sy
-            while q:
-                y, x = q.popleft()
-                n += 1
-                minx = min(minx, x)
-                maxx = max(maxx, x)
-                miny = min(miny, y)
-                maxy = max(maxy, y)
-                for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
-                    ny, nx = y + dy, x + dx
-                    if 0 <= ny < h and 0 <= nx < WIDTH and not visited[ny][nx] and g[ny][nx] != 0:
-                        visited[ny][nx] = True
-                        q.append((ny, nx))
-            if n >= 30:
-                sprites.append((minx, miny, maxx, maxy))
+    comps = fftsprite.label_components(g != 0)
+    sprites = [tuple(int(v) for v in bbox) for bbox, n in zip(comps.bboxes, comps.sizes) if n >= 30]
     sprites.sort(key=lambda s: (s[1] // 30, s[0]))
     return sprites
 
@@ -111,42 +60,15 @@ def floodfill_cell(g, h, bbox, src, dst, hair_set, threshold):
     big skin region NOT hugged by hair, so it stays put -- only the trapped
     hair-highlight islands flip."""
     x0, y0, x1, y1 = bbox
-    visited = set()
-    remapped = flipped = kept = 0
-    for sy in range(y0, y1 + 1):
-        for sx in range(x0, x1 + 1):
-            if g[sy][sx] != src or (sy, sx) in visited:
-                continue
-            comp = []
-            q = deque([(sy, sx)])
-            visited.add((sy, sx))
-            while q:
-                y, x = q.popleft()
-                comp.append((y, x))
-                for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
-                    ny, nx = y + dy, x + dx
-                    if x0 <= nx <= x1 and y0 <= ny <= y1 and (ny, nx) not in visited and g[ny][nx] == src:
-                        visited.add((ny, nx))
-                        q.append((ny, nx))
-            bseen = set()
-            bvals = []
-            for (y, x) in comp:
-                for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
-                    ny, nx = y + dy, x + dx
-                    if x0 <= nx <= x1 and y0 <= ny <= y1 and g[ny][nx] != src and (ny, nx) not in bseen:
-                        bseen.add((ny, nx))
-                        bvals.append(g[ny][nx])
-            if not bvals:
-                continue
-            frac = sum(1 for v in bvals if v in hair_set) / len(bvals)
-            if frac >= threshold:
-                for (y, x) in comp:
-                    g[y][x] = dst
-                    remapped += 1
-                flipped += 1
-            else:
-                kept += 1
-    return remapped, flipped, kept
+    cell = g[y0:y1 + 1, x0:x1 + 1]          # view: remaps write through to g
+    comps = fftsprite.label_components(cell == src, values=cell)
+    total = comps.border_hist.sum(axis=1)
+    hair = comps.border_hist[:, sorted(hair_set)].sum(axis=1)
+    has_border = total > 0
+    frac = np.divide(hair, total, out=np.zeros(comps.count), where=has_border)
+    flip = has_border & (frac >= threshold)
+    cell[comps.mask(np.nonzero(flip)[0])] = dst
+    return int(comps.sizes[flip].sum()), int(flip.sum()), int((has_border & ~flip).sum())
 
 
 def main():
@@ -170,7 +92,8 @@ def main():
     if is_bmp:
         data, g, h, pixoff, rowbytes = decode_bmp(inp)
     else:
-        data, g, h = decode(inp)
+        sheet = fftsprite.load_tex(inp)
+        g, h = sheet.indices, sheet.height
     sprites = detect_sprites(g, h)
     all_mode = '--all' in sys.argv
 
@@ -178,8 +101,7 @@ def main():
         if is_bmp:
             open(outp, 'wb').write(encode_bmp(data, g, h, pixoff, rowbytes))
         else:
-            encode(data, g, h)
-            open(outp, 'wb').write(data)
+            fftsprite.save_tex(outp, sheet)
 
     if '--floodfill' in sys.argv:
         hair_set = set(int(x) for x in opt('--hair', '10,11,12').split(','))
@@ -210,15 +132,12 @@ def main():
             skipped.append((i, w, ht))
             continue
         m = per.get(i, maxy)
-        cnt = 0
-        for y in range(y0, min(y0 + m, h)):
-            for x in range(x0, x1 + 1):
-                if g[y][x] == src:
-                    g[y][x] = dst
-                    cnt += 1
+        band = g[y0:min(y0 + m, h), x0:x1 + 1]
+        hit = band == src
+        band[hit] = dst
+        cnt = int(hit.sum())
         done.append((i, cnt, m))
-    encode(data, g, h)
-    open(outp, 'wb').write(data)
+    write_out()
     print("  remapped %d cells:" % len(done))
     for i, c, m in done:
         print("    cell %2d: %d px (maxy %d)" % (i, c, m))
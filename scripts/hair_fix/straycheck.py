@@ -13,23 +13,21 @@ Usage:
   python straycheck.py <tex.bin|bmp> --hair 11,12,13,14 [--src 15]
          [--threshold 0.5] [--min-island 2]
 """
+import os
 import sys
 import struct
-from collections import deque
 
-HEADER = 0x800
-TEX_WIDTH = 512
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
+TEX_WIDTH = fftsprite.TEX_WIDTH
 
 
 def decode_tex(path):
-    data = open(path, 'rb').read()[HEADER:]
-    h = len(data) * 2 // TEX_WIDTH
-    g = [[0] * TEX_WIDTH for _ in range(h)]
-    for i, b in enumerate(data):
-        o = i * 2
-        g[o // TEX_WIDTH][o % TEX_WIDTH] = (b >> 4) & 0xF
-        g[(o + 1) // TEX_WIDTH][(o + 1) % TEX_WIDTH] = b & 0xF
-    return g, h, TEX_WIDTH
+    sheet = fftsprite.load_tex(path)
+    return sheet.indices, sheet.height, TEX_WIDTH
 
 
 def decode_bmp(path):
@@ -38,80 +36,27 @@ def decode_bmp(path):
     w = struct.unpack('<i', d[18:22])[0]
     h = struct.unpack('<i', d[22:26])[0]
     rowbytes = (((w + 1) // 2) + 3) & ~3
-    g = [[0] * w for _ in range(h)]
-    for fy in range(h):                 # BMP rows are bottom-up
-        iy = h - 1 - fy
-        base = pixoff + fy * rowbytes
-        for bx in range((w + 1) // 2):
-            byte = d[base + bx]
-            g[iy][bx * 2] = byte & 0xF                  # low nibble = left pixel
-            if bx * 2 + 1 < w:
-                g[iy][bx * 2 + 1] = (byte >> 4) & 0xF    # high nibble = right pixel
+    rows = np.frombuffer(d, dtype=np.uint8, count=h * rowbytes, offset=pixoff).reshape(h, rowbytes)
+    rows = np.ascontiguousarray(rows[::-1, :(w + 1) // 2])      # BMP rows are bottom-up
+    g = fftsprite.unpack_nibbles(rows).reshape(h, -1)[:, :w]   # low nibble = left pixel
     return g, h, w
 
 
 def detect_sprites(g, h, w):
     """Same 2D connected-component detection + ordering as gridnumber.py, so
     cell numbers line up with the rendered grid."""
-    visited = [[False] * w for _ in range(h)]
-    sprites = []
-    for sy in range(h):
-        for sx in range(w):
-            if g[sy][sx] == 0 or visited[sy][sx]:
-                continue
-            q = deque([(sy, sx)])
-            visited[sy][sx] = True
-            n = 0
-            minx = maxx = sx
-            miny = maxy = sy
-            while q:
-                y, x = q.popleft()
-                n += 1
-                minx = min(minx, x)
-                maxx = max(maxx, x)
-                miny = min(miny, y)
-                maxy = max(maxy, y)
-                for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
-                    ny, nx = y + dy, x + dx
-                    if 0 <= ny < h and 0 <= nx < w and not visited[ny][nx] and g[ny][nx] != 0:
-                        visited[ny][nx] = True
-                        q.append((ny, nx))
-            if n >= 30:
-                sprites.append((minx, miny, maxx, maxy))
+    comps = fftsprite.label_components(g != 0)
+    sprites = [tuple(int(v) for v in bbox) for bbox, n in zip(comps.bboxes, comps.sizes) if n >= 30]
     sprites.sort(key=lambda s: (s[1] // 30, s[0]))
     return sprites
 
 
 def islands(g, bbox, src):
-    """Connected components of `src` within bbox; yields (size, border_vals)."""
+    """Connected components of `src` within bbox; returns [(size, border value histogram)]."""
     x0, y0, x1, y1 = bbox
-    seen = set()
-    out = []
-    for sy in range(y0, y1 + 1):
-        for sx in range(x0, x1 + 1):
-            if g[sy][sx] != src or (sy, sx) in seen:
-                continue
-            comp = []
-            q = deque([(sy, sx)])
-            seen.add((sy, sx))
-            while q:
-                y, x = q.popleft()
-                comp.append((y, x))
-                for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
-                    ny, nx = y + dy, x + dx
-                    if x0 <= nx <= x1 and y0 <= ny <= y1 and (ny, nx) not in seen and g[ny][nx] == src:
-                        seen.add((ny, nx))
-                        q.append((ny, nx))
-            bseen = set()
-            bvals = []
-            for (y, x) in comp:
-                for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
-                    ny, nx = y + dy, x + dx
-                    if x0 <= nx <= x1 and y0 <= ny <= y1 and g[ny][nx] != src and (ny, nx) not in bseen:
-                        bseen.add((ny, nx))
-                        bvals.append(g[ny][nx])
-            out.append((len(comp), bvals))
-    return out
+    cell = g[y0:y1 + 1, x0:x1 + 1]
+    comps = fftsprite.label_components(cell == src, values=cell)
+    return list(zip(comps.sizes.tolist(), comps.border_hist))
 
 
 def main():
@@ -138,10 +83,11 @@ def main():
     flagged = []
     for i, bbox in enumerate(sprites):
         hits = []
-        for size, bvals in islands(g, bbox, src):
-            if size < min_island or not bvals:
+        for size, bhist in islands(g, bbox, src):
+            total = int(bhist.sum())
+            if size < min_island or not total:
                 continue
-            frac = sum(1 for v in bvals if v in hair) / len(bvals)
+            frac = int(bhist[sorted(hair)].sum()) / total
             if frac >= thr:
                 hits.append((size, frac))
         if hits:
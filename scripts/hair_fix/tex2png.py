@@ -1,15 +1,21 @@
 #!/usr/bin/env python3
-"""Render a TEX file to PNG (stdlib only -- no PIL).
-TEX: 0x800 header, 4-bit indexed, 512 wide, high nibble = first pixel.
+"""Render a TEX file to PNG (NumPy, no PIL).
+TEX: 0x800 header, 4-bit indexed, 512 wide, high nibble = first pixel
+(decoded by fftsprite.load_tex).
 Maps indices via WMM's palette. index 0 (transparent) -> magenta so the
 sprite silhouette is obvious. Optional --blackskin sets idx 14/15 black.
 Usage: python tex2png.py <tex.bin> <out.png> [scale] [--blackskin]"""
+import os
 import sys
 import zlib
 import struct
 
-HEADER = 0x800
-WIDTH = 512
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
+WIDTH = fftsprite.TEX_WIDTH
 
 # WMM palette (from the HD BMP), index -> (r,g,b)
 PAL = [
@@ -22,24 +28,15 @@ BG = (255, 0, 255)  # render transparent (index 0) as magenta
 
 
 def decode(path):
-    data = open(path, 'rb').read()[HEADER:]
-    n = len(data) * 2
-    h = n // WIDTH
-    g = [[0] * WIDTH for _ in range(h)]
-    for i, b in enumerate(data):
-        o = i * 2
-        g[o // WIDTH][o % WIDTH] = (b >> 4) & 0xF
-        g[(o + 1) // WIDTH][(o + 1) % WIDTH] = b & 0xF
-    return g, h
+    sheet = fftsprite.load_tex(path)
+    return sheet.indices, sheet.height
 
 
-def write_png(path, flat_rgb, w, h):
-    raw = bytearray()
-    for y in range(h):
-        raw.append(0)  # filter type 0 (none)
-        row = flat_rgb[y * w:(y + 1) * w]
-        for (r, g, b) in row:
-            raw += bytes((r, g, b))
+def write_png(path, rgb):
+    """Write an (h, w, 3) uint8 array as an RGB PNG."""
+    h, w = rgb.shape[:2]
+    raw = np.zeros((h, w * 3 + 1), dtype=np.uint8)  # col 0 = filter type 0 (none)
+    raw[:, 1:] = rgb.reshape(h, -1)
 
     def chunk(typ, data):
         return (struct.pack('>I', len(data)) + typ + data +
@@ -47,7 +44,7 @@ def write_png(path, flat_rgb, w, h):
 
     png = b'\x89PNG\r\n\x1a\n'
     png += chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0))
-    png += chunk(b'IDAT', zlib.compress(bytes(raw), 9))
+    png += chunk(b'IDAT', zlib.compress(raw.tobytes(), 9))
     png += chunk(b'IEND', b'')
     open(path, 'wb').write(png)
 
@@ -63,17 +60,11 @@ def main():
         pal[14] = pal[15] = (0, 0, 0)
 
     grid, h = decode(inp)
+    lut = np.array(pal, dtype=np.uint8)
+    lut[0] = BG
+    rgb = lut[grid].repeat(scale, axis=0).repeat(scale, axis=1)
     W, H = WIDTH * scale, h * scale
-    flat = [BG] * (W * H)
-    for y in range(h):
-        for x in range(WIDTH):
-            idx = grid[y][x]
-            rgb = BG if idx == 0 else pal[idx]
-            for sy in range(scale):
-                base = (y * scale + sy) * W + x * scale
-                for sx in range(scale):
-                    flat[base + sx] = rgb
-    write_png(outp, flat, W, H)
+    write_png(outp, rgb)
     print(f"  wrote {outp}  ({W}x{H}, scale {scale})")
 
 
@@ -2,11 +2,14 @@
 """Generate 50 varied themes for Marach with diverse color combinations."""
 
 import os
+import sys
 import struct
 import shutil
 from typing import Tuple
 from pathlib import Path
-import subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from convert_sprite_sw import extract_southwest_sprite
 
 def rgb_to_fft_color(r: int, g: int, b: int) -> int:
     """Convert RGB (0-255) to FFT 16-bit color format (XBBBBBGGGGGRRRRR)."""
@@ -209,19 +212,8 @@ def generate_all_themes():
             # Generate PNG preview
             output_png = os.path.join(output_base, f"marach_{theme_name}.png")
             try:
-                # Use the convert_sprite_sw.py script to generate PNG
-                cmd = [
-                    "python",
-                    "scripts/convert_sprite_sw.py",
-                    output_bin,
-                    output_png,
-                    "--preview"
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    print(f"  [OK] Generated PNG preview: {output_png}")
-                else:
-                    print(f"  [ERROR] Failed to generate PNG: {result.stderr}")
+                extract_southwest_sprite(output_bin, output_png, preview_mode=True)
+                print(f"  [OK] Generated PNG preview: {output_png}")
             except Exception as e:
                 print(f"  [ERROR] Error generating PNG: {e}")
 
@@ -2,13 +2,16 @@
 """Generate 50 NEW varied themes for Marach with different color combinations."""
 
 import os
+import sys
 import struct
-import shutil
 from typing import Tuple
 from pathlib import Path
-import subprocess
 import random
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from theme_batch import ThemeBatch, ThemeSpec
+
 def rgb_to_fft_color(r: int, g: int, b: int) -> int:
     """Convert RGB (0-255) to FFT 16-bit color format (XBBBBBGGGGGRRRRR)."""
     r5 = (r >> 3) & 0x1F
@@ -33,16 +36,9 @@ def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
-def create_marach_theme(input_path: str, output_path: str, primary_hex: str,
-                      accent_hex: str = None, theme_name: str = "custom",
-                      style: str = "standard"):
-    """Create a themed Marach sprite with various styles."""
-
-    # Create output directory
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-    # Copy original sprite
-    shutil.copy2(input_path, output_path)
+def apply_marach_theme(data: bytearray, primary_hex: str,
+                       accent_hex: str = None, style: str = "standard"):
+    """Apply a Marach theme style to a palette block (edited in place)."""
 
     # Parse colors
     primary_r, primary_g, primary_b = hex_to_rgb(primary_hex)
@@ -54,129 +50,121 @@ def create_marach_theme(input_path: str, output_path: str, primary_hex: str,
         accent_g = 255 - primary_g
         accent_b = 255 - primary_b
 
-    print(f"Creating {theme_name} theme ({style})...")
-
-    # Open and modify the sprite
-    with open(output_path, 'r+b') as f:
-        data = bytearray(f.read())
-
-        if style == "vibrant":
-            # Bright, saturated colors
-            bright_r = min(255, primary_r + 30)
-            bright_g = min(255, primary_g + 30)
-            bright_b = min(255, primary_b + 30)
-            main_color = rgb_to_fft_color(bright_r, bright_g, bright_b)
-            accent_bright = rgb_to_fft_color(min(255, accent_r + 50), min(255, accent_g + 50), min(255, accent_b + 50))
-
-            data[6:8] = struct.pack('<H', accent_bright)
-            data[8:10] = struct.pack('<H', accent_bright)
-            data[10:12] = struct.pack('<H', main_color)
-            data[12:14] = struct.pack('<H', main_color)
-            data[14:16] = struct.pack('<H', main_color)
-            data[16:18] = struct.pack('<H', main_color)
-            data[18:20] = struct.pack('<H', main_color)
-            data[20:22] = struct.pack('<H', main_color)
-
-        elif style == "duotone":
-            # Two-tone design
-            color1 = rgb_to_fft_color(primary_r, primary_g, primary_b)
-            color2 = rgb_to_fft_color(accent_r, accent_g, accent_b)
-
-            data[6:8] = struct.pack('<H', color2)
-            data[8:10] = struct.pack('<H', color2)
-            data[10:12] = struct.pack('<H', color2)
-            data[12:14] = struct.pack('<H', color1)
-            data[14:16] = struct.pack('<H', color1)
-            data[16:18] = struct.pack('<H', color1)
-            data[18:20] = struct.pack('<H', color1)
-            data[20:22] = struct.pack('<H', color1)
-
-        elif style == "neon":
-            # Neon/glowing effect
-            neon_main = rgb_to_fft_color(primary_r, primary_g, primary_b)
-            glow_r = min(255, primary_r + 100)
-            glow_g = min(255, primary_g + 100)
-            glow_b = min(255, primary_b + 100)
-            neon_glow = rgb_to_fft_color(glow_r, glow_g, glow_b)
-
-            data[6:8] = struct.pack('<H', neon_glow)
-            data[8:10] = struct.pack('<H', neon_glow)
-            data[10:12] = struct.pack('<H', neon_main)
-            data[12:14] = struct.pack('<H', neon_main)
-            data[14:16] = struct.pack('<H', neon_glow)
-            data[16:18] = struct.pack('<H', neon_main)
-            data[18:20] = struct.pack('<H', neon_main)
-            data[20:22] = struct.pack('<H', neon_main)
-
-        elif style == "muted":
-            # Desaturated, subtle colors
-            muted_r, muted_g, muted_b = lighten_color(primary_r, primary_g, primary_b, 0.3)
-            gray_r = int((muted_r + 128) / 2)
-            gray_g = int((muted_g + 128) / 2)
-            gray_b = int((muted_b + 128) / 2)
-            main_color = rgb_to_fft_color(gray_r, gray_g, gray_b)
-            accent_muted = rgb_to_fft_color(*lighten_color(accent_r, accent_g, accent_b, 0.4))
-
-            data[6:8] = struct.pack('<H', accent_muted)
-            data[8:10] = struct.pack('<H', accent_muted)
-            data[10:12] = struct.pack('<H', main_color)
-            data[12:14] = struct.pack('<H', main_color)
-            data[14:16] = struct.pack('<H', main_color)
-            data[16:18] = struct.pack('<H', main_color)
-            data[18:20] = struct.pack('<H', main_color)
-            data[20:22] = struct.pack('<H', main_color)
-
-        elif style == "triadic":
-            # Three-color harmony
-            color1 = rgb_to_fft_color(primary_r, primary_g, primary_b)
-            # Rotate hue by 120 degrees for triadic colors
-            color2 = rgb_to_fft_color(primary_b, primary_r, primary_g)  # Simplified rotation
-            color3 = rgb_to_fft_color(primary_g, primary_b, primary_r)  # Simplified rotation
-
-            data[6:8] = struct.pack('<H', color2)
-            data[8:10] = struct.pack('<H', color3)
-            data[10:12] = struct.pack('<H', color2)
-            data[12:14] = struct.pack('<H', color1)
-            data[14:16] = struct.pack('<H', color1)
-            data[16:18] = struct.pack('<H', color1)
-            data[18:20] = struct.pack('<H', color3)
-            data[20:22] = struct.pack('<H', color1)
-
-        else:  # standard
-            # Traditional shading
-            main_color = rgb_to_fft_color(primary_r, primary_g, primary_b)
+    if style == "vibrant":
+        # Bright, saturated colors
+        bright_r = min(255, primary_r + 30)
+        bright_g = min(255, primary_g + 30)
+        bright_b = min(255, primary_b + 30)
+        main_color = rgb_to_fft_color(bright_r, bright_g, bright_b)
+        accent_bright = rgb_to_fft_color(min(255, accent_r + 50), min(255, accent_g + 50), min(255, accent_b + 50))
+
+        data[6:8] = struct.pack('<H', accent_bright)
+        data[8:10] = struct.pack('<H', accent_bright)
+        data[10:12] = struct.pack('<H', main_color)
+        data[12:14] = struct.pack('<H', main_color)
+        data[14:16] = struct.pack('<H', main_color)
+        data[16:18] = struct.pack('<H', main_color)
+        data[18:20] = struct.pack('<H', main_color)
+        data[20:22] = struct.pack('<H', main_color)
+
+    elif style == "duotone":
+        # Two-tone design
+        color1 = rgb_to_fft_color(primary_r, primary_g, primary_b)
+        color2 = rgb_to_fft_color(accent_r, accent_g, accent_b)
+
+        data[6:8] = struct.pack('<H', color2)
+        data[8:10] = struct.pack('<H', color2)
+        data[10:12] = struct.pack('<H', color2)
+        data[12:14] = struct.pack('<H', color1)
+        data[14:16] = struct.pack('<H', color1)
+        data[16:18] = struct.pack('<H', color1)
+        data[18:20] = struct.pack('<H', color1)
+        data[20:22] = struct.pack('<H', color1)
+
+    elif style == "neon":
+        # Neon/glowing effect
+        neon_main = rgb_to_fft_color(primary_r, primary_g, primary_b)
+        glow_r = min(255, primary_r + 100)
+        glow_g = min(255, primary_g + 100)
+        glow_b = min(255, primary_b + 100)
+        neon_glow = rgb_to_fft_color(glow_r, glow_g, glow_b)
+
+        data[6:8] = struct.pack('<H', neon_glow)
+        data[8:10] = struct.pack('<H', neon_glow)
+        data[10:12] = struct.pack('<H', neon_main)
+        data[12:14] = struct.pack('<H', neon_main)
+        data[14:16] = struct.pack('<H', neon_glow)
+        data[16:18] = struct.pack('<H', neon_main)
+        data[18:20] = struct.pack('<H', neon_main)
+        data[20:22] = struct.pack('<H', neon_main)
+
+    elif style == "muted":
+        # Desaturated, subtle colors
+        muted_r, muted_g, muted_b = lighten_color(primary_r, primary_g, primary_b, 0.3)
+        gray_r = int((muted_r + 128) / 2)
+        gray_g = int((muted_g + 128) / 2)
+        gray_b = int((muted_b + 128) / 2)
+        main_color = rgb_to_fft_color(gray_r, gray_g, gray_b)
+        accent_muted = rgb_to_fft_color(*lighten_color(accent_r, accent_g, accent_b, 0.4))
+
+        data[6:8] = struct.pack('<H', accent_muted)
+        data[8:10] = struct.pack('<H', accent_muted)
+        data[10:12] = struct.pack('<H', main_color)
+        data[12:14] = struct.pack('<H', main_color)
+        data[14:16] = struct.pack('<H', main_color)
+        data[16:18] = struct.pack('<H', main_color)
+        data[18:20] = struct.pack('<H', main_color)
+        data[20:22] = struct.pack('<H', main_color)
+
+    elif style == "triadic":
+        # Three-color harmony
+        color1 = rgb_to_fft_color(primary_r, primary_g, primary_b)
+        # Rotate hue by 120 degrees for triadic colors
+        color2 = rgb_to_fft_color(primary_b, primary_r, primary_g)  # Simplified rotation
+        color3 = rgb_to_fft_color(primary_g, primary_b, primary_r)  # Simplified rotation
+
+        data[6:8] = struct.pack('<H', color2)
+        data[8:10] = struct.pack('<H', color3)
+        data[10:12] = struct.pack('<H', color2)
+        data[12:14] = struct.pack('<H', color1)
+        data[14:16] = struct.pack('<H', color1)
+        data[16:18] = struct.pack('<H', color1)
+        data[18:20] = struct.pack('<H', color3)
+        data[20:22] = struct.pack('<H', color1)
+
+    else:  # standard
+        # Traditional shading
+        main_color = rgb_to_fft_color(primary_r, primary_g, primary_b)
+        edge_r, edge_g, edge_b = darken_color(primary_r, primary_g, primary_b, 0.75)
+        edge_color = rgb_to_fft_color(edge_r, edge_g, edge_b)
+        shadow_r, shadow_g, shadow_b = darken_color(primary_r, primary_g, primary_b, 0.5)
+        shadow_color = rgb_to_fft_color(shadow_r, shadow_g, shadow_b)
+        accent_color = rgb_to_fft_color(accent_r, accent_g, accent_b)
+        accent_dark = rgb_to_fft_color(*darken_color(accent_r, accent_g, accent_b, 0.7))
+
+        data[6:8] = struct.pack('<H', accent_dark)
+        data[8:10] = struct.pack('<H', accent_color)
+        data[10:12] = struct.pack('<H', accent_dark)
+        data[12:14] = struct.pack('<H', main_color)
+        data[14:16] = struct.pack('<H', edge_color)
+        data[16:18] = struct.pack('<H', main_color)
+        data[18:20] = struct.pack('<H', shadow_color)
+        data[20:22] = struct.pack('<H', main_color)
+
+    # Apply to additional palettes
+    for palette in range(1, 4):
+        palette_offset = palette * 32
+        if style in ["standard"]:
+            edge_pos = palette_offset + (7 * 2)
+            shadow_pos = palette_offset + (9 * 2)
             edge_r, edge_g, edge_b = darken_color(primary_r, primary_g, primary_b, 0.75)
-            edge_color = rgb_to_fft_color(edge_r, edge_g, edge_b)
             shadow_r, shadow_g, shadow_b = darken_color(primary_r, primary_g, primary_b, 0.5)
-            shadow_color = rgb_to_fft_color(shadow_r, shadow_g, shadow_b)
-            accent_color = rgb_to_fft_color(accent_r, accent_g, accent_b)
-            accent_dark = rgb_to_fft_color(*darken_color(accent_r, accent_g, accent_b, 0.7))
-
-            data[6:8] = struct.pack('<H', accent_dark)
-            data[8:10] = struct.pack('<H', accent_color)
-            data[10:12] = struct.pack('<H', accent_dark)
-            data[12:14] = struct.pack('<H', main_color)
-            data[14:16] = struct.pack('<H', edge_color)
-            data[16:18] = struct.pack('<H', main_color)
-            data[18:20] = struct.pack('<H', shadow_color)
-            data[20:22] = struct.pack('<H', main_color)
-
-        # Apply to additional palettes
-        for palette in range(1, 4):
-            palette_offset = palette * 32
-            if style in ["standard"]:
-                edge_pos = palette_offset + (7 * 2)
-                shadow_pos = palette_offset + (9 * 2)
-                edge_r, edge_g, edge_b = darken_color(primary_r, primary_g, primary_b, 0.75)
-                shadow_r, shadow_g, shadow_b = darken_color(primary_r, primary_g, primary_b, 0.5)
-                data[edge_pos:edge_pos+2] = struct.pack('<H', rgb_to_fft_color(edge_r, edge_g, edge_b))
-                data[shadow_pos:shadow_pos+2] = struct.pack('<H', rgb_to_fft_color(shadow_r, shadow_g, shadow_b))
-
-        # Write back
-        f.seek(0)
-        f.write(data)
-
-    return True
+            data[edge_pos:edge_pos+2] = struct.pack('<H', rgb_to_fft_color(edge_r, edge_g, edge_b))
+            data[shadow_pos:shadow_pos+2] = struct.pack('<H', rgb_to_fft_color(shadow_r, shadow_g, shadow_b))
+
+def build_palette(block: bytearray, spec: ThemeSpec) -> None:
+    """ThemeBatch builder: apply the spec's colors to the palette block."""
+    apply_marach_theme(block, spec.colors["primary"], spec.colors.get("accent"), spec.style)
 
 def generate_all_themes():
     """Generate 50 NEW creative themes for Marach."""
@@ -266,33 +254,11 @@ def generate_all_themes():
         ("holographic", "#C0C0C0", "#AB82FF", "triadic"),
     ]
 
-    # Generate each theme
-    for i, (theme_name, primary, accent, style) in enumerate(themes, 1):
-        print(f"\n[{i}/50] Generating theme: {theme_name}")
-
-        # Create .bin file
-        output_bin = os.path.join(output_base, f"marach_{theme_name}.bin")
-        success = create_marach_theme(input_sprite, output_bin, primary, accent, theme_name, style)
-
-        if success:
-            # Generate PNG preview
-            output_png = os.path.join(output_base, f"marach_{theme_name}.png")
-            try:
-                # Use the convert_sprite_sw.py script to generate PNG
-                cmd = [
-                    "python",
-                    "scripts/convert_sprite_sw.py",
-                    output_bin,
-                    output_png,
-                    "--preview"
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    print(f"  [OK] Generated PNG preview: {output_png}")
-                else:
-                    print(f"  [ERROR] Failed to generate PNG: {result.stderr}")
-            except Exception as e:
-                print(f"  [ERROR] Error generating PNG: {e}")
+    # Build every theme (.bin + PNG preview) in one parallel batch
+    batch = ThemeBatch(input_sprite, output_base, builder=build_palette,
+                       bin_name="marach_{name}.bin", preview_name="marach_{name}.png")
+    batch.run([ThemeSpec(name, {"primary": primary, "accent": accent}, style)
+               for name, primary, accent, style in themes])
 
     print(f"\n[COMPLETE] Generated 50 NEW themes for Marach")
     print(f"[COMPLETE] Files saved to: {output_base}")
@@ -2,11 +2,14 @@
 """Generate 50 themes for Meliadoul that change armor but preserve face/skin colors."""
 
 import os
+import sys
 import struct
-import shutil
 from typing import Tuple
 from pathlib import Path
-import subprocess
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from theme_batch import ThemeBatch, ThemeSpec
 
 def rgb_to_fft_color(r: int, g: int, b: int) -> int:
     """Convert RGB (0-255) to FFT 16-bit color format (XBBBBBGGGGGRRRRR)."""
@@ -40,9 +43,9 @@ def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
-def create_meliadoul_theme_armor_only(input_path: str, output_path: str, primary_hex: str,
-                                   accent_hex: str = None, theme_name: str = "custom"):
-    """Create a themed Meliadoul sprite that preserves face/skin colors.
+def apply_meliadoul_theme_armor_only(data: bytearray, primary_hex: str,
+                                     accent_hex: str = None):
+    """Apply a Meliadoul armor theme to a palette block (edited in place), preserving face/skin colors.
 
     Based on FFT sprite structure:
     - Indices 0-2: Typically transparent/background
@@ -54,12 +57,6 @@ def create_meliadoul_theme_armor_only(input_path: str, output_path: str, primary
     We'll modify only the armor indices while preserving skin tones.
     """
 
-    # Create output directory
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-    # Copy original sprite
-    shutil.copy2(input_path, output_path)
-
     # Parse colors
     primary_r, primary_g, primary_b = hex_to_rgb(primary_hex)
     if accent_hex:
@@ -85,110 +82,102 @@ def create_meliadoul_theme_armor_only(input_path: str, output_path: str, primary
     accent_color = rgb_to_fft_color(accent_r, accent_g, accent_b)
     accent_dark = rgb_to_fft_color(*darken_color(accent_r, accent_g, accent_b, 0.7))
 
-    print(f"Creating {theme_name} theme (armor only)...")
-
-    # Open and modify the sprite
-    with open(output_path, 'r+b') as f:
-        data = bytearray(f.read())
-
-        # Store original skin colors from indices 11-19 (typical skin tone range)
-        original_skin_colors = []
-        for i in range(11, 20):
+    # Store original skin colors from indices 11-19 (typical skin tone range)
+    original_skin_colors = []
+    for i in range(11, 20):
+        pos = i * 2
+        if pos + 2 <= len(data):
+            original_skin_colors.append(data[pos:pos+2])
+
+    # PALETTE 0 - Main sprite colors
+    # Accent pieces (buckles, clasps, trim) - indices 3-5
+    data[6:8] = struct.pack('<H', accent_dark)    # Index 3
+    data[8:10] = struct.pack('<H', accent_color)  # Index 4
+    data[10:12] = struct.pack('<H', accent_dark)  # Index 5
+
+    # Main armor/clothing - indices 6-10
+    data[12:14] = struct.pack('<H', main_color)    # Index 6
+    data[14:16] = struct.pack('<H', edge_color)    # Index 7 (edge)
+    data[16:18] = struct.pack('<H', main_color)    # Index 8
+    data[18:20] = struct.pack('<H', shadow_color)  # Index 9 (shadow)
+    data[20:22] = struct.pack('<H', main_color)    # Index 10
+
+    # PRESERVE indices 11-19 (skin tones) - restore original values
+    for i, color_bytes in enumerate(original_skin_colors):
+        pos = (11 + i) * 2
+        if pos + 2 <= len(data) and color_bytes:
+            data[pos:pos+2] = color_bytes
+
+    # Additional armor colors (indices 20-31)
+    for i in range(20, 32):
+        if i < 26:
+            # Use main color variations
             pos = i * 2
             if pos + 2 <= len(data):
-                original_skin_colors.append(data[pos:pos+2])
-
-        # PALETTE 0 - Main sprite colors
-        # Accent pieces (buckles, clasps, trim) - indices 3-5
-        data[6:8] = struct.pack('<H', accent_dark)    # Index 3
-        data[8:10] = struct.pack('<H', accent_color)  # Index 4
-        data[10:12] = struct.pack('<H', accent_dark)  # Index 5
-
-        # Main armor/clothing - indices 6-10
-        data[12:14] = struct.pack('<H', main_color)    # Index 6
-        data[14:16] = struct.pack('<H', edge_color)    # Index 7 (edge)
-        data[16:18] = struct.pack('<H', main_color)    # Index 8
-        data[18:20] = struct.pack('<H', shadow_color)  # Index 9 (shadow)
-        data[20:22] = struct.pack('<H', main_color)    # Index 10
-
-        # PRESERVE indices 11-19 (skin tones) - restore original values
-        for i, color_bytes in enumerate(original_skin_colors):
-            pos = (11 + i) * 2
-            if pos + 2 <= len(data) and color_bytes:
-                data[pos:pos+2] = color_bytes
-
-        # Additional armor colors (indices 20-31)
-        for i in range(20, 32):
-            if i < 26:
-                # Use main color variations
-                pos = i * 2
-                if pos + 2 <= len(data):
-                    variation_factor = 0.9 - ((i - 20) * 0.05)
-                    var_r, var_g, var_b = darken_color(primary_r, primary_g, primary_b, variation_factor)
-                    data[pos:pos+2] = struct.pack('<H', rgb_to_fft_color(var_r, var_g, var_b))
-            else:
-                # Use accent variations
-                pos = i * 2
-                if pos + 2 <= len(data):
-                    variation_factor = 0.85 - ((i - 26) * 0.05)
-                    var_r, var_g, var_b = darken_color(accent_r, accent_g, accent_b, variation_factor)
-                    data[pos:pos+2] = struct.pack('<H', rgb_to_fft_color(var_r, var_g, var_b))
-
-        # Apply to additional palettes for consistency
-        for palette in range(1, 4):  # Palettes 1-3
-            palette_offset = palette * 32  # Each palette is 16 colors * 2 bytes
-
-            # Store original skin colors for this palette
-            palette_skin_colors = []
-            for i in range(11, 20):
-                pos = palette_offset + (i * 2)
-                if pos + 2 <= len(data):
-                    palette_skin_colors.append(data[pos:pos+2])
-
-            # Apply armor colors but preserve skin
-            # Accents
-            for i in range(3, 6):
-                pos = palette_offset + (i * 2)
-                if pos + 2 <= len(data):
-                    if i == 4:
-                        data[pos:pos+2] = struct.pack('<H', accent_color)
-                    else:
-                        data[pos:pos+2] = struct.pack('<H', accent_dark)
-
-            # Main armor
-            pos = palette_offset + (6 * 2)
-            if pos + 2 <= len(data):
-                data[pos:pos+2] = struct.pack('<H', main_color)
-
-            # Edge (index 7)
-            pos = palette_offset + (7 * 2)
+                variation_factor = 0.9 - ((i - 20) * 0.05)
+                var_r, var_g, var_b = darken_color(primary_r, primary_g, primary_b, variation_factor)
+                data[pos:pos+2] = struct.pack('<H', rgb_to_fft_color(var_r, var_g, var_b))
+        else:
+            # Use accent variations
+            pos = i * 2
             if pos + 2 <= len(data):
-                data[pos:pos+2] = struct.pack('<H', edge_color)
+                variation_factor = 0.85 - ((i - 26) * 0.05)
+                var_r, var_g, var_b = darken_color(accent_r, accent_g, accent_b, variation_factor)
+                data[pos:pos+2] = struct.pack('<H', rgb_to_fft_color(var_r, var_g, var_b))
 
-            pos = palette_offset + (8 * 2)
-            if pos + 2 <= len(data):
-                data[pos:pos+2] = struct.pack('<H', main_color)
+    # Apply to additional palettes for consistency
+    for palette in range(1, 4):  # Palettes 1-3
+        palette_offset = palette * 32  # Each palette is 16 colors * 2 bytes
 
-            # Shadow (index 9)
-            pos = palette_offset + (9 * 2)
+        # Store original skin colors for this palette
+        palette_skin_colors = []
+        for i in range(11, 20):
+            pos = palette_offset + (i * 2)
             if pos + 2 <= len(data):
-                data[pos:pos+2] = struct.pack('<H', shadow_color)
+                palette_skin_colors.append(data[pos:pos+2])
 
-            pos = palette_offset + (10 * 2)
+        # Apply armor colors but preserve skin
+        # Accents
+        for i in range(3, 6):
+            pos = palette_offset + (i * 2)
             if pos + 2 <= len(data):
-                data[pos:pos+2] = struct.pack('<H', main_color)
-
-            # Restore skin colors for this palette
-            for i, color_bytes in enumerate(palette_skin_colors):
-                pos = palette_offset + ((11 + i) * 2)
-                if pos + 2 <= len(data) and color_bytes:
-                    data[pos:pos+2] = color_bytes
-
-        # Write back
-        f.seek(0)
-        f.write(data)
+                if i == 4:
+                    data[pos:pos+2] = struct.pack('<H', accent_color)
+                else:
+                    data[pos:pos+2] = struct.pack('<H', accent_dark)
+
+        # Main armor
+        pos = palette_offset + (6 * 2)
+        if pos + 2 <= len(data):
+            data[pos:pos+2] = struct.pack('<H', main_color)
+
+        # Edge (index 7)
+        pos = palette_offset + (7 * 2)
+        if pos + 2 <= len(data):
+            data[pos:pos+2] = struct.pack('<H', edge_color)
+
+        pos = palette_offset + (8 * 2)
+        if pos + 2 <= len(data):
+            data[pos:pos+2] = struct.pack('<H', main_color)
+
+        # Shadow (index 9)
+        pos = palette_offset + (9 * 2)
+        if pos + 2 <= len(data):
+            data[pos:pos+2] = struct.pack('<H', shadow_color)
+
+        pos = palette_offset + (10 * 2)
+        if pos + 2 <= len(data):
+            data[pos:pos+2] = struct.pack('<H', main_color)
+
+        # Restore skin colors for this palette
+        for i, color_bytes in enumerate(palette_skin_colors):
+            pos = palette_offset + ((11 + i) * 2)
+            if pos + 2 <= len(data) and color_bytes:
+                data[pos:pos+2] = color_bytes
 
-    return True
+def build_palette(block: bytearray, spec: ThemeSpec) -> None:
+    """ThemeBatch builder: apply the spec's colors to the palette block."""
+    apply_meliadoul_theme_armor_only(block, spec.colors["primary"], spec.colors.get("accent"))
 
 def generate_all_themes():
     """Generate 50 creative themes for Meliadoul with preserved face colors."""
@@ -278,33 +267,11 @@ def generate_all_themes():
         ("redemption_mail", "#DC143C", "#F5F5F5"),
     ]
 
-    # Generate each theme
-    for i, (theme_name, primary, accent) in enumerate(themes, 1):
-        print(f"\n[{i}/50] Generating theme: {theme_name}")
-
-        # Create .bin file
-        output_bin = os.path.join(output_base, f"meliadoul_{theme_name}.bin")
-        success = create_meliadoul_theme_armor_only(input_sprite, output_bin, primary, accent, theme_name)
-
-        if success:
-            # Generate PNG preview
-            output_png = os.path.join(output_base, f"meliadoul_{theme_name}.png")
-            try:
-                # Use the convert_sprite_sw.py script to generate PNG
-                cmd = [
-                    "python",
-                    "scripts/convert_sprite_sw.py",
-                    output_bin,
-                    output_png,
-                    "--preview"
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    print(f"  [OK] Generated PNG preview: {output_png}")
-                else:
-                    print(f"  [ERROR] Failed to generate PNG: {result.stderr}")
-            except Exception as e:
-                print(f"  [ERROR] Error generating PNG: {e}")
+    # Build every theme (.bin + PNG preview) in one parallel batch
+    batch = ThemeBatch(input_sprite, output_base, builder=build_palette,
+                       bin_name="meliadoul_{name}.bin", preview_name="meliadoul_{name}.png")
+    batch.run([ThemeSpec(name, {"primary": primary, "accent": accent})
+               for name, primary, accent in themes])
 
     print(f"\n[COMPLETE] Generated 50 themes for Meliadoul (armor colors only)")
     print(f"[COMPLETE] Face/skin colors preserved from original")
@@ -1,180 +1,129 @@
 #!/usr/bin/env python
 """
-Reverse-engineer the real source bin for the Hydra/Tiamat monster family.
-
-The family was deferred because the assumed bin (battle_hebi_spr.bin, "snake")
-has only palette 0 populated and its pixels don't match the Tiamat HD BMP. This
-tool re-derives the answer from scratch across ALL plausible candidate bins:
-
-  - reports, per bin, how many of palettes 0/1/2 are "populated" (have real,
+Reverse-engineer the source bin of a monster family from its HD BMPs.
+
+Written for the Hydra/Tiamat family, which was deferred because the assumed bin
+(battle_hebi_spr.bin, "snake") has only palette 0 populated and its pixels don't
+match the Tiamat HD BMP. Instead of scoring a hand-picked candidate list, every
+palette of every bin in the unit folder is matched against the embedded 16-color
+palette of every selected HD BMP in one batched search (fftsprite.PaletteMatcher):
+the BMP's indices are 1:1 with the bin palette that paints it, so the right bin's
+palette is the nearest one in Lab space.
+
+  - for each BMP, the top-k (bin, palette) matches by mean Lab distance over
+    indices 1..15 (BMP colors quantized to the bins' 5-bit grid first);
+  - per matched bin, how many of palettes 0/1/2 are "populated" (have real,
     distinct colors vs all-black/empty) -> a 3-tier family needs 0/1/2 all live;
-  - decodes palettes 0/1/2 to hex so the tier color story is visible;
-  - extracts the embedded 16-color palette from each Tiamat HD BMP and scores how
-    well each bin-palette matches each BMP-palette (the BMP's indices are 1:1 with
-    the bin palette that paints it, so the right bin's pal0 ~= the BMP's palette).
+  - the bin that wins the most BMPs, with its tier palettes decoded to hex.
 
-Usage: python scripts/monster/analyze_hydra_candidates.py
+Usage: python scripts/monster/analyze_hydra_candidates.py [--family Tiamat] [--bmp FILE ...]
+                                                          [--unit DIR] [--sprites DIR]
+                                                          [--top 5] [--min-live 3]
 """
 
-import struct
+import argparse
+import os
+import sys
+from collections import Counter
 from pathlib import Path
 
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+from fftsprite.catalog import bmp_palette
+
+REPO_DIR = Path(__file__).resolve().parents[2]
 UNIT = Path(r"C:\Users\ptyRa\OneDrive\Desktop\Pac Files\0002\fftpack\unit")
 SPRITES = Path(r"C:\Users\ptyRa\OneDrive\Desktop\Extracted Game Files\extracted_sprites")
-
-# Candidate bins to test as the Hydra/Tiamat source. dora1 = confirmed Dragon
-# family (control). hebi = the old (rejected) guess. dora2/dora22/adora = the
-# unexamined leads.
-CANDIDATE_BINS = [
-    "battle_hebi_spr.bin",     # old guess (snake)
-    "battle_dora2_spr.bin",    # lead
-    "battle_dora22_sp2.bin",   # lead
-    "battle_adora_spr.bin",    # lead
-    "battle_dora1_spr.bin",    # control = known Dragon family (green/blue/red)
-]
+# Without the extracted game files, fall back to the vanilla bins and HD sheets in the repo.
+REPO_UNIT = REPO_DIR / "ColorMod" / "FFTIVC" / "data" / "enhanced" / "fftpack" / "unit" / "sprites_original"
+REPO_SPRITES = REPO_DIR / "ColorMod" / "Images"
 
 # The HD textures the bestiary labels "Tiamat" (the Hydra family's top tier).
-TIAMAT_BMPS = ["1098_Tiamat_hd.bmp", "1099_Tiamat_hd.bmp", "1136_Tiamat_2_hd.bmp"]
-
-
-def decode_bgr555(word):
-    """FFT palette word -> (r,g,b) 0..248, XBBBBBGGGGGRRRRR (5 bits each, *8)."""
-    r = (word & 0x1F) * 8
-    g = ((word >> 5) & 0x1F) * 8
-    b = ((word >> 10) & 0x1F) * 8
-    return (r, g, b)
-
-
-def read_bin_palettes(path):
-    """Return list of 16 palettes, each a list of 16 (r,g,b). 512-byte region."""
-    data = path.read_bytes()[:512]
-    pals = []
-    for p in range(16):
-        pal = []
-        for i in range(16):
-            off = (p * 16 + i) * 2
-            word = struct.unpack_from("<H", data, off)[0]
-            pal.append(decode_bgr555(word))
-        pals.append(pal)
-    return pals
-
-
-def palette_liveness(pal):
-    """How 'real' a palette is: count of distinct non-black colors (index 0 is
-    transparent, so skip it). Empty/all-black palettes score ~0-1."""
-    distinct = set()
-    for i, (r, g, b) in enumerate(pal):
-        if i == 0:
-            continue
-        if (r, g, b) != (0, 0, 0):
-            distinct.add((r, g, b))
-    return len(distinct)
-
+DEFAULT_FAMILY = "Tiamat"
 
-def read_bmp_palette(path):
-    """Extract the 16-entry palette from a 4bpp indexed BMP (RGBQUAD: B,G,R,0)."""
-    data = path.read_bytes()
-    # BITMAPFILEHEADER(14) + biSize. Palette starts at 14 + biSize.
-    bi_size = struct.unpack_from("<I", data, 14)[0]
-    bpp = struct.unpack_from("<H", data, 28)[0]
-    clr_used = struct.unpack_from("<I", data, 46)[0]
-    n = clr_used if clr_used else (1 << bpp)
-    n = min(n, 16)
-    base = 14 + bi_size
-    pal = []
-    for i in range(n):
-        b, g, r, _ = data[base + i * 4: base + i * 4 + 4]
-        pal.append((r, g, b))
-    return pal, bpp
 
+def find_bmps(sprites_dir, family):
+    """HD BMPs under sprites_dir whose name contains family (case-insensitive; None = all)."""
+    paths = sorted(Path(sprites_dir).rglob("*.bmp"))
+    if family:
+        paths = [p for p in paths if family.lower() in p.name.lower()]
+    return paths
 
-def quantize555(c):
-    """Quantize an 8-bit channel triple to the bin's 5-bit*8 grid for fair compare."""
-    return tuple((v // 8) * 8 for v in c)
 
-
-def palette_match_score(bin_pal, bmp_pal):
-    """Lower = better. Sum of per-index nearest-channel distance after quantizing
-    the BMP palette to the 5-bit grid. Compares indices 1..15 (skip transparent)."""
-    total = 0
-    n = min(len(bin_pal), len(bmp_pal))
-    for i in range(1, n):
-        a = bin_pal[i]
-        b = quantize555(bmp_pal[i])
-        total += sum(abs(x - y) for x, y in zip(a, b))
-    return total
+def load_targets(paths):
+    """(paths kept, (M, 16) BGR555 palettes) for the BMPs that carry or pair with a palette."""
+    kept, words = [], []
+    for path in paths:
+        palette = bmp_palette(path)
+        if palette is None:
+            print(f"  {path.name:28} no indexed palette - skipped")
+            continue
+        kept.append(path)
+        words.append(palette)
+    return kept, np.array(words, dtype=np.uint16).reshape(-1, fftsprite.COLORS_PER_PALETTE)
 
 
-def hexs(pal):
-    return " ".join(f"{r:02x}{g:02x}{b:02x}" for (r, g, b) in pal)
+def hexs(words):
+    return " ".join(f"{r:02x}{g:02x}{b:02x}" for r, g, b in fftsprite.bgr555_to_rgb(words))
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Find the source bin of HD BMP sheets by palette")
+    parser.add_argument("--family", default=DEFAULT_FAMILY,
+                        help="Match BMPs whose name contains this ('' = every BMP)")
+    parser.add_argument("--bmp", nargs="+", type=Path, help="Match these BMPs instead of a family")
+    parser.add_argument("--unit", type=Path, default=UNIT if UNIT.exists() else REPO_UNIT,
+                        help="Folder of sprite bins to search")
+    parser.add_argument("--sprites", type=Path, default=SPRITES if SPRITES.exists() else REPO_SPRITES,
+                        help="Folder searched (recursively) for HD BMPs")
+    parser.add_argument("--top", type=int, default=5, help="Matches to list per BMP")
+    parser.add_argument("--min-live", type=int, default=3,
+                        help="Ignore bin palettes with fewer distinct non-black colors")
+    args = parser.parse_args()
+
     print("=" * 78)
-    print("HYDRA / TIAMAT SOURCE-BIN INVESTIGATION")
+    print("MONSTER SOURCE-BIN SEARCH" + (f" - {args.family}" if args.family and not args.bmp else ""))
     print("=" * 78)
 
-    # --- 1. Palette liveness + tier colors per candidate bin ------------------
-    bin_pals = {}
-    print("\n[1] Palette liveness (distinct non-black colors per palette; need 0/1/2 all live)\n")
-    for name in CANDIDATE_BINS:
-        path = UNIT / name
-        if not path.exists():
-            print(f"  {name:28} MISSING")
-            continue
-        pals = read_bin_palettes(path)
-        bin_pals[name] = pals
-        live = [palette_liveness(pals[i]) for i in range(16)]
-        tier_live = live[:3]
-        verdict = "3-TIER OK" if all(v >= 3 for v in tier_live) else "NOT 3-tier"
-        print(f"  {name:28} pal0/1/2 distinct = {tier_live}   {verdict}")
-        # show how many of the 16 palettes are live at all
-        live_count = sum(1 for v in live if v >= 3)
-        print(f"  {'':28} ({live_count}/16 palettes populated)")
-
-    # --- 2. Tier color story for each live candidate --------------------------
-    print("\n[2] Decoded tier palettes (pal0=tier I, pal1=tier II, pal2=tier III)\n")
-    for name, pals in bin_pals.items():
-        print(f"  {name}")
-        for t in range(3):
-            print(f"     pal{t}: {hexs(pals[t])}")
+    matcher = fftsprite.PaletteMatcher.from_bins(args.unit.glob("*.bin"))
+    if not matcher.paths:
+        print(f"\n  no sprite bins in {args.unit}")
+        return 1
+    bmps, targets = load_targets(args.bmp or find_bmps(args.sprites, args.family or None))
+    print(f"\n  {len(matcher.paths)} bins x {matcher.palette_count} palettes ({args.unit})")
+    print(f"  {len(bmps)} HD BMPs ({args.sprites if not args.bmp else 'command line'})")
+    if not bmps:
+        print("\nNothing to match.")
+        return 1
+
+    # --- 1. One batched distance matrix, top-k per BMP --------------------------
+    hits = matcher.match(targets, k=args.top, min_live=args.min_live)
+    live = matcher.live.reshape(len(matcher.paths), -1)
+    index = {path: i for i, path in enumerate(matcher.paths)}
+    print("\n[1] Closest bin palettes per BMP (mean Lab distance, indices 1-15; LOWER = better)\n")
+    for bmp, words, bmp_hits in zip(bmps, targets, hits):
+        print(f"  {bmp.name}")
+        print(f"     bmp : {hexs(words)}")
+        for distance, path, palette in bmp_hits:
+            tiers = live[index[path], :3].tolist()
+            print(f"     {distance:6.2f}  {path.name:28} pal{palette:<2}  pal0/1/2 distinct = {tiers}")
         print()
 
-    # --- 3. Embedded BMP palettes --------------------------------------------
-    print("[3] Tiamat HD BMP embedded palettes\n")
-    bmp_pals = {}
-    for bmp in TIAMAT_BMPS:
-        path = SPRITES / bmp
-        if not path.exists():
-            print(f"  {bmp:24} MISSING")
-            continue
-        pal, bpp = read_bmp_palette(path)
-        bmp_pals[bmp] = pal
-        print(f"  {bmp:24} ({bpp}bpp): {hexs(pal)}")
-    print()
-
-    # --- 4. Cross-match: which bin palette best matches each BMP palette -------
-    print("[4] Match scores (bin palette vs BMP palette; LOWER = better fit)\n")
-    print(f"  {'bin / palette':34}" + "".join(f"{b[:14]:>16}" for b in bmp_pals))
-    for name, pals in bin_pals.items():
+    # --- 2. Verdict: the bin that paints the most BMPs -------------------------
+    votes = Counter(bmp_hits[0][1] for bmp_hits in hits if bmp_hits)
+    print("[2] Bins that paint the most BMPs (top-1 votes)\n")
+    for path, count in votes.most_common(3):
+        words = matcher.words[index[path]]
+        tiers = live[index[path], :3]
+        verdict = "3-TIER OK" if all(v >= args.min_live for v in tiers) else "NOT 3-tier"
+        print(f"  {path.name:28} {count}/{len(bmps)} BMPs   {verdict}")
         for t in range(3):
-            row = f"  {name+' pal'+str(t):34}"
-            for bmp, bpal in bmp_pals.items():
-                row += f"{palette_match_score(pals[t], bpal):16d}"
-            print(row)
-    print()
-
-    # --- 5. Verdict -----------------------------------------------------------
-    print("[5] Best bin-palette match per BMP\n")
-    for bmp, bpal in bmp_pals.items():
-        best = None
-        for name, pals in bin_pals.items():
-            for t in range(3):
-                score = palette_match_score(pals[t], bpal)
-                if best is None or score < best[0]:
-                    best = (score, name, t)
-        print(f"  {bmp:24} -> {best[1]} pal{best[2]}  (score {best[0]})")
+            print(f"     pal{t}: {hexs(words[t])}")
+        print()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -4,32 +4,13 @@ centered, neighbor-free explicit-rect FrameLayout (common cell = max of the two
 centered on each), print the FrameLayout.Rects(...) C# call, and render a 4-frame preview.
 Usage: python pick_poses.py <bmp> <swIdx> <nwIdx> <out_preview.png> [pad=4]
 """
-import sys, struct, zlib, subprocess, os
-from collections import deque
+import sys, subprocess, os
+from detect_bmp_poses import load_bmp, detect_poses
 bmp, swIdx, nwIdx, outp = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
 pad = int(sys.argv[5]) if len(sys.argv) > 5 else 4
-b=open(bmp,'rb').read()
-off=struct.unpack('<I',b[10:14])[0]; W=struct.unpack('<i',b[18:22])[0]; H=struct.unpack('<i',b[22:26])[0]
-rowb=((W*4+31)//32)*4
-def idx(x,y):
-    if not(0<=x<W and 0<=y<H):return 0
-    sy=H-1-y; byte=b[off+sy*rowb+x//2]
-    return (byte>>4)&0xF if x%2==0 else byte&0xF
-# Reproduce detect_bmp_poses box detection + ordering exactly.
-G=[[idx(x,y) for x in range(W)] for y in range(H)]
-vis=[[False]*W for _ in range(H)]; boxes=[]
-for y in range(H):
-    for x in range(W):
-        if G[y][x]==0 or vis[y][x]: continue
-        q=deque([(y,x)]); vis[y][x]=True; n=0; x0=x1=x; y0=y1=y
-        while q:
-            cy,cx=q.popleft(); n+=1; x0=min(x0,cx);x1=max(x1,cx);y0=min(y0,cy);y1=max(y1,cy)
-            for dy,dx in((-1,0),(1,0),(0,-1),(0,1)):
-                ny,nx=cy+dy,cx+dx
-                if 0<=ny<H and 0<=nx<W and not vis[ny][nx] and G[ny][nx]!=0:
-                    vis[ny][nx]=True; q.append((ny,nx))
-        if n>=300 and (x1-x0)>=24 and (y1-y0)>=24: boxes.append([x0,y0,x1,y1])
-boxes.sort(key=lambda bx:(bx[1]//40,bx[0]))
+# Same box detection + ordering as detect_bmp_poses (shared code, so numbering matches).
+G, _ = load_bmp(bmp)
+boxes = detect_poses(G)
 sw=boxes[swIdx]; nw=boxes[nwIdx]
 sww,swh=sw[2]-sw[0]+1,sw[3]-sw[1]+1; nww,nwh=nw[2]-nw[0]+1,nw[3]-nw[1]+1
 cw=max(sww,nww)+pad; ch=max(swh,nwh)+pad
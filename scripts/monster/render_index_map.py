@@ -11,9 +11,13 @@ ODD pixel = high nibble. Index 0 is transparent.
 Usage: python render_index_map.py <battle_x_spr.bin> <out_dir> [palette_index=0] [scale=2]
 """
 import sys, os, struct, zlib
-from collections import Counter
 
-PAL_BYTES, WIDTH = 512, 256
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
+PAL_BYTES, WIDTH = fftsprite.PALETTE_BYTES, fftsprite.SHEET_WIDTH
 # 15 distinct colors for indices 1..15 (0 = transparent)
 DISTINCT = {1:(230,30,30),2:(255,255,255),3:(40,80,240),4:(240,230,40),5:(230,40,230),
             6:(40,220,220),7:(245,140,20),8:(150,230,40),9:(150,40,200),10:(40,220,40),
@@ -29,46 +33,31 @@ def main():
     h = npx // WIDTH
     base = os.path.splitext(os.path.basename(binp))[0]
 
-    def idx(i):
-        b = d[PAL_BYTES + (i // 2)]
-        return (b & 0x0F) if i % 2 == 0 else ((b >> 4) & 0x0F)
-
-    def real(i):
-        k = idx(i)
-        if k == 0: return (0, 0, 0, 0)
-        o = pal_index * 32 + k * 2
-        v = d[o] | (d[o + 1] << 8)
-        return ((v & 31) * 8, ((v >> 5) & 31) * 8, ((v >> 10) & 31) * 8, 255)
-
-    def dist(i):
-        k = idx(i)
-        return (0, 0, 0, 0) if k == 0 else (*DISTINCT[k], 255)
+    # Whole sheet decoded once; the two renders are just palette lookups over it.
+    sheet = fftsprite.decode_pixels(d)
+    real = fftsprite.read_palette_rgba(d, pal_index, mode="shift")
+    dist = np.zeros((16, 4), dtype=np.uint8)
+    for k, rgb in DISTINCT.items():
+        dist[k] = (*rgb, 255)
 
-    def write_png(path, fn):
+    def write_png(path, table):
         def ch(t, da):
             c = t + da
             return struct.pack('>I', len(da)) + c + struct.pack('>I', zlib.crc32(c) & 0xffffffff)
-        raw = bytearray()
-        for y in range(h):
-            line = bytearray()
-            for x in range(WIDTH):
-                r, g, b, a = fn(y * WIDTH + x)
-                line += bytes((r, g, b, a))
-            big = bytearray()
-            for x in range(WIDTH):
-                big += line[x * 4:x * 4 + 4] * scale
-            for _ in range(scale):
-                raw.append(0); raw += big
+        rgba = fftsprite.apply_palette(sheet[:h], table)
+        rgba = rgba.repeat(scale, axis=0).repeat(scale, axis=1)
+        raw = np.zeros((h * scale, WIDTH * scale * 4 + 1), dtype=np.uint8)  # col 0 = filter type 0
+        raw[:, 1:] = rgba.reshape(h * scale, -1)
         png = (b'\x89PNG\r\n\x1a\n'
                + ch(b'IHDR', struct.pack('>IIBBBBB', WIDTH * scale, h * scale, 8, 6, 0, 0, 0))
-               + ch(b'IDAT', zlib.compress(bytes(raw), 9)) + ch(b'IEND', b''))
+               + ch(b'IDAT', zlib.compress(raw.tobytes(), 9)) + ch(b'IEND', b''))
         open(path, 'wb').write(png)
 
     write_png(os.path.join(outdir, base + '_indexmap.png'), dist)
     write_png(os.path.join(outdir, base + '_real.png'), real)
-    counts = Counter(idx(i) for i in range(npx))
+    counts = np.bincount(sheet.reshape(-1)[:npx], minlength=16)
     print(f"sheet {WIDTH}x{h}, palette {pal_index}")
-    print("pixel count per index:", dict(sorted(counts.items())))
+    print("pixel count per index:", {k: int(n) for k, n in enumerate(counts) if n})
     print("legend:", DISTINCT)
 
 
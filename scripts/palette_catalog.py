@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Build and query the SQLite palette catalog (fftsprite.PaletteCatalog).
+
+The catalog indexes every unit bin palette, HD BMP sheet palette and TEX
+color-index histogram, with each color stored as BGR555, RGB and CIE Lab.
+ingest only reads new or changed files. The database defaults to
+.palette_cache/palette_catalog.sqlite. It is a build artifact, so it lives
+outside ColorMod/Data and never ships with the mod.
+
+Usage:
+    python scripts/palette_catalog.py ingest [--force]
+    python scripts/palette_catalog.py find [--index 3] [--color "#000000"] [--palette 0]
+                                           [--kind bin|bmp] [--theme NAME]
+    python scripts/palette_catalog.py nearest <sheet.bmp | sprite.bin> [--palette 0] [--limit 10]
+                                              [--kind bin|bmp]
+    python scripts/palette_catalog.py sql "SELECT theme, count(*) FROM files GROUP BY theme"
+
+Every command takes --db PATH to use a different database file.
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from fftsprite.catalog import CATALOG_PATH, PaletteCatalog, bmp_palette
+from fftsprite.codec import bgr555_to_rgb, parse_color
+from fftsprite.mapped import MappedFile
+
+
+def target_palette(path, palette):
+    """(16, 3) RGB palette of a BMP sheet or one palette of a sprite bin.
+
+    BMP sheets go through bmp_palette, as ingest does, so the query sits on
+    the same BGR555 grid as the catalog rows.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".bmp":
+        words = bmp_palette(path)
+        if words is None:
+            raise ValueError(f"{path}: RGB sheet with no indexed original/{path.name} to pair with")
+        return bgr555_to_rgb(words)
+    with MappedFile(path) as sprite:
+        return bgr555_to_rgb(sprite.palettes[palette])
+
+
+def cmd_ingest(args):
+    start = time.perf_counter()
+    with PaletteCatalog(args.db) as catalog:
+        catalog.ingest(force=args.force)
+        files, colors = catalog.sql("SELECT (SELECT count(*) FROM files), (SELECT count(*) FROM colors)")[0]
+    print(f"Catalog {args.db}: {files} files, {colors} colors ({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+def cmd_find(args):
+    rgb = parse_color(args.color) if args.color else None
+    with PaletteCatalog(args.db) as catalog:
+        start = time.perf_counter()
+        rows = catalog.find(idx=args.index, rgb=rgb, palette=args.palette, kind=args.kind, theme=args.theme)
+        elapsed = time.perf_counter() - start
+    for path, theme, _, palette, idx, word in rows[:args.limit]:
+        print(f"  {path}  palette {palette} index {idx}  0x{word:04X}  ({theme})")
+    if len(rows) > args.limit:
+        print(f"  ... {len(rows) - args.limit} more")
+    print(f"{len(rows)} matches, {len({r[0] for r in rows})} files ({elapsed * 1000:.1f} ms)")
+    return 0
+
+
+def cmd_nearest(args):
+    rgb = target_palette(args.sheet, args.palette)
+    with PaletteCatalog(args.db) as catalog:
+        start = time.perf_counter()
+        rows = catalog.nearest(rgb, limit=args.limit, kind=args.kind)
+        elapsed = time.perf_counter() - start
+    for distance, path, theme, _, palette in rows:
+        print(f"  {distance:6.2f}  {path}  palette {palette}  ({theme})")
+    print(f"{len(rows)} palettes ({elapsed * 1000:.1f} ms)")
+    return 0
+
+
+def cmd_sql(args):
+    with PaletteCatalog(args.db) as catalog:
+        for row in catalog.sql(args.query):
+            print("  " + " | ".join(str(v) for v in row))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite catalog of sprite, TEX and BMP palettes")
+    parser.add_argument("--db", type=Path, default=CATALOG_PATH, help="Catalog database file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="Add new and changed files, drop removed ones")
+    p.add_argument("--force", action="store_true", help="Re-read every file")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("find", help="Palette entries matching an index and/or color")
+    p.add_argument("--index", type=int, help="Color index (0-15)")
+    p.add_argument("--color", help="Color as #RRGGBB (matched as BGR555)")
+    p.add_argument("--palette", type=int, help="Palette number (0-15)")
+    p.add_argument("--kind", choices=("bin", "bmp"), help="Only unit bins or only BMP sheets")
+    p.add_argument("--theme", help="Only this theme")
+    p.add_argument("--limit", type=int, default=50, help="Rows to print")
+    p.set_defaults(func=cmd_find)
+
+    p = sub.add_parser("nearest", help="Palettes closest to a BMP sheet or sprite bin palette")
+    p.add_argument("sheet", help="Indexed or themed BMP sheet, or a sprite .bin")
+    p.add_argument("--palette", type=int, default=0, help="Palette of a .bin to match")
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--kind", choices=("bin", "bmp"))
+    p.set_defaults(func=cmd_nearest)
+
+    p = sub.add_parser("sql", help="Run a read-only query against the catalog")
+    p.add_argument("query")
+    p.set_defaults(func=cmd_sql)
+
+    args = parser.parse_args()
+    try:
+        return args.func(args)
+    except (ValueError, KeyError, OSError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,16 @@
 """Generate 50 varied themes for Rapha with diverse color combinations."""
 
 import os
+import sys
 import struct
-import shutil
 from typing import Tuple
 from pathlib import Path
-import subprocess
 import random
 
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from theme_batch import ThemeBatch, ThemeSpec
+
 def rgb_to_fft_color(r: int, g: int, b: int) -> int:
     """Convert RGB (0-255) to FFT 16-bit color format (XBBBBBGGGGGRRRRR)."""
     r5 = (r >> 3) & 0x1F
@@ -33,16 +36,9 @@ def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
-def create_rapha_theme(input_path: str, output_path: str, primary_hex: str,
-                      accent_hex: str = None, theme_name: str = "custom",
-                      variation_style: str = "standard"):
-    """Create a themed Rapha sprite with various color application styles."""
-
-    # Create output directory
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-    # Copy original sprite
-    shutil.copy2(input_path, output_path)
+def apply_rapha_theme(data: bytearray, primary_hex: str,
+                      accent_hex: str = None, variation_style: str = "standard"):
+    """Apply a Rapha color application style to a palette block (edited in place)."""
 
     # Parse colors
     primary_r, primary_g, primary_b = hex_to_rgb(primary_hex)
@@ -54,106 +50,98 @@ def create_rapha_theme(input_path: str, output_path: str, primary_hex: str,
         accent_g = 255 - primary_g
         accent_b = 255 - primary_b
 
-    print(f"Creating {theme_name} theme ({variation_style} style)...")
-
-    # Open and modify the sprite
-    with open(output_path, 'r+b') as f:
-        data = bytearray(f.read())
-
-        if variation_style == "standard":
-            # Standard theme approach
-            main_color = rgb_to_fft_color(primary_r, primary_g, primary_b)
+    if variation_style == "standard":
+        # Standard theme approach
+        main_color = rgb_to_fft_color(primary_r, primary_g, primary_b)
+        edge_r, edge_g, edge_b = darken_color(primary_r, primary_g, primary_b, 0.75)
+        edge_color = rgb_to_fft_color(edge_r, edge_g, edge_b)
+        shadow_r, shadow_g, shadow_b = darken_color(primary_r, primary_g, primary_b, 0.5)
+        shadow_color = rgb_to_fft_color(shadow_r, shadow_g, shadow_b)
+        accent_color = rgb_to_fft_color(accent_r, accent_g, accent_b)
+        accent_dark = rgb_to_fft_color(*darken_color(accent_r, accent_g, accent_b, 0.7))
+
+        # Apply standard coloring
+        data[6:8] = struct.pack('<H', accent_dark)    # Index 3
+        data[8:10] = struct.pack('<H', accent_color)  # Index 4
+        data[10:12] = struct.pack('<H', accent_dark)  # Index 5
+        data[12:14] = struct.pack('<H', main_color)   # Index 6
+        data[14:16] = struct.pack('<H', edge_color)   # Index 7
+        data[16:18] = struct.pack('<H', main_color)   # Index 8
+        data[18:20] = struct.pack('<H', shadow_color) # Index 9
+        data[20:22] = struct.pack('<H', main_color)   # Index 10
+
+    elif variation_style == "gradient":
+        # Gradient from primary to accent
+        for i in range(6, 11):
+            t = (i - 6) / 4.0
+            grad_r = int(primary_r * (1-t) + accent_r * t)
+            grad_g = int(primary_g * (1-t) + accent_g * t)
+            grad_b = int(primary_b * (1-t) + accent_b * t)
+            pos = i * 2
+            data[pos:pos+2] = struct.pack('<H', rgb_to_fft_color(grad_r, grad_g, grad_b))
+
+    elif variation_style == "inverted":
+        # Inverted - accent as main, primary as trim
+        main_color = rgb_to_fft_color(accent_r, accent_g, accent_b)
+        trim_color = rgb_to_fft_color(primary_r, primary_g, primary_b)
+        data[6:8] = struct.pack('<H', trim_color)     # Index 3
+        data[8:10] = struct.pack('<H', trim_color)    # Index 4
+        data[10:12] = struct.pack('<H', trim_color)   # Index 5
+        data[12:14] = struct.pack('<H', main_color)   # Index 6
+        data[14:16] = struct.pack('<H', main_color)   # Index 7
+        data[16:18] = struct.pack('<H', main_color)   # Index 8
+        data[18:20] = struct.pack('<H', main_color)   # Index 9
+        data[20:22] = struct.pack('<H', main_color)   # Index 10
+
+    elif variation_style == "pastel":
+        # Pastel version - lightened colors
+        light_r, light_g, light_b = lighten_color(primary_r, primary_g, primary_b, 0.5)
+        accent_light_r, accent_light_g, accent_light_b = lighten_color(accent_r, accent_g, accent_b, 0.5)
+        main_color = rgb_to_fft_color(light_r, light_g, light_b)
+        accent_color = rgb_to_fft_color(accent_light_r, accent_light_g, accent_light_b)
+
+        data[6:8] = struct.pack('<H', accent_color)   # Index 3
+        data[8:10] = struct.pack('<H', accent_color)  # Index 4
+        data[10:12] = struct.pack('<H', accent_color) # Index 5
+        data[12:14] = struct.pack('<H', main_color)   # Index 6-10
+        data[14:16] = struct.pack('<H', main_color)
+        data[16:18] = struct.pack('<H', main_color)
+        data[18:20] = struct.pack('<H', main_color)
+        data[20:22] = struct.pack('<H', main_color)
+
+    elif variation_style == "metallic":
+        # Metallic sheen effect
+        sheen_r = min(255, primary_r + 50)
+        sheen_g = min(255, primary_g + 50)
+        sheen_b = min(255, primary_b + 50)
+        main_color = rgb_to_fft_color(primary_r, primary_g, primary_b)
+        sheen_color = rgb_to_fft_color(sheen_r, sheen_g, sheen_b)
+        dark_color = rgb_to_fft_color(*darken_color(primary_r, primary_g, primary_b, 0.6))
+
+        data[6:8] = struct.pack('<H', sheen_color)    # Index 3
+        data[8:10] = struct.pack('<H', sheen_color)   # Index 4
+        data[10:12] = struct.pack('<H', main_color)   # Index 5
+        data[12:14] = struct.pack('<H', main_color)   # Index 6
+        data[14:16] = struct.pack('<H', main_color)   # Index 7
+        data[16:18] = struct.pack('<H', main_color)   # Index 8
+        data[18:20] = struct.pack('<H', dark_color)   # Index 9
+        data[20:22] = struct.pack('<H', dark_color)   # Index 10
+
+    # Apply to additional palettes for consistency
+    for palette in range(1, 4):
+        palette_offset = palette * 32
+        # Copy some color consistency across palettes
+        if variation_style in ["standard", "gradient"]:
+            edge_pos = palette_offset + (7 * 2)
+            shadow_pos = palette_offset + (9 * 2)
             edge_r, edge_g, edge_b = darken_color(primary_r, primary_g, primary_b, 0.75)
-            edge_color = rgb_to_fft_color(edge_r, edge_g, edge_b)
             shadow_r, shadow_g, shadow_b = darken_color(primary_r, primary_g, primary_b, 0.5)
-            shadow_color = rgb_to_fft_color(shadow_r, shadow_g, shadow_b)
-            accent_color = rgb_to_fft_color(accent_r, accent_g, accent_b)
-            accent_dark = rgb_to_fft_color(*darken_color(accent_r, accent_g, accent_b, 0.7))
-
-            # Apply standard coloring
-            data[6:8] = struct.pack('<H', accent_dark)    # Index 3
-            data[8:10] = struct.pack('<H', accent_color)  # Index 4
-            data[10:12] = struct.pack('<H', accent_dark)  # Index 5
-            data[12:14] = struct.pack('<H', main_color)   # Index 6
-            data[14:16] = struct.pack('<H', edge_color)   # Index 7
-            data[16:18] = struct.pack('<H', main_color)   # Index 8
-            data[18:20] = struct.pack('<H', shadow_color) # Index 9
-            data[20:22] = struct.pack('<H', main_color)   # Index 10
-
-        elif variation_style == "gradient":
-            # Gradient from primary to accent
-            for i in range(6, 11):
-                t = (i - 6) / 4.0
-                grad_r = int(primary_r * (1-t) + accent_r * t)
-                grad_g = int(primary_g * (1-t) + accent_g * t)
-                grad_b = int(primary_b * (1-t) + accent_b * t)
-                pos = i * 2
-                data[pos:pos+2] = struct.pack('<H', rgb_to_fft_color(grad_r, grad_g, grad_b))
-
-        elif variation_style == "inverted":
-            # Inverted - accent as main, primary as trim
-            main_color = rgb_to_fft_color(accent_r, accent_g, accent_b)
-            trim_color = rgb_to_fft_color(primary_r, primary_g, primary_b)
-            data[6:8] = struct.pack('<H', trim_color)     # Index 3
-            data[8:10] = struct.pack('<H', trim_color)    # Index 4
-            data[10:12] = struct.pack('<H', trim_color)   # Index 5
-            data[12:14] = struct.pack('<H', main_color)   # Index 6
-            data[14:16] = struct.pack('<H', main_color)   # Index 7
-            data[16:18] = struct.pack('<H', main_color)   # Index 8
-            data[18:20] = struct.pack('<H', main_color)   # Index 9
-            data[20:22] = struct.pack('<H', main_color)   # Index 10
-
-        elif variation_style == "pastel":
-            # Pastel version - lightened colors
-            light_r, light_g, light_b = lighten_color(primary_r, primary_g, primary_b, 0.5)
-            accent_light_r, accent_light_g, accent_light_b = lighten_color(accent_r, accent_g, accent_b, 0.5)
-            main_color = rgb_to_fft_color(light_r, light_g, light_b)
-            accent_color = rgb_to_fft_color(accent_light_r, accent_light_g, accent_light_b)
-
-            data[6:8] = struct.pack('<H', accent_color)   # Index 3
-            data[8:10] = struct.pack('<H', accent_color)  # Index 4
-            data[10:12] = struct.pack('<H', accent_color) # Index 5
-            data[12:14] = struct.pack('<H', main_color)   # Index 6-10
-            data[14:16] = struct.pack('<H', main_color)
-            data[16:18] = struct.pack('<H', main_color)
-            data[18:20] = struct.pack('<H', main_color)
-            data[20:22] = struct.pack('<H', main_color)
-
-        elif variation_style == "metallic":
-            # Metallic sheen effect
-            sheen_r = min(255, primary_r + 50)
-            sheen_g = min(255, primary_g + 50)
-            sheen_b = min(255, primary_b + 50)
-            main_color = rgb_to_fft_color(primary_r, primary_g, primary_b)
-            sheen_color = rgb_to_fft_color(sheen_r, sheen_g, sheen_b)
-            dark_color = rgb_to_fft_color(*darken_color(primary_r, primary_g, primary_b, 0.6))
-
-            data[6:8] = struct.pack('<H', sheen_color)    # Index 3
-            data[8:10] = struct.pack('<H', sheen_color)   # Index 4
-            data[10:12] = struct.pack('<H', main_color)   # Index 5
-            data[12:14] = struct.pack('<H', main_color)   # Index 6
-            data[14:16] = struct.pack('<H', main_color)   # Index 7
-            data[16:18] = struct.pack('<H', main_color)   # Index 8
-            data[18:20] = struct.pack('<H', dark_color)   # Index 9
-            data[20:22] = struct.pack('<H', dark_color)   # Index 10
-
-        # Apply to additional palettes for consistency
-        for palette in range(1, 4):
-            palette_offset = palette * 32
-            # Copy some color consistency across palettes
-            if variation_style in ["standard", "gradient"]:
-                edge_pos = palette_offset + (7 * 2)
-                shadow_pos = palette_offset + (9 * 2)
-                edge_r, edge_g, edge_b = darken_color(primary_r, primary_g, primary_b, 0.75)
-                shadow_r, shadow_g, shadow_b = darken_color(primary_r, primary_g, primary_b, 0.5)
-                data[edge_pos:edge_pos+2] = struct.pack('<H', rgb_to_fft_color(edge_r, edge_g, edge_b))
-                data[shadow_pos:shadow_pos+2] = struct.pack('<H', rgb_to_fft_color(shadow_r, shadow_g, shadow_b))
-
-        # Write back
-        f.seek(0)
-        f.write(data)
-
-    return True
+            data[edge_pos:edge_pos+2] = struct.pack('<H', rgb_to_fft_color(edge_r, edge_g, edge_b))
+            data[shadow_pos:shadow_pos+2] = struct.pack('<H', rgb_to_fft_color(shadow_r, shadow_g, shadow_b))
+
+def build_palette(block: bytearray, spec: ThemeSpec) -> None:
+    """ThemeBatch builder: apply the spec's colors to the palette block."""
+    apply_rapha_theme(block, spec.colors["primary"], spec.colors.get("accent"), spec.style)
 
 def generate_all_themes():
     """Generate 50 varied themes for Rapha."""
@@ -243,33 +231,11 @@ def generate_all_themes():
         ("entropy_flow", "#4B0082", "#8A2BE2", "gradient"),
     ]
 
-    # Generate each theme
-    for i, (theme_name, primary, accent, style) in enumerate(themes, 1):
-        print(f"\n[{i}/50] Generating theme: {theme_name}")
-
-        # Create .bin file
-        output_bin = os.path.join(output_base, f"rapha_{theme_name}.bin")
-        success = create_rapha_theme(input_sprite, output_bin, primary, accent, theme_name, style)
-
-        if success:
-            # Generate PNG preview
-            output_png = os.path.join(output_base, f"rapha_{theme_name}.png")
-            try:
-                # Use the convert_sprite_sw.py script to generate PNG
-                cmd = [
-                    "python",
-                    "scripts/convert_sprite_sw.py",
-                    output_bin,
-                    output_png,
-                    "--preview"
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    print(f"  [OK] Generated PNG preview: {output_png}")
-                else:
-                    print(f"  [ERROR] Failed to generate PNG: {result.stderr}")
-            except Exception as e:
-                print(f"  [ERROR] Error generating PNG: {e}")
+    # Build every theme (.bin + PNG preview) in one parallel batch
+    batch = ThemeBatch(input_sprite, output_base, builder=build_palette,
+                       bin_name="rapha_{name}.bin", preview_name="rapha_{name}.png")
+    batch.run([ThemeSpec(name, {"primary": primary, "accent": accent}, style)
+               for name, primary, accent, style in themes])
 
     print(f"\n[COMPLETE] Generated 50 varied themes for Rapha")
     print(f"[COMPLETE] Files saved to: {output_base}")
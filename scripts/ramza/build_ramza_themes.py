@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Build Ramza themes straight to RamzaThemes/<theme>/tex_830..835.bin.
+
+Theme definitions use RamzaThemeCreator's model (create_ramza_theme.py): an
+armor color and an optional accent color are expanded into shading
+variations and mapped onto each chapter's armor / accent colors, with
+hair and face colors preserved. A definitions file is a JSON map of theme
+name -> definition:
+
+    {
+      "dark_knight": {"armor": "#28282E", "accent": "#1E1E23"},
+      "royal_guard": {"armor": [40, 64, 160], "accent": "#FFD700", "preserve_hair": true}
+    }
+
+The six source sheets are the original indexed BMPs (830-835). Each one is
+decoded once, in the parent, and shipped to every worker. Because the
+sheets are 16-color indexed, a theme only recolors 16 palette entries. The
+themed sheet is then quantized back to the chapter's original palette by
+nearest RGB distance, which is how the sprite toolkit writes the shipped
+RamzaThemes TEX files. Those files are the whole 512-wide sheet, 4 bits
+per pixel, low nibble first. Every output is a lookup table applied to the
+decoded index sheet. The theme x chapter-file matrix fans out over a
+process pool (--workers 1 runs serially).
+
+Usage:
+  python build_ramza_themes.py themes.json [--themes a,b] [--out DIR] [--source-dir DIR]
+                                           [--images DIR] [--workers N]
+  python build_ramza_themes.py --theme NAME --armor "#RRGGBB" [--accent "#RRGGBB"]
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+from fftsprite.codec import parse_color
+from create_ramza_theme import RamzaThemeCreator
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+IMAGES_DIR = REPO_DIR / "ColorMod" / "Images"
+THEMES_DIR = REPO_DIR / "ColorMod" / "RamzaThemes"
+
+# (tex number, Images chapter folder, sheet name, RamzaThemeCreator chapter type)
+RAMZA_SHEETS = [
+    (830, "RamzaChapter1", "830_Ramuza_Ch1", "ch1"),
+    (831, "RamzaChapter1", "831_Ramuza_Ch1", "ch1"),
+    (832, "RamzaChapter23", "832_Ramuza_Ch23", "ch2"),
+    (833, "RamzaChapter23", "833_Ramuza_Ch23", "ch2"),
+    (834, "RamzaChapter4", "834_Ramuza_Ch4", "ch34"),
+    (835, "RamzaChapter4", "835_Ramuza_Ch4", "ch34"),
+]
+
+
+def find_source(source_dir, chapter_dir, sheet):
+    """The original sheet: Images/<chapter>/original/<sheet>.bmp, or a toolkit <sheet>_hd.bmp."""
+    source_dir = Path(source_dir)
+    for path in (source_dir / chapter_dir / "original" / f"{sheet}.bmp",
+                 source_dir / f"{sheet}_hd.bmp",
+                 source_dir / f"{sheet}.bmp"):
+        if path.exists():
+            return path
+    return None
+
+
+def decode_sheet(path):
+    """(indices (H, W) uint8, palette (16, 3) int) of an indexed sheet."""
+    img = Image.open(path)
+    if img.mode != "P":
+        raise ValueError(f"{path}: expected an indexed (16-color) sheet, got mode {img.mode}")
+    palette = np.array(img.getpalette()[:16 * 3], dtype=np.int32).reshape(-1, 3)
+    return np.array(img, dtype=np.uint8), palette
+
+
+def load_definitions(path):
+    """{theme: definition} from a JSON definitions file."""
+    themes = json.loads(Path(path).read_text(encoding="utf-8"))
+    for name, definition in themes.items():
+        if "armor" not in definition:
+            raise ValueError(f"{path}: theme '{name}' has no armor color")
+    return themes
+
+
+class RamzaThemeBatch:
+    """Builds the tex_830..835 set (and optional BMP sheets) for many Ramza themes."""
+
+    def __init__(self, source_dir=IMAGES_DIR, out_dir=THEMES_DIR, images_dir=None, workers=None):
+        self.source_dir = Path(source_dir)
+        self.out_dir = Path(out_dir)
+        self.images_dir = Path(images_dir) if images_dir else None
+        self.workers = workers
+        self.creator = RamzaThemeCreator()
+
+    def load_sources(self):
+        """{tex number: (indices, palette)} for every original sheet found; decoded once."""
+        sources, missing = {}, []
+        for tex, chapter_dir, sheet, _ in RAMZA_SHEETS:
+            path = find_source(self.source_dir, chapter_dir, sheet)
+            if path is None:
+                missing.append(sheet)
+            else:
+                sources[tex] = decode_sheet(path)
+        return sources, missing
+
+    def palette_maps(self, definition):
+        """{chapter type: ColorMap} for one theme definition."""
+        armor = parse_color(definition["armor"])
+        accent = parse_color(definition["accent"]) if definition.get("accent") else None
+        armor_variations = self.creator._generate_color_variations(armor, 4)
+        accent_variations = self.creator._generate_color_variations(accent, 3) if accent else None
+        preserve_hair = definition.get("preserve_hair", True)
+        return {chapter: fftsprite.ColorMap.from_dict(
+                    self.creator.chapter_color_map(chapter, armor_variations, accent_variations, preserve_hair))
+                for chapter in ("ch1", "ch2", "ch34")}
+
+    def _build_one(self, sources, job):
+        name, tex, maps = job
+        _, chapter_dir, sheet, chapter = next(s for s in RAMZA_SHEETS if s[0] == tex)
+        indices, palette = sources[tex]
+
+        # Theme the 16 palette entries, then snap each back to the nearest original entry.
+        themed, _ = maps[chapter].apply(palette[None])
+        themed = themed[0].astype(np.int32)
+        dist = ((themed[:, None, :] - palette[None, :, :]) ** 2).sum(axis=-1)
+        lut = dist.argmin(axis=1).astype(np.uint8)
+
+        target = self.out_dir / name
+        target.mkdir(parents=True, exist_ok=True)
+        (target / f"tex_{tex}.bin").write_bytes(fftsprite.pack_nibbles(lut[indices], low_first=True))
+        if self.images_dir is not None:
+            image_dir = self.images_dir / chapter_dir / name
+            image_dir.mkdir(parents=True, exist_ok=True)
+            Image.fromarray(themed.astype(np.uint8)[indices], "RGB").save(image_dir / f"{sheet}.bmp", "BMP")
+        return name, tex
+
+    def run(self, themes, verbose=True):
+        """Build every theme in {name: definition}; returns (built (name, tex) pairs, missing sheets)."""
+        sources, missing = self.load_sources()
+        jobs = []
+        for name, definition in themes.items():
+            maps = self.palette_maps(definition)
+            jobs.extend((name, tex, maps) for tex in sources)
+        workers = self.workers or min(len(jobs), os.cpu_count() or 1)
+
+        if workers <= 1:
+            built = [self._build_one(sources, job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self, sources)) as pool:
+                chunk = max(1, len(jobs) // (workers * 4))
+                built = list(pool.map(_run_worker, jobs, chunksize=chunk))
+
+        if verbose:
+            for sheet in missing:
+                print(f"  Skipping {sheet} - source not found")
+            for name in themes:
+                print(f"  {name}: {sum(1 for n, _ in built if n == name)} TEX files -> {self.out_dir / name}")
+        return built, missing
+
+
+# Per-process state for pool workers: the batch and the decoded sheets,
+# shipped once per worker instead of once per job.
+_WORKER = None
+
+
+def _init_worker(batch, sources):
+    global _WORKER
+    _WORKER = (batch, sources)
+
+
+def _run_worker(job):
+    batch, sources = _WORKER
+    return batch._build_one(sources, job)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build Ramza themes as RamzaThemes TEX files")
+    parser.add_argument("definitions", nargs="?", help="JSON file of theme name -> definition")
+    parser.add_argument("--themes", help="Only these themes from the definitions file (comma-separated)")
+    parser.add_argument("--theme", help="Build one theme given on the command line")
+    parser.add_argument("--armor", help="Armor color for --theme (#RRGGBB)")
+    parser.add_argument("--accent", help="Accent color for --theme (#RRGGBB)")
+    parser.add_argument("--out", default=str(THEMES_DIR), help="Directory the <theme>/tex_*.bin folders go to")
+    parser.add_argument("--source-dir", default=str(IMAGES_DIR),
+                        help="ColorMod/Images (uses <chapter>/original) or a toolkit extracted_sprites folder")
+    parser.add_argument("--images", help="Also write the themed BMP sheets under DIR/<chapter>/<theme>/")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: all cores, 1 = serial)")
+    args = parser.parse_args()
+
+    try:
+        if args.theme:
+            if not args.armor:
+                parser.error("--theme needs --armor")
+            themes = {args.theme: {"armor": args.armor, "accent": args.accent}}
+        elif args.definitions:
+            themes = load_definitions(args.definitions)
+            if args.themes:
+                wanted = [t.strip() for t in args.themes.split(',')]
+                unknown = [t for t in wanted if t not in themes]
+                if unknown:
+                    print(f"Error: unknown themes: {', '.join(unknown)}")
+                    return 1
+                themes = {t: themes[t] for t in wanted}
+        else:
+            parser.error("give a definitions file or --theme/--armor")
+
+        batch = RamzaThemeBatch(args.source_dir, args.out, args.images, args.workers or None)
+        _, missing = batch.run(themes)
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -137,6 +137,32 @@ class RamzaThemeCreator:
             preview_only=True
         )
 
+    def chapter_color_map(self, chapter_type, armor_variations, accent_variations=None,
+                          preserve_hair=False):
+        """
+        Original -> themed color map for one chapter's sprites.
+
+        Armor colors take the armor variations in order (the last variation is
+        reused if there are more colors than variations); accents do the same
+        for chapters that have accent colors. With preserve_hair, hair/face
+        colors are left out of the map.
+        """
+        colors = {'ch1': self.ch1_colors, 'ch2': self.ch2_colors, 'ch34': self.ch34_colors}[chapter_type]
+        color_map = {}
+
+        # Map armor colors to armor variations
+        for i, color in enumerate(colors['armor']):
+            color_map[color] = armor_variations[min(i, len(armor_variations)-1)]
+        # Map accents if provided
+        if accent_variations and 'accents' in colors:
+            for i, color in enumerate(colors['accents']):
+                color_map[color] = accent_variations[min(i, len(accent_variations)-1)]
+
+        if preserve_hair:
+            for color in colors['hair_skin']:
+                color_map.pop(color, None)
+        return color_map
+
     def _process_sprite(self, filename, chapter_name, chapter_type,
                        armor_variations, accent_variations,
                        output_dir, theme_name, preserve_hair):
@@ -153,33 +179,7 @@ class RamzaThemeCreator:
         print(f"\nProcessing {chapter_name}: {filename}")
 
         # Build color map based on chapter
-        color_map = {}
-
-        if chapter_type == 'ch1':
-            colors = self.ch1_colors
-            # Map armor colors to armor variations
-            for i, color in enumerate(colors['armor']):
-                color_map[color] = armor_variations[min(i, len(armor_variations)-1)]
-
-        elif chapter_type == 'ch2':
-            colors = self.ch2_colors
-            # Map armor colors to armor variations
-            for i, color in enumerate(colors['armor']):
-                color_map[color] = armor_variations[min(i, len(armor_variations)-1)]
-            # Map accents if provided
-            if accent_variations and 'accents' in colors:
-                for i, color in enumerate(colors['accents']):
-                    color_map[color] = accent_variations[min(i, len(accent_variations)-1)]
-
-        elif chapter_type == 'ch34':
-            colors = self.ch34_colors
-            # Map armor colors to armor variations
-            for i, color in enumerate(colors['armor']):
-                color_map[color] = armor_variations[min(i, len(armor_variations)-1)]
-            # Map accents if provided
-            if accent_variations and 'accents' in colors:
-                for i, color in enumerate(colors['accents']):
-                    color_map[color] = accent_variations[min(i, len(accent_variations)-1)]
+        color_map = self.chapter_color_map(chapter_type, armor_variations, accent_variations)
 
         # Apply the color map to the image
         img = Image.open(input_path)
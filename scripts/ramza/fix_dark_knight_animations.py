@@ -8,8 +8,12 @@ dark_knight colors applied.
 
 from PIL import Image
 import os
+import sys
 import numpy as np
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+
 def load_image_as_array(filepath):
     """Load image and return as numpy array."""
     img = Image.open(filepath)
@@ -20,84 +24,30 @@ def load_image_as_array(filepath):
 def extract_color_mapping(original_img, themed_img):
     """
     Extract color mapping between two images.
-    Returns dict of (r,g,b) -> (r,g,b) mappings.
+    Returns a fftsprite.ColorMap of original -> themed colors; where one original
+    color meets several themed ones the last pixel wins.
     """
-    color_map = {}
-
     if original_img.shape != themed_img.shape:
         print(f"Warning: Image dimensions don't match!")
-        return color_map
-
-    height, width = original_img.shape[:2]
 
-    for y in range(height):
-        for x in range(width):
-            orig_color = tuple(original_img[y, x])
-            theme_color = tuple(themed_img[y, x])
-
-            if orig_color != (0, 0, 0):  # Skip black background
-                color_map[orig_color] = theme_color
-
-    return color_map
+    return fftsprite.ColorMap.from_images(original_img, themed_img, keep="last")
 
 def apply_color_mapping(source_img, color_map, fuzzy_match=False):
-    """Apply color mapping to an image."""
-    result = np.copy(source_img)
-    height, width = source_img.shape[:2]
-
-    unmatched_colors = set()
-
-    for y in range(height):
-        for x in range(width):
-            orig_color = tuple(source_img[y, x])
-
-            if orig_color == (0, 0, 0):  # Keep black background
-                continue
-
-            if orig_color in color_map:
-                result[y, x] = color_map[orig_color]
-            elif fuzzy_match:
-                # Find closest color in map
-                closest_color = find_closest_color(orig_color, color_map.keys())
-                if closest_color:
-                    result[y, x] = color_map[closest_color]
-                else:
-                    unmatched_colors.add(orig_color)
-            else:
-                unmatched_colors.add(orig_color)
-
-    if unmatched_colors:
+    """
+    Apply color mapping to an image.
+    If fuzzy_match is True, colors without an exact mapping take the mapping of
+    the closest mapped color (RGB distance under 50).
+    """
+    result, unmatched_colors = color_map.apply(source_img, fuzzy=fuzzy_match)
+
+    if len(unmatched_colors):
         print(f"  Found {len(unmatched_colors)} unmatched colors")
 
     return result
 
-def find_closest_color(target_color, color_list):
-    """Find closest color by RGB distance."""
-    if not color_list:
-        return None
-
-    min_dist = float('inf')
-    closest = None
-
-    for color in color_list:
-        dist = sum((a - b) ** 2 for a, b in zip(target_color, color)) ** 0.5
-        if dist < min_dist:
-            min_dist = dist
-            closest = color
-
-    # Only return if reasonably close
-    if min_dist < 50:
-        return closest
-    return None
-
 def analyze_palette(img_array, name=""):
     """Analyze and report on image palette."""
-    unique_colors = set()
-    for row in img_array:
-        for pixel in row:
-            color = tuple(pixel)
-            if color != (0, 0, 0):  # Exclude black background
-                unique_colors.add(color)
+    unique_colors = set(map(tuple, fftsprite.unpack_rgb(fftsprite.unique_colors(img_array)).tolist()))
 
     print(f"  {name}: {len(unique_colors)} unique colors")
     return unique_colors
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Write charclut.nxd palette variants for Ramza without the FF16Tools.CLI round trip.
+
+The template charclut.nxd is parsed once (fftsprite.CharClut). Each variant is
+a copy of that buffer with its Key/Key2 rows patched in one pass and written
+to <out>/<variant>/charclut.nxd. A variants file maps variant name ->
+"Key/Key2" -> either a full CLUTData list of 48 ints or {palette index: color}
+for the entries to change (the others keep the template's colors):
+
+    {
+      "green_ramza": {
+        "1/0": {"3": "#303828", "4": "#405028", "5": "#586828", "6": "#708030"}
+      },
+      "flat_gray": {
+        "2/0": [0, 0, 0, 40, 32, 32, ...]
+      }
+    }
+
+Key 1 = Chapter 1, 2 = Chapter 2/3, 3 = Chapter 4; Key2 0 is the vanilla
+palette (docs/NXD_FILE_FORMAT.md). --sqlite patches from an edited
+charclut.sqlite instead, the same way as ColorMod/Services/NxdPatcher.cs.
+
+Usage:
+  python patch_charclut.py variants.json --out DIR [--template charclut.nxd]
+  python patch_charclut.py --sqlite charclut.sqlite --out DIR/charclut.nxd
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fftsprite
+from fftsprite.codec import parse_color
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+TEMPLATE = REPO_DIR / "ColorMod" / "Data" / "nxd" / "charclut.nxd"
+
+
+def parse_key(text):
+    """'1/0' -> (1, 0)."""
+    key, _, key2 = text.partition("/")
+    return int(key), int(key2)
+
+
+def variant_updates(template, rows):
+    """{(Key, Key2): (16, 3) CLUT} for one variant's "Key/Key2" -> values map."""
+    updates = {}
+    for text, values in rows.items():
+        key = parse_key(text)
+        if isinstance(values, dict):
+            clut = template.clut(*key).astype(np.int32)
+            for index, color in values.items():
+                clut[int(index)] = parse_color(color)
+        else:
+            clut = np.asarray(values, dtype=np.int32)
+        updates[key] = clut
+    return updates
+
+
+def build_variants(variants, out_dir, template_path=TEMPLATE):
+    """Write <out_dir>/<variant>/charclut.nxd for every variant; returns the paths written."""
+    template = fftsprite.CharClut.load(template_path)
+    written = []
+    for name, rows in variants.items():
+        variant = template.copy()
+        variant.patch(variant_updates(template, rows))
+        path = Path(out_dir) / name / "charclut.nxd"
+        variant.save(path)
+        written.append(path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write charclut.nxd palette variants")
+    parser.add_argument("variants", nargs="?", help="JSON file of variant -> Key/Key2 -> CLUT")
+    parser.add_argument("--out", required=True,
+                        help="Directory for <variant>/charclut.nxd (with --sqlite: the output .nxd)")
+    parser.add_argument("--template", default=str(TEMPLATE), help="Template charclut.nxd")
+    parser.add_argument("--sqlite", help="Patch every CharCLUT row of this charclut.sqlite")
+    args = parser.parse_args()
+
+    try:
+        if args.sqlite:
+            clut = fftsprite.CharClut.load(args.template)
+            count = clut.patch_from_sqlite(args.sqlite)
+            clut.save(args.out)
+            print(f"Patched {count} CLUT rows -> {args.out}")
+        elif args.variants:
+            variants = json.loads(Path(args.variants).read_text(encoding="utf-8"))
+            written = build_variants(variants, args.out, args.template)
+            print(f"Wrote {len(written)} charclut.nxd variants to {args.out}")
+        else:
+            parser.error("give a variants file or --sqlite")
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,93 +11,55 @@ import sys
 import os
 from PIL import Image
 
+import fftsprite
+
 # Sprite sheet parameters (matching BinSpriteExtractor.cs)
-SPRITE_WIDTH = 32
-SPRITE_HEIGHT = 40
-SHEET_WIDTH = 256
+SPRITE_WIDTH = fftsprite.SPRITE_WIDTH
+SPRITE_HEIGHT = fftsprite.SPRITE_HEIGHT
+SHEET_WIDTH = fftsprite.SHEET_WIDTH
 DISPLAY_SCALE = 3  # Scale 3x for better visibility
 
 
 def read_palette(data, palette_index=0):
-    """Read a 16-color palette from BIN data (BGR555 format)."""
-    palette = []
-    offset = palette_index * 32  # Each palette is 16 colors * 2 bytes
-
-    for i in range(16):
-        color_offset = offset + (i * 2)
-
-        # Read BGR555 color (2 bytes, little-endian)
-        bgr555 = data[color_offset] | (data[color_offset + 1] << 8)
-
-        # First color is transparent
-        if i == 0:
-            palette.append((0, 0, 0, 0))  # RGBA with alpha=0
-            continue
-
-        # Extract 5-bit components
-        r5 = bgr555 & 0x1F
-        g5 = (bgr555 >> 5) & 0x1F
-        b5 = (bgr555 >> 10) & 0x1F
-
-        # Convert 5-bit to 8-bit
-        r8 = (r5 * 255) // 31
-        g8 = (g5 * 255) // 31
-        b8 = (b5 * 255) // 31
+    """Read a 16-color palette from BIN data (BGR555 format) as a (16, 4) RGBA array.
 
-        palette.append((r8, g8, b8, 255))
-
-    return palette
+    Index 0 is transparent, like Color.Transparent in BinSpriteExtractor.cs.
+    """
+    return fftsprite.read_palette_rgba(data, palette_index)
 
 
 def extract_sprite(data, sprite_index, palette):
     """Extract a single sprite from the BIN data."""
-    img = Image.new('RGBA', (SPRITE_WIDTH, SPRITE_HEIGHT))
-    pixels = img.load()
+    # Only the top SPRITE_HEIGHT rows hold the standing frames
+    indices = fftsprite.decode_pixels(data, rows=SPRITE_HEIGHT)
+    return extract_sprite_from_sheet(indices, sprite_index, palette)
 
-    # Sprites are arranged horizontally
-    x_offset = sprite_index * SPRITE_WIDTH
-    y_offset = 0
-
-    # Skip palette data (512 bytes)
-    sprite_data_start = 512
 
-    for y in range(SPRITE_HEIGHT):
-        for x in range(SPRITE_WIDTH):
-            # Calculate position in the full sprite sheet
-            sheet_x = x_offset + x
-            sheet_y = y_offset + y
+def extract_sprite_from_sheet(indices, sprite_index, palette):
+    """Extract a single sprite from an already-decoded index sheet.
 
-            # Calculate pixel index in sprite data (256-pixel wide sheet)
-            pixel_index = (sheet_y * SHEET_WIDTH) + sheet_x
-            byte_index = sprite_data_start + (pixel_index // 2)
-
-            if byte_index >= len(data):
-                break
-
-            pixel_data = data[byte_index]
-
-            # Get 4-bit value (alternate between low and high nibble)
-            if pixel_index % 2 == 0:
-                color_index = pixel_data & 0x0F  # Low nibble
-            else:
-                color_index = (pixel_data >> 4) & 0x0F  # High nibble
-
-            pixels[x, y] = palette[color_index]
+    Lets callers decode a bin once and render it against many palettes.
+    """
+    frame = indices[:SPRITE_HEIGHT, sprite_index * SPRITE_WIDTH:(sprite_index + 1) * SPRITE_WIDTH]
 
+    rgba = fftsprite.apply_palette(frame, palette)
+    img = Image.new('RGBA', (SPRITE_WIDTH, SPRITE_HEIGHT))
+    img.paste(Image.fromarray(rgba, 'RGBA'), (0, 0))
     return img
 
 
 def render_all_directions(data, palette_index=0):
     """Render all 8 directions in a single image."""
     palette = read_palette(data, palette_index)
+    indices = fftsprite.decode_pixels(data, rows=SPRITE_HEIGHT)
 
     # Extract the 5 base sprites from the sheet
     sprites = {}
-    sprites['W'] = extract_sprite(data, 0, palette)   # Position 0: West
-    sprites['SW'] = extract_sprite(data, 1, palette)  # Position 1: Southwest
-    sprites['S'] = extract_sprite(data, 2, palette)   # Position 2: South
-    sprites['NW'] = extract_sprite(data, 3, palette)  # Position 3: Northwest
-    sprites['N'] = extract_sprite(data, 4, palette)   # Position 4: North
+    sprites['W'] = extract_sprite_from_sheet(indices, 0, palette)   # Position 0: West
+    sprites['SW'] = extract_sprite_from_sheet(indices, 1, palette)  # Position 1: Southwest
+    sprites['S'] = extract_sprite_from_sheet(indices, 2, palette)   # Position 2: South
+    sprites['NW'] = extract_sprite_from_sheet(indices, 3, palette)  # Position 3: Northwest
+    sprites['N'] = extract_sprite_from_sheet(indices, 4, palette)   # Position 4: North
 
     # Mirror to create East directions
     sprites['E'] = sprites['W'].transpose(Image.FLIP_LEFT_RIGHT)
@@ -163,8 +125,9 @@ def render_indexed_frames(data, palette_index=0, num_frames=8, scale=3):
     grid = Image.new('RGBA', (frame_w * num_frames, cell_h), (32, 32, 32, 255))
     draw = ImageDraw.Draw(grid)
 
+    indices = fftsprite.decode_pixels(data, rows=SPRITE_HEIGHT)
     for i in range(num_frames):
-        frame = extract_sprite(data, i, palette)
+        frame = extract_sprite_from_sheet(indices, i, palette)
         frame_scaled = frame.resize((frame_w, frame_h), Image.NEAREST)
         grid.paste(frame_scaled, (i * frame_w, label_h))
         # Label "0", "1", "2", ... centered above each frame
@@ -189,24 +152,9 @@ def render_full_sheet(data, palette_index=0, scale=2):
     total_pixels = pixel_bytes * 2  # 4 bits per pixel
     height = total_pixels // SHEET_WIDTH
 
-    img = Image.new('RGBA', (SHEET_WIDTH, height), (64, 64, 64, 255))
-    pixels = img.load()
-
-    for y in range(height):
-        for x in range(SHEET_WIDTH):
-            pixel_index = (y * SHEET_WIDTH) + x
-            byte_index = sprite_data_start + (pixel_index // 2)
-
-            if byte_index >= len(data):
-                break
-
-            pixel_data = data[byte_index]
-            if pixel_index % 2 == 0:
-                color_index = pixel_data & 0x0F
-            else:
-                color_index = (pixel_data >> 4) & 0x0F
-
-            pixels[x, y] = palette[color_index]
+    # Whole rows only; a trailing partial row is dropped
+    indices = fftsprite.decode_pixels(data)[:height]
+    img = Image.fromarray(fftsprite.apply_palette(indices, palette), 'RGBA')
 
     if scale != 1:
         img = img.resize((SHEET_WIDTH * scale, height * scale), Image.NEAREST)
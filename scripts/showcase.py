@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Shared tile renderer for the showcase sheets (create_ultimate_spritesheet.py,
+create_theme_showcase.py).
+
+Every theme copy of a sprite carries the same pixel body and differs only in
+its 512-byte palette block, so a showcase tile is just that body's southwest
+frame looked up through the theme's 16-color palette:
+
+  - frames are decoded once per distinct pixel body
+  - all palettes sharing a body are colored with one NumPy fancy-indexing
+    lookup, palettes[:, frame] -> (N, 40, 32, 4)
+  - the grid is composited in NumPy instead of one PIL paste per tile
+
+With a TileCache, rendered tiles are kept on disk keyed on the sprite's
+palette-block hash, pixel-body hash and the render parameters; a rebuild only
+renders tiles whose inputs changed and then recomposites, so adding a theme
+costs one tile render per new sprite.
+
+Usage:
+    from showcase import TileCache, render_tiles, compose_grid
+
+    tiles = render_tiles(sprite_paths, cache=TileCache(".showcase_cache"))
+    canvas = compose_grid(tiles, columns=40, padding=2, background=(32, 32, 48, 255))
+"""
+
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import fftsprite
+from fftsprite.store import content_hash
+
+TILE_WIDTH = fftsprite.SPRITE_WIDTH
+TILE_HEIGHT = fftsprite.SPRITE_HEIGHT
+
+# Bump when the tile rendering itself changes so stale cached tiles are ignored.
+TILE_FORMAT = 1
+
+
+def decode_frame(data, sprite_index=1):
+    """Palette indices (40, 32) of one frame in the top row of the sheet."""
+    indices = fftsprite.decode_pixels(data, rows=TILE_HEIGHT)
+    return indices[:, sprite_index * TILE_WIDTH:(sprite_index + 1) * TILE_WIDTH]
+
+
+class TileCache:
+    """Rendered tiles on disk: <root>/<ab>/<key>.npy, one (40, 32, 4) array each."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(palette_block, body_hash, sprite_index, palette_index):
+        params = f"{TILE_FORMAT}:{sprite_index}:{palette_index}:{body_hash}:"
+        return content_hash(params.encode() + palette_block)
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.npy"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            tile = np.load(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tile
+
+    def put(self, key, tile):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npy")
+        np.save(tmp, tile)
+        os.replace(tmp, path)
+
+
+def render_tiles(paths, sprite_index=1, palette_index=0, cache=None):
+    """Render one frame of every sprite file as an (N, 40, 32, 4) RGBA array.
+
+    Files that cannot be read are reported and left fully transparent. With a
+    `cache`, tiles whose inputs are unchanged are loaded instead of rendered.
+    """
+    tiles = np.zeros((len(paths), TILE_HEIGHT, TILE_WIDTH, 4), dtype=np.uint8)
+    frames = {}   # body hash -> decoded frame
+    groups = {}   # body hash -> ([tile slot], [RGBA palette], [cache key])
+
+    for slot, path in enumerate(paths):
+        try:
+            data = Path(path).read_bytes()
+            palette = fftsprite.read_palette_rgba(data, palette_index)
+            key = content_hash(data[fftsprite.PALETTE_BYTES:])
+            tile_key = None
+            if cache is not None:
+                tile_key = cache.key(data[:fftsprite.PALETTE_BYTES], key, sprite_index, palette_index)
+                tile = cache.get(tile_key)
+                if tile is not None:
+                    tiles[slot] = tile
+                    continue
+            if key not in frames:
+                frames[key] = decode_frame(data, sprite_index)
+        except Exception as e:
+            print(f"  Error processing {path}: {e}")
+            continue
+        slots, palettes, tile_keys = groups.setdefault(key, ([], [], []))
+        slots.append(slot)
+        palettes.append(palette)
+        tile_keys.append(tile_key)
+
+    for key, (slots, palettes, tile_keys) in groups.items():
+        tiles[slots] = np.stack(palettes)[:, frames[key]]
+        if cache is not None:
+            for slot, tile_key in zip(slots, tile_keys):
+                cache.put(tile_key, tiles[slot])
+    return tiles
+
+
+def compose_grid(tiles, columns, padding, background):
+    """Lay tiles out row-major on a solid background, `padding` pixels around each.
+
+    Palette alpha is only ever 0 or 255, so pasting with the tile's own alpha
+    as mask reduces to a per-pixel select.
+    """
+    count = len(tiles)
+    rows = math.ceil(count / columns)
+    cell_w = TILE_WIDTH + padding * 2
+    cell_h = TILE_HEIGHT + padding * 2
+
+    canvas = np.empty((rows * cell_h, columns * cell_w, 4), dtype=np.uint8)
+    canvas[:] = background
+
+    cells = np.zeros((rows * columns, TILE_HEIGHT, TILE_WIDTH, 4), dtype=np.uint8)
+    cells[:count] = tiles
+    cells = cells.reshape(rows, columns, TILE_HEIGHT, TILE_WIDTH, 4).transpose(0, 2, 1, 3, 4)
+
+    grid = canvas.reshape(rows, cell_h, columns, cell_w, 4)
+    grid = grid[:, padding:padding + TILE_HEIGHT, :, padding:padding + TILE_WIDTH]
+    grid[...] = np.where(cells[..., 3:] > 0, cells, grid)
+
+    return Image.fromarray(canvas, 'RGBA')
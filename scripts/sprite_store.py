@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Build and use a content-addressed store of the sprites_* theme directories.
+
+Each unique pixel body is stored once and each theme's palette blocks are kept
+as 512-byte records, so the ~1000 themed bins collapse to the ~90 distinct
+sprite bodies plus their palettes. Any theme directory can be re-materialized
+byte-for-byte from the store.
+
+Usage:
+    python scripts/sprite_store.py build <store_dir> [--unit-dir DIR] [--theme sprites_x ...]
+    python scripts/sprite_store.py materialize <store_dir> <out_dir> [--theme sprites_x ...]
+    python scripts/sprite_store.py verify <store_dir> [--unit-dir DIR]
+    python scripts/sprite_store.py stats <store_dir>
+    python scripts/sprite_store.py gc <store_dir>
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from fftsprite.store import SpriteStore
+
+DEFAULT_UNIT_DIR = (Path(__file__).resolve().parent.parent /
+                    "ColorMod" / "FFTIVC" / "data" / "enhanced" / "fftpack" / "unit")
+
+
+def theme_dirs(unit_dir, names):
+    if names:
+        return [unit_dir / name for name in names]
+    return sorted(d for d in unit_dir.glob("sprites_*") if d.is_dir())
+
+
+def cmd_build(args):
+    store = SpriteStore(args.store)
+    dirs = theme_dirs(args.unit_dir, args.theme)
+    for theme_dir in dirs:
+        if not theme_dir.is_dir():
+            print(f"Error: theme directory not found: {theme_dir}")
+            return 1
+        store.add_theme(theme_dir)
+    store.save()
+    print(f"Stored {len(dirs)} theme directories in {args.store}")
+    print_stats(store)
+    return 0
+
+
+def cmd_materialize(args):
+    store = SpriteStore(args.store)
+    themes = args.theme or sorted(store.themes)
+    unknown = [t for t in themes if t not in store.themes]
+    if unknown:
+        print(f"Error: theme not in store: {', '.join(unknown)}")
+        return 1
+    for theme in themes:
+        count = store.materialize(theme, args.out_dir / theme)
+        print(f"  {theme}: {count} files")
+    print(f"Materialized {len(themes)} theme directories into {args.out_dir}")
+    return 0
+
+
+def cmd_verify(args):
+    store = SpriteStore(args.store)
+    problems = []
+    for theme_dir in theme_dirs(args.unit_dir, args.theme):
+        problems.extend(store.verify_theme(theme_dir.name, theme_dir))
+    for problem in problems:
+        print(f"  {problem}")
+    print(f"{len(problems)} mismatches")
+    return 1 if problems else 0
+
+
+def print_stats(store):
+    s = store.stats()
+    stored = s["body_bytes"] + s["palette_bytes"]
+    print(f"  themes:          {s['themes']}")
+    print(f"  sprite files:    {s['files']}")
+    print(f"  unique bodies:   {s['unique_bodies']} ({s['body_bytes'] / 1024 / 1024:.1f} MB)")
+    print(f"  unique palettes: {s['unique_palettes']} ({s['palette_bytes'] / 1024:.0f} KB)")
+    print(f"  stored total:    {stored / 1024 / 1024:.1f} MB")
+
+
+def cmd_stats(args):
+    print_stats(SpriteStore(args.store))
+    return 0
+
+
+def cmd_gc(args):
+    store = SpriteStore(args.store)
+    bodies, palettes, freed = store.gc()
+    print(f"Removed {bodies} unreferenced bodies and {palettes} palette blocks ({freed / 1024:.0f} KB)")
+    print_stats(store)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed sprite theme store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="Ingest theme directories into the store")
+    p.add_argument("store", type=Path)
+    p.add_argument("--unit-dir", type=Path, default=DEFAULT_UNIT_DIR)
+    p.add_argument("--theme", action="append", help="Only this sprites_* directory (repeatable)")
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("materialize", help="Recreate theme directories from the store")
+    p.add_argument("store", type=Path)
+    p.add_argument("out_dir", type=Path)
+    p.add_argument("--theme", action="append", help="Only this sprites_* directory (repeatable)")
+    p.set_defaults(func=cmd_materialize)
+
+    p = sub.add_parser("verify", help="Check theme directories on disk against the store")
+    p.add_argument("store", type=Path)
+    p.add_argument("--unit-dir", type=Path, default=DEFAULT_UNIT_DIR)
+    p.add_argument("--theme", action="append", help="Only this sprites_* directory (repeatable)")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("stats", help="Show store size and dedup figures")
+    p.add_argument("store", type=Path)
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("gc", help="Delete bodies and palettes no theme references")
+    p.add_argument("store", type=Path)
+    p.set_defaults(func=cmd_gc)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Parallel batch engine for the per-character theme generators.
+
+A generator describes WHAT to build (a list of ThemeSpec plus the character's
+palette index sets) and ThemeBatch does the rest:
+
+  - the source sprite is read and decoded once, then handed to every worker
+  - each theme's palette block is built from the spec, written as
+    palette + shared pixel body, and previewed in-process
+    (convert_sprite_sw.render_southwest)
+  - themes fan out over a process pool (workers=1 runs serially in-process)
+
+Section colors are written at flat palette offsets relative to each target
+palette (palette * 16 + index), exactly like the hand-written loops in the
+generators. Characters with style logic that does not fit a plain
+section -> color map pass their own `builder(block, spec)` that edits the
+512-byte palette block in place; it must be a module-level function so the
+pool can pickle it.
+
+`sections="Story/Cloud"` (a SectionMappings job name, relative path or sprite
+file) takes the theme editor's sections as index sets from the compiled
+table (fftsprite.load_sections); explicit index_sets are added on top.
+
+Usage from a generator in a character subfolder:
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from theme_batch import ThemeBatch, ThemeSpec
+
+    batch = ThemeBatch(source, out_dir, index_sets={"accent": [3, 4, 5], "primary": [6, 8]},
+                       palettes=range(8), bin_name="sprites_cloud_{name}/battle_cloud_spr.bin",
+                       preview_name="previews/{index:02d}_{name}.png")
+    batch.run([ThemeSpec("ember", {"accent": "#FFD700", "primary": "#B22222"})])
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+import fftsprite
+from fftsprite.codec import parse_color
+from convert_sprite_sw import render_southwest
+
+Color = Union[str, Tuple[int, int, int]]
+
+
+@dataclass(frozen=True)
+class ThemeSpec:
+    """One theme: a name, a section -> color map, and an optional style tag for custom builders."""
+
+    name: str
+    colors: Dict[str, Union[Color, Sequence[Color]]] = field(default_factory=dict)
+    style: str = "standard"
+
+
+@dataclass(frozen=True)
+class ThemeResult:
+    index: int
+    name: str
+    bin_path: Path
+    preview_path: Optional[Path]
+
+
+class ThemeBatch:
+    """Build many palette variants of one source sprite in parallel."""
+
+    def __init__(self, source, output_dir,
+                 index_sets: Optional[Dict[str, Sequence[int]]] = None,
+                 palettes: Sequence[int] = (0,),
+                 builder: Optional[Callable[[bytearray, ThemeSpec], None]] = None,
+                 bin_name: str = "{name}.bin",
+                 preview_name: Optional[str] = "{name}.png",
+                 color_mode: str = "shift",
+                 workers: Optional[int] = None,
+                 sections: Optional[str] = None):
+        self.source = Path(source)
+        self.output_dir = Path(output_dir)
+        self.index_sets = fftsprite.load_sections().index_sets(sections) if sections else {}
+        self.index_sets.update({k: list(v) for k, v in (index_sets or {}).items()})
+        self.palettes = list(palettes)
+        self.builder = builder
+        self.bin_name = bin_name
+        self.preview_name = preview_name
+        self.color_mode = color_mode
+        self.workers = workers
+
+    # -- palette building ----------------------------------------------------
+
+    def apply_sections(self, block: bytearray, spec: ThemeSpec) -> None:
+        """Write every section color of `spec` into each target palette, in one scatter."""
+        slots, words = [], []
+        for palette in self.palettes:
+            for section, indices in self.index_sets.items():
+                if section not in spec.colors:
+                    continue
+                colors = spec.colors[section]
+                if isinstance(colors, (str, tuple)):
+                    colors = [colors] * len(indices)
+                elif len(colors) != len(indices):
+                    raise ValueError(f"{spec.name}: section '{section}' has {len(colors)} colors "
+                                     f"for {len(indices)} indices")
+                rgb = np.array([parse_color(c) for c in colors], dtype=np.int32).reshape(-1, 3)
+                slots.append(palette * fftsprite.COLORS_PER_PALETTE + np.asarray(indices, dtype=np.int64))
+                words.append(fftsprite.rgb_to_bgr555(rgb, self.color_mode))
+        if not slots:
+            return
+
+        slots = np.concatenate(slots)
+        words = np.concatenate(words)
+        in_block = slots < fftsprite.PALETTE_COUNT * fftsprite.COLORS_PER_PALETTE
+        slots, words = slots[in_block], words[in_block]
+        # Later palettes overwrite earlier ones where flat offsets overlap; keep the last write.
+        _, last = np.unique(slots[::-1], return_index=True)
+        keep = len(slots) - 1 - last
+
+        view = np.frombuffer(block, dtype='<u2')
+        view[slots[keep]] = words[keep]
+
+    def build_block(self, source_block: bytes, spec: ThemeSpec) -> bytearray:
+        block = bytearray(source_block)
+        self.apply_sections(block, spec)
+        if self.builder is not None:
+            self.builder(block, spec)
+        return block
+
+    # -- execution -------------------------------------------------------------
+
+    def _paths(self, index: int, spec: ThemeSpec):
+        fields = {"name": spec.name, "index": index}
+        bin_path = self.output_dir / self.bin_name.format(**fields)
+        preview_path = self.output_dir / self.preview_name.format(**fields) if self.preview_name else None
+        return bin_path, preview_path
+
+    def _build_one(self, source, index: int, spec: ThemeSpec) -> ThemeResult:
+        palette_block, body, indices = source
+        block = self.build_block(palette_block, spec)
+
+        bin_path, preview_path = self._paths(index, spec)
+        bin_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(bin_path, 'wb') as f:
+            f.write(block)
+            f.write(body)
+
+        if preview_path is not None:
+            preview_path.parent.mkdir(parents=True, exist_ok=True)
+            rgba = fftsprite.palettes_to_rgba(fftsprite.decode_palettes(block)[0])
+            render_southwest(indices, rgba, preview_mode=True).save(preview_path)
+
+        return ThemeResult(index, spec.name, bin_path, preview_path)
+
+    def load_source(self):
+        data = self.source.read_bytes()
+        return (data[:fftsprite.PALETTE_BYTES], data[fftsprite.PALETTE_BYTES:],
+                fftsprite.decode_pixels(data, rows=fftsprite.SPRITE_HEIGHT))
+
+    def run(self, specs: Sequence[ThemeSpec], verbose: bool = True) -> List[ThemeResult]:
+        """Build every spec. Results come back in spec order; index is 1-based."""
+        source = self.load_source()
+        jobs = list(enumerate(specs, 1))
+        workers = self.workers or min(len(jobs), os.cpu_count() or 1)
+
+        if workers <= 1:
+            results = [self._build_one(source, i, spec) for i, spec in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self, source)) as pool:
+                chunk = max(1, len(jobs) // (workers * 4))
+                results = list(pool.map(_run_worker, jobs, chunksize=chunk))
+
+        if verbose:
+            for r in results:
+                print(f"[{r.index:2d}/{len(jobs)}] {r.name}")
+        return results
+
+
+# Per-process state for pool workers: the batch config and the decoded source,
+# shipped once per worker instead of once per theme.
+_WORKER = None
+
+
+def _init_worker(batch, source):
+    global _WORKER
+    _WORKER = (batch, source)
+
+
+def _run_worker(job):
+    batch, source = _WORKER
+    index, spec = job
+    return batch._build_one(source, index, spec)
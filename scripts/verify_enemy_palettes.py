@@ -2,11 +2,37 @@
 """
 Verify that all job-specific themes have proper enemy palettes (1-4 should have data).
 This ensures the fix_enemy_palettes.py script worked correctly.
+
+Report mode (--report / --csv / --changed-since) checks every bin under every
+sprites_* directory with a worker pool and writes a machine-readable report:
+per file its size, mtime, content hash, palette-block hash, which palettes are
+black and any issues. With --changed-since <previous report.json> only files
+whose mtime changed are re-read, and only those whose hash also changed are
+re-verified, so it is cheap enough to run as a pre-commit gate:
+
+    python scripts/verify_enemy_palettes.py --changed-since .palette_cache/palette_report.json
+
+Report mode exits 1 when any file has an issue.
+
+Bins are memory-mapped (fftsprite.MappedFile): the palette checks read a
+(16, 16) view of the header and report mode hashes the mapping directly, so a
+whole-tree scan neither copies file contents nor unpacks colors one by one.
 """
 
-import struct
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
+
+import numpy as np
+
+import fftsprite
+from fftsprite.store import content_hash
+
+REPORT_FORMAT = 1
 
 class PaletteVerifier:
     """Verify enemy palettes in FFT sprite files."""
@@ -35,26 +61,13 @@ class PaletteVerifier:
         with open(sprite_path, 'rb') as f:
             return bytearray(f.read())
 
-    def get_palette(self, sprite_data: bytearray, palette_index: int) -> List[Tuple[int, int, int]]:
-        """Extract a palette (16 colors) from sprite data."""
-        colors = []
-        start_offset = palette_index * self.COLORS_PER_PALETTE * self.BYTES_PER_COLOR
-
-        for i in range(self.COLORS_PER_PALETTE):
-            offset = start_offset + (i * self.BYTES_PER_COLOR)
-            if offset + 1 < len(sprite_data):
-                color_value = struct.unpack('<H', sprite_data[offset:offset+2])[0]
-
-                # Extract RGB from 16-bit color
-                r = (color_value & 0x001F) << 3
-                g = ((color_value & 0x03E0) >> 5) << 3
-                b = ((color_value & 0x7C00) >> 10) << 3
-
-                colors.append((r, g, b))
-            else:
-                colors.append((0, 0, 0))
-
-        return colors
+    def get_palette(self, sprite_data, palette_index: int) -> List[Tuple[int, int, int]]:
+        """Extract a palette (16 colors) from sprite data (bytes or a mapped file's buffer)."""
+        start = palette_index * self.COLORS_PER_PALETTE
+        words = np.zeros(self.COLORS_PER_PALETTE, dtype=np.uint16)
+        available = np.frombuffer(sprite_data, dtype='<u2', count=len(sprite_data) // 2)[start:start + 16]
+        words[:len(available)] = available
+        return [tuple(c) for c in fftsprite.bgr555_to_rgb(words, "shift").tolist()]
 
     def is_palette_black(self, palette: List[Tuple[int, int, int]]) -> bool:
         """Check if palette is all black (except transparency at index 0)."""
@@ -69,7 +82,8 @@ class PaletteVerifier:
 
     def check_sprite(self, sprite_path: Path, theme_name: str) -> Dict:
         """Check a single sprite file."""
-        sprite_data = self.read_sprite(sprite_path)
+        with fftsprite.MappedFile(sprite_path) as sprite:
+            black = ((sprite.palettes[:, 1:] & 0x7FFF) == 0).all(axis=1).tolist()
 
         results = {
             'file': sprite_path.name,
@@ -77,22 +91,12 @@ class PaletteVerifier:
             'palettes': {}
         }
 
-        # Check palettes 1-4 (enemy palettes)
-        has_issue = False
-        for i in range(1, 5):
-            palette = self.get_palette(sprite_data, i)
-            is_black = self.is_palette_black(palette)
-            results['palettes'][f'palette_{i}'] = 'BLACK' if is_black else 'HAS_DATA'
+        # Palettes 1-4 (enemy palettes), and 5-7 for completeness
+        for i in range(1, 8):
+            results['palettes'][f'palette_{i}'] = 'BLACK' if black[i] else 'HAS_DATA'
 
-            # For job-specific themes, palettes 1-4 should NOT be black
-            if self.is_job_specific_theme(theme_name) and is_black:
-                has_issue = True
-
-        # Also check 5-7 for completeness
-        for i in range(5, 8):
-            palette = self.get_palette(sprite_data, i)
-            is_black = self.is_palette_black(palette)
-            results['palettes'][f'palette_{i}'] = 'BLACK' if is_black else 'HAS_DATA'
+        # For job-specific themes, palettes 1-4 should NOT be black
+        has_issue = self.is_job_specific_theme(theme_name) and any(black[1:5])
 
         results['has_issue'] = has_issue
         return results
@@ -184,16 +188,159 @@ class PaletteVerifier:
         else:
             print(f"\n[ISSUE] {theme_name} needs fixing")
 
+    # -- report mode: whole unit tree, worker pool ---------------------------
+
+    def tree_files(self) -> List[Tuple[str, Path, str]]:
+        """(relative path, path, theme name) of every bin under every sprites_* directory."""
+        files = []
+        for path in sorted(self.sprite_dir.glob("sprites_*/*.bin")):
+            theme_name = path.parent.name.replace("sprites_", "", 1)
+            files.append((f"{path.parent.name}/{path.name}", path, theme_name))
+        return files
+
+    def verify_tree(self, previous: Optional[Dict] = None, workers: Optional[int] = None) -> Dict:
+        """Verify the whole tree; reuse `previous` report records for unchanged files."""
+        started = time.perf_counter()
+        old = previous["files"] if previous else {}
+        records, jobs = {}, []
+        unchanged = 0
+        for rel, path, theme_name in self.tree_files():
+            st = path.stat()
+            prior = old.get(rel)
+            if prior and prior["size"] == st.st_size and prior["mtime_ns"] == st.st_mtime_ns:
+                records[rel] = dict(prior, reverified=False)
+                unchanged += 1
+            else:
+                jobs.append((rel, str(path), theme_name, self.is_job_specific_theme(theme_name),
+                             prior["blake2b"] if prior else None))
+
+        workers = workers or min(len(jobs), os.cpu_count() or 1)
+        if workers <= 1 or len(jobs) < 2:
+            results = [_verify_file(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunk = max(1, len(jobs) // (workers * 4))
+                results = list(pool.map(_verify_file, jobs, chunksize=chunk))
+
+        rehashed = 0
+        for (rel, _, _, _, prior_hash), record in zip(jobs, results):
+            if record is None:      # same bytes, only the mtime moved: keep the old verdict
+                record = dict(old[rel], mtime_ns=os.stat(self.sprite_dir / rel).st_mtime_ns,
+                              reverified=False)
+                rehashed += 1
+            records[rel] = record
+
+        issues = sum(1 for r in records.values() if r["issues"])
+        self.sprites_checked = len(records)
+        self.themes_checked = len({r["theme"] for r in records.values()})
+        return {
+            "format": REPORT_FORMAT,
+            "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "summary": {
+                "files": len(records),
+                "themes": self.themes_checked,
+                "reverified": len(jobs) - rehashed,
+                "hash_unchanged": rehashed,
+                "mtime_unchanged": unchanged,
+                "files_with_issues": issues,
+                "seconds": round(time.perf_counter() - started, 3),
+            },
+            "files": records,
+        }
+
+    @staticmethod
+    def load_report(path: Path) -> Optional[Dict]:
+        try:
+            report = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return report if report.get("format") == REPORT_FORMAT else None
+
+    @staticmethod
+    def write_report(report: Dict, json_path: Optional[Path] = None, csv_path: Optional[Path] = None):
+        if json_path:
+            json_path = Path(json_path)
+            json_path.parent.mkdir(parents=True, exist_ok=True)
+            json_path.write_text(json.dumps(report, indent=1, sort_keys=True), encoding="utf-8")
+        if csv_path:
+            csv_path = Path(csv_path)
+            csv_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(csv_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["file", "theme", "size", "mtime_ns", "blake2b", "palette_blake2b",
+                                 "black_palettes", "issues", "reverified"])
+                for rel, r in sorted(report["files"].items()):
+                    writer.writerow([rel, r["theme"], r["size"], r["mtime_ns"], r["blake2b"],
+                                     r["palette_blake2b"], " ".join(map(str, r["black_palettes"])),
+                                     "; ".join(r["issues"]), r["reverified"]])
+
+
+def _verify_file(job) -> Optional[Dict]:
+    """Pool worker: hash and check one bin. None if its hash equals the previous report's."""
+    rel, path, theme_name, job_specific, prior_hash = job
+    with fftsprite.MappedFile(path) as sprite:
+        digest = content_hash(sprite.buffer)
+        if digest == prior_hash:
+            return None
+
+        issues = []
+        black = []
+        palette_hash = None
+        if sprite.size < fftsprite.PALETTE_BYTES:
+            issues.append(f"too small for a palette block ({sprite.size} bytes)")
+        else:
+            black = np.nonzero(((sprite.palettes[:, 1:] & 0x7FFF) == 0).all(axis=1))[0].tolist()
+            palette_hash = content_hash(sprite.header)
+            # For job-specific themes, palettes 1-4 should NOT be black
+            if job_specific and any(1 <= i <= 4 for i in black):
+                issues.append("enemy palettes %s are BLACK (should have data)"
+                              % ",".join(str(i) for i in black if 1 <= i <= 4))
+    st = os.stat(path)
+    return {
+        "theme": theme_name,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "blake2b": digest,
+        "palette_blake2b": palette_hash,
+        "black_palettes": black,
+        "issues": issues,
+        "reverified": True,
+    }
+
+
 def main():
     import argparse
     parser = argparse.ArgumentParser(description="Verify enemy palettes in FFT sprites")
     parser.add_argument("--theme", help="Check specific theme only")
     parser.add_argument("--job", help="Check all themes for specific job class")
+    parser.add_argument("--report", type=Path, help="Write a JSON report of every bin in the unit tree")
+    parser.add_argument("--csv", type=Path, help="Write the same report as CSV")
+    parser.add_argument("--changed-since", type=Path, metavar="REPORT",
+                        help="Only re-verify files changed since this JSON report "
+                             "(rewritten in place unless --report is given)")
+    parser.add_argument("--workers", type=int, help="Worker processes for report mode")
 
     args = parser.parse_args()
 
     verifier = PaletteVerifier()
 
+    if args.report or args.csv or args.changed_since:
+        previous = verifier.load_report(args.changed_since) if args.changed_since else None
+        report = verifier.verify_tree(previous, args.workers)
+        verifier.write_report(report, args.report or args.changed_since, args.csv)
+        summary = report["summary"]
+        print(f"[VERIFICATION] {summary['files']} sprites in {summary['themes']} themes: "
+              f"{summary['reverified']} verified, {summary['hash_unchanged']} same content, "
+              f"{summary['mtime_unchanged']} untouched since report ({summary['seconds']:.2f}s)")
+        problems = {rel: r for rel, r in report["files"].items() if r["issues"]}
+        for rel, r in sorted(problems.items()):
+            print(f"[ISSUE] {rel}: {'; '.join(r['issues'])}")
+        if problems:
+            print(f"\n[SUMMARY] Issues found: {len(problems)}")
+            raise SystemExit(1)
+        print("[SUCCESS] No palette issues")
+        return
+
     if args.theme:
         verifier.verify_specific_theme(args.theme)
     elif args.job:
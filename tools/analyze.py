@@ -7,32 +7,218 @@ Verifies a built release zip against tools/package_manifest.json:
   - listed Data JSONs parse
   - per-prefix file-count floors (sprite payload completeness)
   - minimum count of sprites_* theme dirs
+  - sprite .bin and TEX payloads are sound: palette block present, TEX pair
+    sizes as listed under the manifest's "payloads", and every payload reads
+    back with a matching CRC
+  - with --lock, no payload went missing, shrank or changed content since the
+    lockfile (per-entry size, CRC-32 and blake2b-128) of the previous release
+
+Everything except the payload reads is evaluated in ONE sweep over the zip's
+central directory -- floors are looked up by directory prefix, not rescanned
+per floor -- so the gate stays linear as the release grows. Payloads are then
+read in a thread pool (zlib inflates outside the GIL) and hashed in the same
+read. Against a lock, entries whose central-directory size and CRC-32 still
+match it are taken as unchanged and not read at all, so a release that only
+touched a few themes only inflates those (--full reads everything anyway).
+
+--write-lock records this zip's payloads; Publish.ps1 writes one next to every
+zip. Accept intended payload changes by copying that lock over
+tools/package_lock.json.
 
 Exit 0 = pass, exit 1 = any violation (listed). Run by Publish.ps1 as a hard gate.
 
-Usage: python tools/analyze.py --zip <path-to-release-zip> [--manifest <path>]
+Usage: python tools/analyze.py --zip <path-to-release-zip> [--manifest <path>] [--workers N]
+                                [--lock <lock.json>] [--write-lock <lock.json>] [--full]
 """
 import argparse
+import hashlib
 import json
 import os
+import re
 import sys
+import threading
+import time
 import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+UNIT_PREFIX = "FFTIVC/data/enhanced/fftpack/unit/"
+TEX_NAME = re.compile(r"(?:^|/)tex_(\d+)\.bin$")
+PALETTE_BYTES = 512   # 16 palettes x 16 colors x BGR555 at the head of every sprite bin
+READ_CHUNK = 1 << 20
+LOCK_FORMAT = 1
+
+
+class Sweep:
+    """Everything the gate needs from the central directory, gathered in one pass."""
+
+    def __init__(self, manifest, wrapper):
+        self.wrapper = wrapper
+        self.bad_slashes = []
+        self.file_count = 0
+        self.required = set(manifest["required_entries"])
+        self.parse_json = set(manifest.get("parse_json", []))
+        self.present = set()
+        self.floors = manifest.get("floors", [])
+        self.floor_counts = [0] * len(self.floors)
+        # Floors whose prefix is a directory are matched by walking each path's
+        # ancestors (O(depth)); anything else falls back to a startswith test.
+        self.dir_floors, self.loose_floors = {}, []
+        for i, floor in enumerate(self.floors):
+            if floor["prefix"].endswith("/"):
+                self.dir_floors.setdefault(floor["prefix"], []).append(i)
+            else:
+                self.loose_floors.append(i)
+        self.theme_dirs = set()
+        payloads = manifest.get("payloads", {})
+        self.sprite_prefixes = tuple(payloads.get("sprite_prefixes", []))
+        self.tex_pair_sizes = payloads.get("tex_pair_sizes")
+        self.payloads = {}    # relative name -> ZipInfo, every sprite bin / TEX
+        self.jobs = []        # (kind, relative name, ZipInfo)
+        self.failures = []
+
+    def add(self, info, rel):
+        self.file_count += 1
+        if rel in self.required or rel in self.parse_json:
+            self.present.add(rel)
+            if rel in self.parse_json:
+                self.jobs.append(("json", rel, info))
+
+        floors = self.floors
+        cut = rel.find("/")
+        while cut != -1:
+            for i in self.dir_floors.get(rel[:cut + 1], ()):
+                if rel.endswith(floors[i].get("suffix", "")):
+                    self.floor_counts[i] += 1
+            cut = rel.find("/", cut + 1)
+        for i in self.loose_floors:
+            if rel.startswith(floors[i]["prefix"]) and rel.endswith(floors[i].get("suffix", "")):
+                self.floor_counts[i] += 1
+
+        if rel.startswith(UNIT_PREFIX + "sprites_"):
+            rest = rel[len(UNIT_PREFIX):]
+            if "/" in rest:
+                self.theme_dirs.add(rest.split("/", 1)[0])
+
+        if not rel.endswith(".bin"):
+            return
+        tex = TEX_NAME.search(rel)
+        if tex or rel.startswith(self.sprite_prefixes):
+            self.payloads[rel] = info
+        if tex and self.tex_pair_sizes:
+            expected = self.tex_pair_sizes[int(tex.group(1)) % 2]
+            if info.file_size != expected:
+                self.failures.append(f"TEX has wrong size: {rel} is {info.file_size} bytes "
+                                     f"(expected {expected})")
+            else:
+                self.jobs.append(("tex", rel, info))
+        elif rel.startswith(self.sprite_prefixes):
+            if info.file_size <= PALETTE_BYTES:
+                self.failures.append(f"sprite bin has no pixel data: {rel} is {info.file_size} bytes")
+            else:
+                self.jobs.append(("sprite", rel, info))
+
+
+def sweep(infos, manifest):
+    """Single pass over the central directory.
+
+    The zip normally wraps everything in one top-level mod folder; it is
+    stripped on the fly, assuming the first entry's top folder is the wrapper.
+    Only if some file turns out to live outside it is the sweep redone
+    without a wrapper.
+    """
+    first = next((i.filename for i in infos if not i.filename.endswith("/")), "")
+    wrapper = first.split("/", 1)[0] if "/" in first else None
+    while True:
+        result = Sweep(manifest, wrapper)
+        lead = wrapper + "/" if wrapper else ""
+        for info in infos:
+            name = info.filename
+            if "\\" in name:
+                result.bad_slashes.append(name)
+            if name.endswith("/"):
+                continue
+            if not name.startswith(lead):
+                break
+            result.add(info, name[len(lead):])
+        else:
+            return result
+        wrapper = None
 
 
-def load_entries(zf):
-    names = zf.namelist()
-    bad = [n for n in names if "\\" in n]
-    files = [n for n in names if not n.endswith("/")]
-    return files, bad
+_local = threading.local()
 
 
-def strip_wrapper(files):
-    """The zip wraps everything in one top-level mod folder; strip it if so."""
-    tops = {f.split("/", 1)[0] for f in files}
-    if len(tops) == 1 and all("/" in f for f in files):
-        w = tops.pop()
-        return [f[len(w) + 1:] for f in files], w
-    return files, None
+def check_payload(zip_path, kind, rel, info):
+    """Read one entry end to end (zipfile verifies the CRC at EOF).
+
+    Returns (failure or None, blake2b-128 hex digest or None).
+    """
+    zf = getattr(_local, "zf", None)
+    if zf is None:
+        zf = _local.zf = zipfile.ZipFile(zip_path)
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with zf.open(info) as fh:
+            if kind == "json":
+                try:
+                    json.loads(fh.read())
+                except ValueError as exc:
+                    return f"JSON does not parse: {rel} ({exc})", None
+                return None, None
+            head = chunk = fh.read(PALETTE_BYTES)
+            while chunk:
+                digest.update(chunk)
+                chunk = fh.read(READ_CHUNK)
+    except (zipfile.BadZipFile, zlib.error, OSError, EOFError) as exc:
+        return f"payload unreadable: {rel} ({exc})", None
+    if kind == "sprite" and not any(head):
+        return f"sprite bin has an empty palette block: {rel}", digest.hexdigest()
+    return None, digest.hexdigest()
+
+
+def load_lock(path):
+    """relative name -> {"size", "crc32", "blake2b"} from a lockfile."""
+    with open(path, encoding="utf-8") as fh:
+        lock = json.load(fh)
+    if lock.get("format") != LOCK_FORMAT:
+        raise SystemExit(f"analyze.py: {path} is lock format {lock.get('format')}, expected {LOCK_FORMAT}")
+    return lock["entries"]
+
+
+def write_lock(path, payloads, digests):
+    """One entry per line, sorted, so lock diffs between releases read cleanly in review."""
+    lines = []
+    for rel in sorted(payloads):
+        if rel not in digests:
+            continue    # unreadable entries are already failures; leave them out
+        info = payloads[rel]
+        entry = {"size": info.file_size, "crc32": f"{info.CRC:08x}", "blake2b": digests[rel]}
+        lines.append(f"    {json.dumps(rel)}: {json.dumps(entry)}")
+    with open(path, "w", encoding="utf-8", newline="\n") as fh:
+        fh.write('{\n  "_comment": "Release payload lock written by tools/analyze.py --write-lock; '
+                 'the next release is verified against it with --lock.",\n')
+        fh.write(f'  "format": {LOCK_FORMAT},\n  "hash": "blake2b-128",\n  "entries": {{\n')
+        fh.write(",\n".join(lines))
+        fh.write("\n  }\n}\n")
+
+
+def lock_delta(lock, payloads, digests):
+    """Failures for payloads that went missing, shrank or changed; plus the count of new ones."""
+    failures = []
+    for rel in sorted(lock.keys() - payloads.keys()):
+        failures.append(f"locked payload missing: {rel}")
+    new = 0
+    for rel, info in payloads.items():
+        entry = lock.get(rel)
+        if entry is None:
+            new += 1
+        elif info.file_size < entry["size"]:
+            failures.append(f"payload truncated since lock: {rel} is {info.file_size} bytes "
+                            f"(lock has {entry['size']})")
+        elif rel in digests and digests[rel] != entry["blake2b"]:
+            failures.append(f"payload changed since lock: {rel}")
+    return failures, new
 
 
 def main():
@@ -41,60 +227,93 @@ def main():
     ap.add_argument("--manifest",
                     default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
                                          "package_manifest.json"))
+    ap.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                    help="payload validation threads")
+    ap.add_argument("--lock", help="verify payloads against this lockfile (previous release)")
+    ap.add_argument("--write-lock", help="write this zip's payload lockfile here")
+    ap.add_argument("--full", action="store_true",
+                    help="read every payload even when it matches the lock")
     args = ap.parse_args()
 
     with open(args.manifest, encoding="utf-8") as fh:
         manifest = json.load(fh)
 
     failures = []
-    zf = zipfile.ZipFile(args.zip)
-    files, bad_slashes = load_entries(zf)
+    with zipfile.ZipFile(args.zip) as zf:
+        result = sweep(zf.infolist(), manifest)
 
-    if bad_slashes:
-        failures.append(f"{len(bad_slashes)} entries use backslashes "
-                        f"(flatten on strict extractors), e.g. {bad_slashes[0]}")
+    if result.bad_slashes:
+        failures.append(f"{len(result.bad_slashes)} entries use backslashes "
+                        f"(flatten on strict extractors), e.g. {result.bad_slashes[0]}")
 
-    files, wrapper = strip_wrapper(files)
-    fileset = set(files)
-    print(f"analyze.py: {len(files)} files"
+    wrapper = result.wrapper
+    print(f"analyze.py: {result.file_count} files"
           + (f" under wrapper '{wrapper}/'" if wrapper else " (no wrapper folder)"))
 
     for req in manifest["required_entries"]:
-        if req not in fileset:
+        if req not in result.present:
             failures.append(f"required entry missing: {req}")
 
-    for jpath in manifest.get("parse_json", []):
-        if jpath not in fileset:
-            continue  # absence already reported above if required
-        full = (wrapper + "/" + jpath) if wrapper else jpath
-        try:
-            json.loads(zf.read(full))
-        except Exception as exc:  # noqa: BLE001 - any parse failure fails the gate
-            failures.append(f"JSON does not parse: {jpath} ({exc})")
-
-    for floor in manifest.get("floors", []):
+    for floor, count in zip(result.floors, result.floor_counts):
         prefix, suffix = floor["prefix"], floor.get("suffix", "")
-        count = sum(1 for f in files if f.startswith(prefix) and f.endswith(suffix))
         if count < floor["min"]:
             failures.append(f"floor violated: {count} files at {prefix}*{suffix} "
                             f"(need >= {floor['min']}: {floor['desc']})")
         else:
             print(f"  ok: {count} files at {prefix}*{suffix} (floor {floor['min']})")
 
-    unit_prefix = "FFTIVC/data/enhanced/fftpack/unit/"
-    theme_dirs = {f[len(unit_prefix):].split("/", 1)[0]
-                  for f in files
-                  if f.startswith(unit_prefix + "sprites_") and "/" in f[len(unit_prefix):]}
-    if len(theme_dirs) < manifest["min_theme_dirs"]:
-        failures.append(f"only {len(theme_dirs)} sprites_* theme dirs under unit/ "
+    if len(result.theme_dirs) < manifest["min_theme_dirs"]:
+        failures.append(f"only {len(result.theme_dirs)} sprites_* theme dirs under unit/ "
                         f"(need >= {manifest['min_theme_dirs']})")
     else:
-        print(f"  ok: {len(theme_dirs)} sprites_* theme dirs (floor {manifest['min_theme_dirs']})")
+        print(f"  ok: {len(result.theme_dirs)} sprites_* theme dirs (floor {manifest['min_theme_dirs']})")
+
+    # Payload reads: JSON parse checks plus sprite/TEX CRC + palette checks.
+    # Entries the lock vouches for (same size and CRC-32) keep its digest unread.
+    lock = load_lock(args.lock) if args.lock else None
+    digests, jobs = {}, result.jobs
+    if lock is not None and not args.full:
+        jobs = []
+        for kind, rel, info in result.jobs:
+            entry = lock.get(rel) if kind != "json" else None
+            if entry and entry["size"] == info.file_size and int(entry["crc32"], 16) == info.CRC:
+                digests[rel] = entry["blake2b"]
+            else:
+                jobs.append((kind, rel, info))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        checked = list(pool.map(lambda job: check_payload(args.zip, *job), jobs))
+    payload_failures = list(result.failures)
+    for (kind, rel, _), (problem, digest) in zip(jobs, checked):
+        if problem:
+            payload_failures.append(problem)
+        if digest:
+            digests[rel] = digest
+    failures.extend(payload_failures)
+    if not payload_failures:
+        kinds = [kind for kind, _, _ in jobs]
+        skipped = len(result.jobs) - len(jobs)
+        print(f"  ok: {kinds.count('sprite')} sprite bins + {kinds.count('tex')} TEX payloads "
+              f"validated ({time.perf_counter() - started:.2f}s)"
+              + (f", {skipped} unchanged per lock" if skipped else ""))
+
+    if lock is not None:
+        lock_failures, new = lock_delta(lock, result.payloads, digests)
+        failures.extend(lock_failures)
+        if not lock_failures:
+            print(f"  ok: {len(lock)} locked payloads intact ({new} new since {args.lock})")
+
+    if args.write_lock:
+        write_lock(args.write_lock, result.payloads, digests)
+        print(f"  wrote {len(digests)} payload hashes to {args.write_lock}")
 
     if failures:
         print(f"\nanalyze.py: FAIL ({len(failures)} violations):", file=sys.stderr)
         for f in failures:
             print(f"  - {f}", file=sys.stderr)
+        if lock is not None and args.write_lock:
+            print(f"  (intended payload changes: copy {args.write_lock} over {args.lock})", file=sys.stderr)
         sys.exit(1)
     print("analyze.py: PASS")
 